@@ -1,30 +1,191 @@
 from __future__ import annotations
 
+import asyncio
+import cProfile
+import logging
+import time
+from typing import Any
+
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
 from homeassistant.const import Platform
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN, STORAGE_VERSION, STORAGE_KEY_OPEN_METEO, STORAGE_KEY_SHADING_MASK, STORAGE_KEY_ENERGY,
+    SERVICE_CAPTURE_PROFILE, ATTR_DURATION, DEF_PROFILE_DURATION_S, MAX_PROFILE_DURATION_S,
+    SERVICE_DUMP_TRACE, ATTR_COUNT,
+    SERVICE_CALIBRATE, ATTR_DAYS, ATTR_APPLY, ATTR_ENTRY_ID, DEF_CALIBRATION_DAYS, MAX_CALIBRATION_DAYS,
+)
+from .calibration import CalibrationResult
+from .diagnostic_trace import DEFAULT_TRACE_SIZE
 from .coordinator import SPVMCoordinator
+from .profiling import write_profile
+
+_LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+CAPTURE_PROFILE_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_DURATION, default=DEF_PROFILE_DURATION_S): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=MAX_PROFILE_DURATION_S)
+    ),
+})
+
+DUMP_TRACE_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_COUNT, default=1): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=DEFAULT_TRACE_SIZE)
+    ),
+})
+
+CALIBRATE_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_DAYS, default=DEF_CALIBRATION_DAYS): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=MAX_CALIBRATION_DAYS)
+    ),
+    vol.Optional(ATTR_APPLY, default=False): cv.boolean,
+    vol.Optional(ATTR_ENTRY_ID): cv.string,
+})
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Register SPVM services."""
+
+    async def _async_capture_profile(call: ServiceCall) -> None:
+        """Profile the event loop thread for a while (opt-in, cProfile)."""
+        duration = call.data[ATTR_DURATION]
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as err:  # another profiler is already active
+            raise HomeAssistantError(f"SPVM: cannot start profiler: {err}") from err
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profile.disable()
+        path = hass.config.path(f"spvm_profile_{int(time.time())}.cprof")
+        top = await hass.async_add_executor_job(write_profile, profile, path)
+        _LOGGER.info("SPVM profile (%ss) saved to %s\n%s", duration, path, top)
+
+    async def _async_dump_trace(call: ServiceCall) -> ServiceResponse:
+        """Log the latest production estimate breakdown of each entry and return recent records."""
+        count = call.data[ATTR_COUNT]
+        entries: dict[str, Any] = {}
+        for entry_id, coordinator in hass.data.get(DOMAIN, {}).items():
+            breakdown = coordinator.trace.format_last()
+            if breakdown is not None:
+                _LOGGER.info("%s", breakdown)
+            entries[entry_id] = {
+                "breakdown": breakdown,
+                "records": coordinator.trace.as_dicts(count),
+            }
+        return {"entries": entries}
+
+    async def _async_calibrate(call: ServiceCall) -> ServiceResponse:
+        """Fit efficiency, degradation and winter shading of one or every entry to its PV history.
+
+        Every selected entry is fitted before any result is applied (applying
+        reloads the entry); a failed entry is reported in the response.
+        """
+        days = call.data[ATTR_DAYS]
+        coordinators: dict[str, SPVMCoordinator] = dict(hass.data.get(DOMAIN, {}))
+        if ATTR_ENTRY_ID in call.data:
+            entry_id = call.data[ATTR_ENTRY_ID]
+            if entry_id not in coordinators:
+                raise HomeAssistantError(f"SPVM: no loaded entry {entry_id}")
+            coordinators = {entry_id: coordinators[entry_id]}
+
+        entries: dict[str, Any] = {}
+        results: dict[str, CalibrationResult] = {}
+        for entry_id, coordinator in coordinators.items():
+            try:
+                result = await coordinator.async_calibrate(days)
+            except Exception as err:  # Reported per entry, the others still run
+                _LOGGER.warning("SPVM calibration (%s) failed: %s", coordinator.entry.title, err)
+                entries[entry_id] = {"error": str(err)}
+                continue
+            _LOGGER.info(
+                "SPVM calibration (%s, %s days): %s, RMSE %s -> %s W on %s clear-sky samples%s",
+                coordinator.entry.title, days, result.options(), result.rmse_before_w,
+                result.rmse_after_w, result.clear_samples,
+                "".join(f"; {note}" for note in result.notes),
+            )
+            entries[entry_id] = result.to_dict()
+            results[entry_id] = result
+
+        if call.data[ATTR_APPLY]:
+            for entry_id, result in results.items():
+                if not result.clear_samples:
+                    continue
+                coordinator = coordinators[entry_id]
+                entry = coordinator.entry
+                if result.mask is not None:
+                    await coordinator.async_save_learned_mask(result.mask)
+                # Reloads the entry through the update listener
+                hass.config_entries.async_update_entry(
+                    entry, options={**entry.options, **result.options()}
+                )
+                entries[entry_id]["applied"] = True
+        return {"entries": entries}
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_CAPTURE_PROFILE, _async_capture_profile, schema=CAPTURE_PROFILE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_DUMP_TRACE, _async_dump_trace, schema=DUMP_TRACE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_CALIBRATE, _async_calibrate, schema=CALIBRATE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up SPVM from a config entry."""
     hass.data.setdefault(DOMAIN, {})
 
     coordinator = SPVMCoordinator(hass, entry)
+    # Saved Open-Meteo series: first refresh does not wait for the network
+    await coordinator.async_restore_open_meteo()
+    await coordinator.async_load_shading_masks()
+    await coordinator.async_restore_energy()
     await coordinator.async_config_entry_first_refresh()
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    if coordinator.event_driven:
+        entry.async_on_unload(coordinator.async_setup_event_listeners())
+    # Options changes rebuild the coordinator (site model, ephemeris, Open-Meteo client)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload SPVM config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
+        coordinator: SPVMCoordinator | None = hass.data[DOMAIN].pop(entry.entry_id, None)
+        if coordinator is not None:
+            # Reloads (options changes) continue today's energy totals
+            await coordinator.async_save_energy()
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove SPVM persistent data when the config entry is deleted."""
+    for key in (STORAGE_KEY_OPEN_METEO, STORAGE_KEY_SHADING_MASK, STORAGE_KEY_ENERGY):
+        store = Store(hass, STORAGE_VERSION, key.format(entry_id=entry.entry_id))
+        await store.async_remove()
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+SPVM Backtest - replay recorded history through the solar model.
+
+Reads a CSV or Parquet export (one row per sample: timestamp, PV power and
+optionally lux, temperature, cloud cover), streams it in chunks through the
+batch solar model and reports expected-vs-actual errors (MAE, RMSE, bias)
+overall, by hour of day and by month. Memory stays bounded by the chunk size,
+so years of 30 s data are fine.
+
+Optional Open-Meteo JSON files (archive or historical-forecast API, hourly
+section) replace the clear-sky model with recorded irradiance, as the
+integration does live.
+
+Usage (from /config/custom_components/spvm):
+    python3 backtest.py history.csv --config config_entry-spvm.json --tz Europe/Paris
+    python3 backtest.py history.parquet --lat 43.45 --lon 5.61 --peak 3000 --output series.csv
+
+Expected columns (rename with --column pv_w=sensor.pv_power ...):
+    timestamp   ISO 8601 (naive = UTC) or UTC epoch seconds
+    pv_w        PV power (W, or kW with --pv-unit kW)
+    lux, temp_c, cloud_pct   optional
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import sys
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone, tzinfo
+from typing import Any, Iterable, Iterator, Optional, Sequence, TextIO
+
+try:
+    from .const import KW_TO_W, UNIT_KW
+    from .open_meteo import AVERAGED_COLUMNS, IrradianceSeries
+    from .shading_mask import load_shading_mask
+    from .solar_model import (
+        MODEL_OPTION_KEYS, ModelParams, SolarBatchResult, compute_batch, local_seconds, np,
+    )
+except ImportError:  # Standalone: python3 backtest.py
+    from const import KW_TO_W, UNIT_KW
+    from open_meteo import AVERAGED_COLUMNS, IrradianceSeries
+    from shading_mask import load_shading_mask
+    from solar_model import (
+        MODEL_OPTION_KEYS, ModelParams, SolarBatchResult, compute_batch, local_seconds, np,
+    )
+
+# Rows per chunk (≈ 17 days of 30 s data, a few MB of arrays)
+DEFAULT_CHUNK_ROWS = 50_000
+
+# Logical history columns -> default header in the input file
+HISTORY_COLUMNS = {
+    "timestamp": "timestamp",
+    "pv_w": "pv_w",
+    "lux": "lux",
+    "temp_c": "temp_c",
+    "cloud_pct": "cloud_pct",
+}
+
+@dataclass
+class HistoryChunk:
+    """A slice of recorded history, column-oriented (NaN = missing)."""
+
+    timestamps: np.ndarray    # UTC epoch seconds
+    pv_w: np.ndarray
+    lux: Optional[np.ndarray] = None
+    temp_c: Optional[np.ndarray] = None
+    cloud_pct: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return int(self.timestamps.shape[0])
+
+
+# ---------------------------------------------------------------------
+#  History readers (streaming)
+# ---------------------------------------------------------------------
+
+def _parse_timestamp(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+
+
+def _parse_float(value: Optional[str]) -> float:
+    if value is None:
+        return math.nan
+    try:
+        return float(value)
+    except ValueError:  # "unknown", "unavailable", ""
+        return math.nan
+
+
+def _make_chunk(columns: dict[str, list], pv_scale: float) -> HistoryChunk:
+    def opt(name: str) -> Optional[np.ndarray]:
+        values = columns.get(name)
+        return np.asarray(values, dtype=float) if values is not None else None
+
+    return HistoryChunk(
+        timestamps=np.asarray(columns["timestamp"], dtype=float),
+        pv_w=np.asarray(columns["pv_w"], dtype=float) * pv_scale,
+        lux=opt("lux"),
+        temp_c=opt("temp_c"),
+        cloud_pct=opt("cloud_pct"),
+    )
+
+
+def _iter_csv(
+    path: str, headers: dict[str, str], chunk_rows: int, pv_scale: float
+) -> Iterator[HistoryChunk]:
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        present = {
+            name: header for name, header in headers.items()
+            if reader.fieldnames and header in reader.fieldnames
+        }
+        for required in ("timestamp", "pv_w"):
+            if required not in present:
+                raise ValueError(f"{path}: missing column '{headers[required]}'")
+        columns: dict[str, list] = {name: [] for name in present}
+        for row in reader:
+            columns["timestamp"].append(_parse_timestamp(row[present["timestamp"]]))
+            for name, header in present.items():
+                if name != "timestamp":
+                    columns[name].append(_parse_float(row[header]))
+            if len(columns["timestamp"]) >= chunk_rows:
+                yield _make_chunk(columns, pv_scale)
+                columns = {name: [] for name in present}
+        if columns["timestamp"]:
+            yield _make_chunk(columns, pv_scale)
+
+
+def _iter_parquet(
+    path: str, headers: dict[str, str], chunk_rows: int, pv_scale: float
+) -> Iterator[HistoryChunk]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as err:
+        raise RuntimeError("Parquet input needs pyarrow (pip install pyarrow)") from err
+
+    pf = pq.ParquetFile(path)
+    names = set(pf.schema_arrow.names)
+    present = {name: header for name, header in headers.items() if header in names}
+    for required in ("timestamp", "pv_w"):
+        if required not in present:
+            raise ValueError(f"{path}: missing column '{headers[required]}'")
+    for batch in pf.iter_batches(batch_size=chunk_rows, columns=list(present.values())):
+        columns: dict[str, Any] = {}
+        for name, header in present.items():
+            values = batch.column(batch.schema.get_field_index(header)).to_numpy(zero_copy_only=False)
+            if name == "timestamp":
+                if np.issubdtype(values.dtype, np.datetime64):
+                    values = values.astype("datetime64[ms]").astype(np.int64) / 1000.0
+                elif values.dtype == object:
+                    values = np.array([_parse_timestamp(str(v)) for v in values], dtype=float)
+            else:
+                values = np.array([_parse_float(v) for v in values], dtype=float) \
+                    if values.dtype == object else values.astype(float)
+            columns[name] = values
+        yield _make_chunk(columns, pv_scale)
+
+
+def iter_history(
+    path: str,
+    columns: Optional[dict[str, str]] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    pv_unit: str = "W",
+) -> Iterator[HistoryChunk]:
+    """Stream a CSV or Parquet history file as HistoryChunk objects.
+
+    Args:
+        path: .csv or .parquet file, rows in chronological order
+        columns: Logical column -> header overrides (see HISTORY_COLUMNS)
+        chunk_rows: Rows per chunk
+        pv_unit: "W" or "kW"
+    """
+    if np is None:
+        raise RuntimeError("The backtest needs NumPy")
+    headers = {**HISTORY_COLUMNS, **(columns or {})}
+    pv_scale = KW_TO_W if pv_unit == UNIT_KW else 1.0
+    reader = _iter_parquet if path.lower().endswith((".parquet", ".pq")) else _iter_csv
+    yield from reader(path, headers, chunk_rows, pv_scale)
+
+
+# ---------------------------------------------------------------------
+#  Recorded Open-Meteo irradiance
+# ---------------------------------------------------------------------
+
+class RecordedIrradiance:
+    """Open-Meteo hourly series (saved JSON responses) sampled at any timestamps.
+
+    Radiation values are means over the preceding step, so they are placed
+    mid-step before linear interpolation, like the live client. Times outside
+    the series are NaN (the model then falls back to clear sky).
+    """
+
+    def __init__(self, series: Sequence[IrradianceSeries]):
+        series = sorted((s for s in series if len(s)), key=lambda s: s.start)
+        if not series:
+            raise ValueError("no Open-Meteo data")
+        self.step_s = series[0].step_s
+        self.times = np.concatenate([np.asarray(s.times, dtype=float) for s in series])
+        names = set().union(*(s.columns for s in series))
+        self.columns: dict[str, np.ndarray] = {}
+        for name in names:
+            self.columns[name] = np.concatenate([
+                np.asarray(s.columns[name], dtype=float) if name in s.columns
+                else np.full(len(s), math.nan)
+                for s in series
+            ])
+
+    @classmethod
+    def load(cls, paths: Iterable[str]) -> RecordedIrradiance:
+        loaded = []
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                series = IrradianceSeries.from_response(json.load(f))
+            if series is not None:
+                loaded.append(series)
+        return cls(loaded)
+
+    def sample(self, name: str, ts: np.ndarray) -> Optional[np.ndarray]:
+        values = self.columns.get(name)
+        if values is None:
+            return None
+        times = self.times - self.step_s / 2.0 if name in AVERAGED_COLUMNS else self.times
+        return np.interp(ts, times, values, left=math.nan, right=math.nan)
+
+
+# ---------------------------------------------------------------------
+#  Model evaluation and error statistics
+# ---------------------------------------------------------------------
+
+def _fill(values: Optional[np.ndarray], fallback: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    """Replace missing (None / NaN) samples by the fallback series."""
+    if values is None or fallback is None:
+        return fallback if values is None else values
+    return np.where(np.isnan(values), fallback, values)
+
+
+def expected_power(
+    params: ModelParams,
+    chunk: HistoryChunk,
+    irradiance: Optional[RecordedIrradiance] = None,
+) -> tuple[np.ndarray, SolarBatchResult]:
+    """Expected production (W, degradation and cap applied) for every sample of a chunk."""
+    ts = chunk.timestamps
+    real = {}
+    if irradiance is not None:
+        real = {
+            "real_ghi_wm2": irradiance.sample("ghi", ts),
+            # Main array GTI; arrays 2..N are transposed from DNI / DHI
+            "real_gti_wm2": [irradiance.sample("gti", ts)],
+            "real_dni_wm2": irradiance.sample("dni", ts),
+            "real_dhi_wm2": irradiance.sample("dhi", ts),
+        }
+    cloud = chunk.cloud_pct
+    temp = chunk.temp_c
+    if irradiance is not None:
+        # Recorded weather fills in for missing local sensors, as in the coordinator
+        cloud = _fill(cloud, irradiance.sample("cloud", ts))
+        temp = _fill(temp, irradiance.sample("temp", ts))
+    model = compute_batch(
+        ts,
+        cloud_pct=cloud,
+        temp_c=temp,
+        lux=chunk.lux,
+        **params.batch_kwargs(),
+        **real,
+    )
+    degradation = max(0.0, 1.0 - params.degradation_pct / 100.0)
+    expected = np.minimum(model.expected_corrected_w * degradation, params.cap_max_w)
+    return expected, model
+
+
+def local_hour_month(ts: np.ndarray, tz: Optional[tzinfo]) -> tuple[np.ndarray, np.ndarray]:
+    """Local hour of day (0-23) and month (1-12)."""
+    local = local_seconds(ts, tz)
+    hour = ((local // 3600.0) % 24).astype(np.int64)
+    month = local.astype("datetime64[s]").astype("datetime64[M]").astype(np.int64) % 12 + 1
+    return hour, month
+
+
+class ErrorStats:
+    """Running sums of (expected - actual) per bucket: O(buckets) memory."""
+
+    def __init__(self, buckets: int):
+        self.n = np.zeros(buckets)
+        self.sum_err = np.zeros(buckets)
+        self.sum_abs = np.zeros(buckets)
+        self.sum_sq = np.zeros(buckets)
+        self.sum_actual = np.zeros(buckets)
+        self.sum_expected = np.zeros(buckets)
+
+    def add(self, bucket: np.ndarray, expected: np.ndarray, actual: np.ndarray) -> None:
+        size = self.n.size
+        err = expected - actual
+        self.n += np.bincount(bucket, minlength=size)
+        self.sum_err += np.bincount(bucket, weights=err, minlength=size)
+        self.sum_abs += np.bincount(bucket, weights=np.abs(err), minlength=size)
+        self.sum_sq += np.bincount(bucket, weights=err * err, minlength=size)
+        self.sum_actual += np.bincount(bucket, weights=actual, minlength=size)
+        self.sum_expected += np.bincount(bucket, weights=expected, minlength=size)
+
+    def row(self, i: int) -> dict[str, Any]:
+        n = self.n[i]
+        if n == 0:
+            return {"n": 0}
+        return {
+            "n": int(n),
+            "mae_w": round(self.sum_abs[i] / n, 1),
+            "rmse_w": round(math.sqrt(self.sum_sq[i] / n), 1),
+            "bias_w": round(self.sum_err[i] / n, 1),   # > 0: model overestimates
+            "mean_actual_w": round(self.sum_actual[i] / n, 1),
+            "mean_expected_w": round(self.sum_expected[i] / n, 1),
+        }
+
+
+@dataclass
+class BacktestReport:
+    """Error metrics of a backtest run (expected - actual, W)."""
+
+    overall: dict[str, Any]
+    by_hour: dict[int, dict[str, Any]]
+    by_month: dict[int, dict[str, Any]]
+    samples: int           # Rows read
+    evaluated: int         # Rows with PV data (daytime only unless include_night)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    def format(self) -> str:
+        def line(label: str, r: dict[str, Any]) -> str:
+            if not r.get("n"):
+                return f"  {label:>8}  {'-':>8}"
+            return (
+                f"  {label:>8}  {r['n']:>8}  {r['mae_w']:>8.1f}  {r['rmse_w']:>8.1f}  {r['bias_w']:>8.1f}"
+                f"  {r['mean_actual_w']:>8.1f}  {r['mean_expected_w']:>8.1f}"
+            )
+
+        header = f"  {'':>8}  {'n':>8}  {'MAE W':>8}  {'RMSE W':>8}  {'bias W':>8}  {'actual':>8}  {'expected':>8}"
+        out = [
+            "SPVM BACKTEST",
+            f"  rows read: {self.samples}, evaluated: {self.evaluated}",
+            header,
+            line("overall", self.overall),
+            "",
+            "By hour (local):",
+            header,
+        ]
+        out += [line(f"{h:02d}h", r) for h, r in self.by_hour.items() if r.get("n")]
+        out += ["", "By month:", header]
+        out += [line(f"{m:02d}", r) for m, r in self.by_month.items() if r.get("n")]
+        return "\n".join(out)
+
+
+def run_backtest(
+    chunks: Iterable[HistoryChunk],
+    params: ModelParams,
+    irradiance: Optional[RecordedIrradiance] = None,
+    tz: Optional[tzinfo] = None,
+    include_night: bool = False,
+    series_out: Optional[TextIO] = None,
+) -> BacktestReport:
+    """Replay history chunks through the model and accumulate error metrics.
+
+    Args:
+        chunks: HistoryChunk iterator (e.g. iter_history())
+        params: Model parameters to evaluate
+        irradiance: Recorded Open-Meteo data (None = clear-sky model + local sensors)
+        tz: Time zone for the hour / month breakdown (None = UTC)
+        include_night: Also score samples with the sun below the horizon
+        series_out: Optional text stream receiving the expected-vs-actual series as CSV
+    """
+    total, hourly, monthly = ErrorStats(1), ErrorStats(24), ErrorStats(12)
+    samples = evaluated = 0
+    writer = csv.writer(series_out) if series_out is not None else None
+    if writer is not None:
+        writer.writerow(["timestamp", "actual_w", "expected_w", "elevation_deg"])
+
+    for chunk in chunks:
+        samples += len(chunk)
+        expected, model = expected_power(params, chunk, irradiance)
+        actual = chunk.pv_w
+        mask = ~np.isnan(actual)
+        if not include_night:
+            mask &= model.elevation_deg > 0.0
+        if writer is not None:
+            writer.writerows(zip(
+                chunk.timestamps.astype(np.int64).tolist(),
+                np.round(actual, 1).tolist(),
+                np.round(expected, 1).tolist(),
+                np.round(model.elevation_deg, 2).tolist(),
+            ))
+        if not mask.any():
+            continue
+        e, a = expected[mask], actual[mask]
+        hour, month = local_hour_month(chunk.timestamps[mask], tz)
+        total.add(np.zeros(e.shape[0], dtype=np.int64), e, a)
+        hourly.add(hour, e, a)
+        monthly.add(month - 1, e, a)
+        evaluated += int(e.shape[0])
+
+    return BacktestReport(
+        overall=total.row(0),
+        by_hour={h: hourly.row(h) for h in range(24)},
+        by_month={m + 1: monthly.row(m) for m in range(12)},
+        samples=samples,
+        evaluated=evaluated,
+    )
+
+
+# ---------------------------------------------------------------------
+#  CLI
+# ---------------------------------------------------------------------
+
+def load_options(path: str) -> dict[str, Any]:
+    """SPVM options from a diagnostics download or a plain options JSON file."""
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    data = raw.get("data", raw)
+    if "config" in data or "options" in data:
+        return {**(data.get("config") or {}), **(data.get("options") or {})}
+    return data
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Replay PV history through the SPVM solar model.")
+    p.add_argument("history", help="CSV or Parquet history file")
+    p.add_argument("--config", help="SPVM diagnostics download or options JSON")
+    p.add_argument("--open-meteo", action="append", default=[], metavar="JSON",
+                   help="Saved Open-Meteo response (hourly); repeatable")
+    p.add_argument("--column", action="append", default=[], metavar="NAME=HEADER",
+                   help="Input column header for timestamp, pv_w, lux, temp_c, cloud_pct")
+    p.add_argument("--pv-unit", choices=["W", "kW"], default="W")
+    p.add_argument("--tz", help="Time zone for the hourly / monthly breakdown (default UTC)")
+    p.add_argument("--include-night", action="store_true")
+    p.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    p.add_argument("--output", help="Write the expected-vs-actual series to this CSV")
+    p.add_argument("--json", action="store_true", help="Print the report as JSON")
+    p.add_argument("--horizon", help="Horizon profile or saved shading mask, applied to every array")
+    for flag, name in (
+        ("--lat", "lat_deg"), ("--lon", "lon_deg"), ("--altitude", "altitude_m"),
+        ("--tilt", "panel_tilt_deg"), ("--azimuth", "panel_azimuth_deg"),
+        ("--peak", "panel_peak_w"), ("--efficiency", "system_efficiency"),
+        ("--degradation", "degradation_pct"), ("--cap", "cap_max_w"),
+        ("--lux-floor", "lux_floor_factor"), ("--lux-min-elevation", "lux_min_elevation_deg"),
+        ("--shading-winter", "shading_winter_pct"),
+    ):
+        p.add_argument(flag, dest=name, type=float, help=f"Override {name}")
+    return p
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _build_parser().parse_args(argv)
+    options = load_options(args.config) if args.config else {}
+    overrides = {name: getattr(args, name) for name in MODEL_OPTION_KEYS if hasattr(args, name)}
+    try:
+        params = ModelParams.from_options(options, **overrides)
+    except ValueError as err:
+        print(f"error: {err} (use --config or --lat/--lon)", file=sys.stderr)
+        return 2
+
+    columns = dict(c.split("=", 1) for c in args.column)
+    tz = None
+    if args.tz:
+        from zoneinfo import ZoneInfo
+        tz = ZoneInfo(args.tz)
+    irradiance = RecordedIrradiance.load(args.open_meteo) if args.open_meteo else None
+    if args.horizon:
+        mask = load_shading_mask(args.horizon)
+        params = params.with_shading_mask(mask)
+
+    chunks = iter_history(args.history, columns, args.chunk_rows, args.pv_unit)
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as out:
+            report = run_backtest(chunks, params, irradiance, tz, args.include_night, out)
+    else:
+        report = run_backtest(chunks, params, irradiance, tz, args.include_night)
+
+    print(json.dumps(report.to_dict(), indent=2) if args.json else report.format())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+SPVM Calibration - fit system efficiency, degradation and shading from history.
+
+The solar model is evaluated over the history at unit efficiency (no
+shading, no degradation, no cap), chunk by chunk, keeping only the daytime
+rows; recorded production is then regressed against it with closed-form
+least squares on clear-sky samples only:
+
+1. Daytime samples (sun above 10°, not clipped by the inverter cap)
+2. Clear days: smooth production/model ratio all day long, and a daily ratio
+   close to the best days of the same month
+3. Per sun-position bin (azimuth × elevation) and per month, the least-squares
+   factor actual ≈ factor × model, from np.bincount sums
+4. Unshaded reference = bins near the upper envelope of those factors; its
+   factor is the system efficiency (with a linear trend over time when the
+   history spans most of a year: the trend becomes the degradation)
+5. Monthly factors below 95 % of the reference give the winter shading period
+   and percentage; bin factors give a horizon / shading mask
+
+Everything is vectorized: a year of minute data is fitted in about a second.
+
+Usage (from /config/custom_components/spvm):
+    python3 calibration.py history.csv --config config_entry-spvm.json --tz Europe/Paris
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import sys
+from dataclasses import dataclass, field, fields, replace
+from datetime import tzinfo
+from typing import Any, Optional, Sequence
+
+try:
+    from .const import (
+        CONF_SYSTEM_EFFICIENCY, CONF_DEGRADATION_PCT,
+        CONF_SHADING_WINTER_PCT, CONF_SHADING_MONTH_START, CONF_SHADING_MONTH_END,
+    )
+    from .shading_mask import ShadingMask
+    from .solar_model import MODEL_OPTION_KEYS, ModelParams, compute_batch, local_seconds, np
+except ImportError:  # Standalone: python3 calibration.py
+    from const import (
+        CONF_SYSTEM_EFFICIENCY, CONF_DEGRADATION_PCT,
+        CONF_SHADING_WINTER_PCT, CONF_SHADING_MONTH_START, CONF_SHADING_MONTH_END,
+    )
+    from shading_mask import ShadingMask
+    from solar_model import MODEL_OPTION_KEYS, ModelParams, compute_batch, local_seconds, np
+
+# Sample selection
+CLEAR_MIN_ELEVATION_DEG = 10.0     # Low sun: horizon, refraction and model errors dominate
+CLEAR_MIN_MODEL_FRACTION = 0.05    # Model output below 5 % of peak is ignored
+CLEAR_MAX_VARIABILITY = 0.02       # Mean |Δ(actual/model)| between samples, relative to the day ratio
+CLEAR_MIN_DAY_RATIO = 0.8          # Day ratio vs the 90th percentile of its month
+CLEAR_MIN_DAY_SAMPLES = 12
+CLEAR_MAX_GAP_S = 900.0            # Larger gaps do not count in the variability
+CAP_MARGIN = 0.98                  # Samples above 98 % of the cap are clipped by the inverter
+
+# Sun-position bins (shading mask)
+MASK_AZ_STEP_DEG = 10.0
+MASK_EL_STEP_DEG = 5.0
+MIN_BIN_SAMPLES = 10
+REFERENCE_PERCENTILE = 0.9         # Upper envelope of the bin factors
+UNSHADED_MIN_FACTOR = 0.95         # Bins within 5 % of the envelope are unshaded
+
+# Shading period / degradation
+SHADED_MONTH_FACTOR = 0.95
+MIN_MONTH_SAMPLES = 60
+MIN_TREND_DAYS = 300               # Degradation is only fitted on (almost) a full year
+MAX_DEGRADATION_PCT = 30.0
+EFFICIENCY_RANGE = (0.5, 1.0)      # Same bounds as the option
+MAX_SHADING_PCT = 90.0
+
+
+@dataclass
+class CalibrationResult:
+    """Fitted parameters, in the units of the SPVM options."""
+
+    system_efficiency: float
+    degradation_pct: float
+    shading_winter_pct: float
+    shading_month_start: int
+    shading_month_end: int
+    monthly_factors: dict[int, Optional[float]]
+    mask: Optional[ShadingMask]    # Sun-position shading factors (shading_mask: learned)
+    mask_samples: list[list[int]]  # Clear-sky samples per mask bin
+    samples: int                   # Rows with PV data
+    clear_samples: int             # Rows used for the fit
+    days: int
+    clear_days: int
+    rmse_before_w: Optional[float]  # Clear samples, current parameters
+    rmse_after_w: Optional[float]   # Clear samples, fitted parameters (seasonal shading)
+    rmse_mask_w: Optional[float]    # Clear samples, fitted parameters with the learned mask
+    notes: list[str] = field(default_factory=list)
+
+    def options(self) -> dict[str, Any]:
+        """Fitted values as SPVM options (ready for async_update_entry)."""
+        return {
+            CONF_SYSTEM_EFFICIENCY: self.system_efficiency,
+            CONF_DEGRADATION_PCT: self.degradation_pct,
+            CONF_SHADING_WINTER_PCT: self.shading_winter_pct,
+            CONF_SHADING_MONTH_START: self.shading_month_start,
+            CONF_SHADING_MONTH_END: self.shading_month_end,
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        out = {f.name: getattr(self, f.name) for f in fields(self)}
+        out["mask"] = self.mask.to_dict() if self.mask is not None else None
+        return out
+
+
+@dataclass
+class CalibrationSamples:
+    """Daytime rows a clear-sky fit can use, with the model at unit efficiency.
+
+    Built per chunk of history (select_samples()) and merged, so a long
+    history is never modelled or held in full: only these columns of the
+    candidate rows are kept.
+    """
+
+    timestamps: np.ndarray
+    pv_w: np.ndarray
+    model_w: np.ndarray              # Unit efficiency, no shading / degradation / cap
+    elevation_deg: np.ndarray
+    azimuth_deg: np.ndarray
+    temp_c: Optional[np.ndarray]
+    samples: int                     # Rows with PV data
+    days: np.ndarray                 # Local days (days since the epoch) with PV data
+
+    @classmethod
+    def merge(cls, parts: Sequence[CalibrationSamples]) -> CalibrationSamples:
+        """Concatenate consecutive chunks (at least one)."""
+        temps = [p.temp_c for p in parts]
+        return cls(
+            timestamps=np.concatenate([p.timestamps for p in parts]),
+            pv_w=np.concatenate([p.pv_w for p in parts]),
+            model_w=np.concatenate([p.model_w for p in parts]),
+            elevation_deg=np.concatenate([p.elevation_deg for p in parts]),
+            azimuth_deg=np.concatenate([p.azimuth_deg for p in parts]),
+            temp_c=np.concatenate(temps) if all(t is not None for t in temps) else None,
+            samples=sum(p.samples for p in parts),
+            days=np.unique(np.concatenate([p.days for p in parts])),
+        )
+
+
+# ---------------------------------------------------------------------
+#  Helpers
+# ---------------------------------------------------------------------
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    """num / den, NaN where den is 0."""
+    return np.divide(num, den, out=np.full(num.shape, math.nan), where=den > 0)
+
+
+def _weighted_quantile(values: np.ndarray, weights: np.ndarray, q: float) -> float:
+    order = np.argsort(values)
+    cum = np.cumsum(weights[order])
+    return float(values[order][np.searchsorted(cum, q * cum[-1])])
+
+
+def _in_period(months: np.ndarray, start: int, end: int) -> np.ndarray:
+    if start <= end:
+        return (months >= start) & (months <= end)
+    return (months >= start) | (months <= end)
+
+
+def _seasonal_factor(months: np.ndarray, pct: float, start: int, end: int) -> np.ndarray:
+    """Vectorized equivalent of the winter shading correction."""
+    if pct <= 0:
+        return np.ones(months.shape)
+    return np.where(_in_period(months, start, end), max(0.0, 1.0 - pct / 100.0), 1.0)
+
+
+def _shaded_period(factors: dict[int, Optional[float]]) -> Optional[tuple[int, int]]:
+    """Longest run of consecutive shaded months (wrapping over the new year)."""
+    shaded = [f is not None and f < SHADED_MONTH_FACTOR for f in (factors[m] for m in range(1, 13))]
+    if all(shaded):
+        return (1, 12)
+    best: Optional[tuple[int, int]] = None
+    best_len = 0
+    start = shaded.index(False)  # scan from a non-shaded month so runs do not wrap mid-scan
+    run_start, run_len = None, 0
+    for k in range(1, 13):
+        i = (start + k) % 12
+        if shaded[i]:
+            run_start = i if run_len == 0 else run_start
+            run_len += 1
+            if run_len > best_len:
+                best, best_len = (run_start + 1, i + 1), run_len
+        else:
+            run_len = 0
+    return best
+
+
+def _day_ratio_threshold(day_ratio: np.ndarray, day_month: np.ndarray) -> np.ndarray:
+    """Per day: CLEAR_MIN_DAY_RATIO × 90th percentile of the day ratios of its month."""
+    threshold = np.full(day_ratio.shape, math.inf)
+    valid = ~np.isnan(day_ratio)
+    if not valid.any():
+        return threshold
+    overall = np.percentile(day_ratio[valid], 90)
+    for month in range(1, 13):
+        in_month = valid & (day_month == month)
+        if not in_month.any():
+            continue
+        p90 = np.percentile(day_ratio[in_month], 90) if in_month.sum() >= 5 else overall
+        threshold[day_month == month] = CLEAR_MIN_DAY_RATIO * p90
+    return threshold
+
+
+# ---------------------------------------------------------------------
+#  Fit
+# ---------------------------------------------------------------------
+
+def calibrate(
+    timestamps: np.ndarray,
+    pv_w: np.ndarray,
+    params: ModelParams,
+    tz: Optional[tzinfo] = None,
+    temp_c: Optional[np.ndarray] = None,
+) -> CalibrationResult:
+    """Fit efficiency, degradation and shading to recorded PV production.
+
+    The whole history is modelled at once; use select_samples() per chunk,
+    CalibrationSamples.merge() and fit_samples() to bound memory.
+
+    Args:
+        timestamps: UTC epoch seconds, ascending
+        pv_w: Recorded PV power (W), NaN = missing
+        params: Current model parameters (geometry is kept, the fitted ones are the starting point)
+        tz: Local time zone (clear-day grouping and months), None = UTC
+        temp_c: Optional temperature series; without it the temperature losses end up in the efficiency
+    """
+    return fit_samples(select_samples(timestamps, pv_w, params, tz, temp_c), params, tz)
+
+
+def select_samples(
+    timestamps: np.ndarray,
+    pv_w: np.ndarray,
+    params: ModelParams,
+    tz: Optional[tzinfo] = None,
+    temp_c: Optional[np.ndarray] = None,
+) -> CalibrationSamples:
+    """Model one chunk of history (see calibrate()) and keep the rows the fit can use."""
+    if np is None:
+        raise RuntimeError("Calibration needs NumPy")
+    ts = np.asarray(timestamps, dtype=float)
+    pv = np.asarray(pv_w, dtype=float)
+
+    # --- Model at unit efficiency, no shading / degradation / cap ---
+    unit = replace(params.with_shading_mask(None), system_efficiency=1.0, shading_winter_pct=0.0)
+    model = compute_batch(ts, temp_c=temp_c, **unit.batch_kwargs())
+    m = model.expected_corrected_w
+    el = model.elevation_deg
+
+    has_pv = ~np.isnan(pv)
+    keep = (
+        has_pv & (pv >= 0.0)
+        & (el >= CLEAR_MIN_ELEVATION_DEG)
+        & (m >= CLEAR_MIN_MODEL_FRACTION * params.peak_w)
+        & (pv < CAP_MARGIN * params.cap_max_w)
+    )
+    return CalibrationSamples(
+        timestamps=ts[keep],
+        pv_w=pv[keep],
+        model_w=m[keep],
+        elevation_deg=el[keep],
+        azimuth_deg=model.azimuth_deg[keep],
+        temp_c=None if temp_c is None else np.asarray(temp_c, dtype=float)[keep],
+        samples=int(has_pv.sum()),
+        days=np.unique(np.floor(local_seconds(ts[has_pv], tz) / 86400.0).astype(np.int64)),
+    )
+
+
+def fit_samples(
+    samples: CalibrationSamples, params: ModelParams, tz: Optional[tzinfo] = None
+) -> CalibrationResult:
+    """Fit efficiency, degradation and shading to the samples kept by select_samples()."""
+    if np is None:
+        raise RuntimeError("Calibration needs NumPy")
+    ts, pv, m = samples.timestamps, samples.pv_w, samples.model_w
+    el, az = samples.elevation_deg, samples.azimuth_deg
+    temp_c = samples.temp_c
+    notes: list[str] = []
+
+    local = local_seconds(ts, tz)
+    day = np.floor(local / 86400.0).astype(np.int64)
+    month = local.astype("datetime64[s]").astype("datetime64[M]").astype(np.int64) % 12 + 1
+
+    # --- Clear days: smooth ratio, daily ratio near the month's best ---
+    empty = CalibrationResult(
+        system_efficiency=params.system_efficiency, degradation_pct=params.degradation_pct,
+        shading_winter_pct=params.shading_winter_pct, shading_month_start=params.shading_month_start,
+        shading_month_end=params.shading_month_end, monthly_factors={k: None for k in range(1, 13)},
+        mask=None, mask_samples=[],
+        samples=samples.samples, clear_samples=0, days=int(samples.days.size), clear_days=0,
+        rmse_before_w=None, rmse_after_w=None, rmse_mask_w=None, notes=notes,
+    )
+    if ts.size < CLEAR_MIN_DAY_SAMPLES:
+        notes.append("not enough daytime samples, parameters unchanged")
+        return empty
+
+    d0 = int(day.min())
+    day_i = day - d0
+    n_days = int(day_i.max()) + 1
+    r = pv / m
+    sum_pv = np.bincount(day_i, weights=pv, minlength=n_days)
+    sum_m = np.bincount(day_i, weights=m, minlength=n_days)
+    n_day = np.bincount(day_i, minlength=n_days)
+    day_ratio = _ratio(sum_pv, sum_m)
+
+    same_day = (day_i[1:] == day_i[:-1]) & (np.diff(ts) <= CLEAR_MAX_GAP_S)
+    jumps = np.abs(np.diff(r))[same_day]
+    jump_sum = np.bincount(day_i[1:][same_day], weights=jumps, minlength=n_days)
+    jump_n = np.bincount(day_i[1:][same_day], minlength=n_days)
+    variability = _ratio(_ratio(jump_sum, jump_n.astype(float)), day_ratio)
+
+    day_month = np.zeros(n_days, dtype=np.int64)
+    day_month[day_i] = month
+    clear_day = (
+        (n_day >= CLEAR_MIN_DAY_SAMPLES)
+        & (variability <= CLEAR_MAX_VARIABILITY)
+        & (day_ratio >= _day_ratio_threshold(day_ratio, day_month))
+    )
+    sel = np.flatnonzero(clear_day[day_i])
+    if sel.size < CLEAR_MIN_DAY_SAMPLES:
+        notes.append("no clear-sky day found, parameters unchanged")
+        return empty
+
+    a, mm = pv[sel], m[sel]
+
+    # --- Sun-position bins: least-squares factor a ≈ f × m per bin ---
+    n_az = int(round(360.0 / MASK_AZ_STEP_DEG))
+    n_el = int(math.ceil(90.0 / MASK_EL_STEP_DEG))
+    az_i = (np.floor(az[sel] / MASK_AZ_STEP_DEG).astype(np.int64)) % n_az
+    el_i = np.clip(np.floor(el[sel] / MASK_EL_STEP_DEG).astype(np.int64), 0, n_el - 1)
+    bin_i = el_i * n_az + az_i
+    n_bins = n_az * n_el
+    bin_n = np.bincount(bin_i, minlength=n_bins)
+    bin_am = np.bincount(bin_i, weights=a * mm, minlength=n_bins)
+    bin_mm = np.bincount(bin_i, weights=mm * mm, minlength=n_bins)
+    bin_f = np.where(bin_n >= MIN_BIN_SAMPLES, _ratio(bin_am, bin_mm), math.nan)
+
+    # --- Unshaded reference: bins near the upper envelope ---
+    ok = ~np.isnan(bin_f)
+    if not ok.any():
+        notes.append("not enough clear-sky samples per sun position, parameters unchanged")
+        return empty
+    envelope = _weighted_quantile(bin_f[ok], bin_mm[ok], REFERENCE_PERCENTILE)
+    unshaded_bin = ok & (bin_f >= UNSHADED_MIN_FACTOR * envelope)
+    ref = unshaded_bin[bin_i]
+    k = float(np.dot(a[ref], mm[ref]) / np.dot(mm[ref], mm[ref]))
+    month_sel = month[sel]
+    span_days = float(ts[sel][-1] - ts[sel][0]) / 86400.0
+
+    # --- Efficiency (and degradation trend over a long enough history) ---
+    degradation_pct = params.degradation_pct
+    if span_days >= MIN_TREND_DAYS:
+        # Seasonally shaded months would read as a trend: keep them out
+        month_k = _ratio(np.bincount(month_sel, weights=a * mm, minlength=13),
+                         k * np.bincount(month_sel, weights=mm * mm, minlength=13))
+        ref &= ~(month_k[month_sel] < SHADED_MONTH_FACTOR)
+        ref_a, ref_m = a[ref], mm[ref]
+        tau = (ts[sel][ref] - ts[sel][0]) / (365.25 * 86400.0)
+        # Normal equations of a ≈ m × (k0 + k1 τ)
+        s00 = float(np.dot(ref_m, ref_m))
+        s01 = float(np.dot(ref_m * ref_m, tau))
+        s11 = float(np.dot(ref_m * ref_m, tau * tau))
+        b0 = float(np.dot(ref_a, ref_m))
+        b1 = float(np.dot(ref_a * ref_m, tau))
+        det = s00 * s11 - s01 * s01
+        k0 = (b0 * s11 - b1 * s01) / det
+        k1 = (s00 * b1 - s01 * b0) / det
+        loss_pct = -k1 * (span_days / 365.25) / k0 * 100.0
+        degradation_pct = round(min(MAX_DEGRADATION_PCT, max(0.0, loss_pct)), 2)
+        if loss_pct < 0:
+            notes.append("production increased over the history (cleaning?), degradation set to 0")
+        efficiency = k0
+        ref_scale = np.full(a.shape, k0) + k1 * (ts[sel] - ts[sel][0]) / (365.25 * 86400.0)
+    else:
+        efficiency = k / max(1e-6, 1.0 - degradation_pct / 100.0)
+        ref_scale = np.full(a.shape, k)
+        notes.append(
+            f"history spans {span_days:.0f} days (< {MIN_TREND_DAYS}), degradation kept at {degradation_pct}%"
+        )
+
+    if not EFFICIENCY_RANGE[0] <= efficiency <= EFFICIENCY_RANGE[1]:
+        notes.append(
+            f"fitted efficiency {efficiency:.3f} outside {EFFICIENCY_RANGE}: check panel peak power, "
+            "orientation and PV sensor unit"
+        )
+    efficiency = round(min(EFFICIENCY_RANGE[1], max(EFFICIENCY_RANGE[0], efficiency)), 3)
+
+    # --- Shading factors relative to the unshaded reference ---
+    expected_ref = mm * ref_scale
+    num = a * expected_ref
+    den = expected_ref * expected_ref
+    bin_f = np.where(
+        bin_n >= MIN_BIN_SAMPLES,
+        np.minimum(1.0, _ratio(np.bincount(bin_i, weights=num, minlength=n_bins),
+                               np.bincount(bin_i, weights=den, minlength=n_bins))),
+        math.nan,
+    )
+    month_n = np.bincount(month_sel, minlength=13)
+    month_f = np.minimum(1.0, _ratio(np.bincount(month_sel, weights=num, minlength=13),
+                                     np.bincount(month_sel, weights=den, minlength=13)))
+    monthly = {
+        mo: (round(float(month_f[mo]), 3) if month_n[mo] >= MIN_MONTH_SAMPLES else None)
+        for mo in range(1, 13)
+    }
+
+    covered = sum(1 for f in monthly.values() if f is not None)
+    if covered < 3:
+        notes.append(
+            f"history covers {covered} month(s): seasonal shading cannot be told apart from efficiency"
+        )
+    period = _shaded_period(monthly)
+    if period is None:
+        shading_pct, month_start, month_end = 0.0, params.shading_month_start, params.shading_month_end
+    else:
+        month_start, month_end = period
+        in_period = _in_period(month_sel, month_start, month_end)
+        factor = float(np.sum(num[in_period]) / np.sum(den[in_period]))
+        shading_pct = round(min(MAX_SHADING_PCT, max(0.0, (1.0 - factor) * 100.0)), 1)
+
+    # --- Fit quality on the clear samples ---
+    def rmse(pred: np.ndarray, deg: float) -> float:
+        pred = np.minimum(pred * max(0.0, 1.0 - deg / 100.0), params.cap_max_w)
+        return round(float(np.sqrt(np.mean((pred - a) ** 2))), 1)
+
+    current = compute_batch(
+        ts[sel], temp_c=None if temp_c is None else temp_c[sel], **params.batch_kwargs()
+    ).expected_corrected_w
+    seasonal = mm * efficiency * _seasonal_factor(month_sel, shading_pct, month_start, month_end)
+    masked = mm * efficiency * np.nan_to_num(bin_f, nan=1.0)[bin_i]
+
+    factors = bin_f.reshape(n_el, n_az)
+    return CalibrationResult(
+        system_efficiency=efficiency,
+        degradation_pct=degradation_pct,
+        shading_winter_pct=shading_pct,
+        shading_month_start=int(month_start),
+        shading_month_end=int(month_end),
+        monthly_factors=monthly,
+        mask=ShadingMask(
+            [[None if math.isnan(f) else round(float(f), 3) for f in row] for row in factors],
+            MASK_AZ_STEP_DEG,
+            MASK_EL_STEP_DEG,
+        ),
+        mask_samples=bin_n.reshape(n_el, n_az).tolist(),
+        samples=samples.samples,
+        clear_samples=int(sel.size),
+        days=int(samples.days.size),
+        clear_days=int(clear_day.sum()),
+        rmse_before_w=rmse(current, params.degradation_pct),
+        rmse_after_w=rmse(seasonal, degradation_pct),
+        rmse_mask_w=rmse(masked, degradation_pct),
+        notes=notes,
+    )
+
+
+def resample_steps(
+    change_ts: np.ndarray, values: np.ndarray, start: float, end: float, step_s: float = 60.0
+) -> tuple[np.ndarray, np.ndarray]:
+    """Sample a state-change history (value held until the next change) on a regular grid.
+
+    Recorder histories only store changes; a value held for an hour must weigh
+    as much as a value that changed every minute.
+    """
+    grid = np.arange(math.ceil(start / step_s) * step_s, end, step_s)
+    pos = np.searchsorted(change_ts, grid, side="right") - 1
+    out = np.full(grid.shape, math.nan)
+    valid = pos >= 0
+    out[valid] = values[pos[valid]]
+    return grid, out
+
+
+# ---------------------------------------------------------------------
+#  CLI
+# ---------------------------------------------------------------------
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Fit SPVM efficiency, degradation and shading to PV history.")
+    p.add_argument("history", help="CSV or Parquet history file (see backtest.py)")
+    p.add_argument("--config", help="SPVM diagnostics download or options JSON")
+    p.add_argument("--lat", dest="lat_deg", type=float)
+    p.add_argument("--lon", dest="lon_deg", type=float)
+    p.add_argument("--peak", dest="panel_peak_w", type=float)
+    p.add_argument("--column", action="append", default=[], metavar="NAME=HEADER")
+    p.add_argument("--pv-unit", choices=["W", "kW"], default="W")
+    p.add_argument("--tz", help="Local time zone (default UTC)")
+    p.add_argument("--mask", action="store_true", help="Include the sun-position shading mask")
+    p.add_argument("--save-mask", metavar="JSON",
+                   help="Write the learned mask to a file usable as horizon_file")
+    args = p.parse_args(argv)
+
+    # CLI only: the file loaders stay out of the integration's imports
+    try:
+        from .backtest import DEFAULT_CHUNK_ROWS, iter_history, load_options
+    except ImportError:
+        from backtest import DEFAULT_CHUNK_ROWS, iter_history, load_options
+
+    options = load_options(args.config) if args.config else {}
+    overrides = {name: getattr(args, name) for name in MODEL_OPTION_KEYS if hasattr(args, name)}
+    try:
+        params = ModelParams.from_options(options, **overrides)
+    except ValueError as err:
+        print(f"error: {err} (use --config or --lat/--lon)", file=sys.stderr)
+        return 2
+    tz = None
+    if args.tz:
+        from zoneinfo import ZoneInfo
+        tz = ZoneInfo(args.tz)
+
+    # Modelled chunk by chunk: only the candidate rows are kept
+    parts = [
+        select_samples(c.timestamps, c.pv_w, params, tz, c.temp_c)
+        for c in iter_history(args.history, dict(c.split("=", 1) for c in args.column),
+                              DEFAULT_CHUNK_ROWS, args.pv_unit)
+    ]
+    if not parts:
+        print("error: empty history", file=sys.stderr)
+        return 2
+    result = fit_samples(CalibrationSamples.merge(parts), params, tz)
+    out = result.to_dict()
+    if args.save_mask and result.mask is not None:
+        with open(args.save_mask, "w", encoding="utf-8") as f:
+            json.dump(result.mask.to_dict(), f)
+    if not args.mask:
+        del out["mask"], out["mask_samples"]
+    out["options"] = result.options()
+    print(json.dumps(out, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
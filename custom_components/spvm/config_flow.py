@@ -4,9 +4,9 @@ import logging
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.selector import EntitySelector, EntitySelectorConfig
-
-_LOGGER = logging.getLogger(__name__)
+from homeassistant.helpers.selector import (
+    EntitySelector, EntitySelectorConfig, TextSelector, TextSelectorConfig,
+)
 
 from .const import (
     DOMAIN, DEFAULT_ENTRY_TITLE,
@@ -21,7 +21,7 @@ from .const import (
     CONF_RESERVE_W, DEF_RESERVE_W, CONF_CAP_MAX_W, DEF_CAP_MAX_W, CONF_DEGRADATION_PCT, DEF_DEGRADATION_PCT,
     # solar model
     CONF_PANEL_PEAK_POWER, DEF_PANEL_PEAK_POWER, CONF_PANEL_TILT, DEF_PANEL_TILT,
-    CONF_PANEL_AZIMUTH, DEF_PANEL_AZIMUTH,
+    CONF_PANEL_AZIMUTH, DEF_PANEL_AZIMUTH, CONF_ARRAYS,
     CONF_SITE_LATITUDE, DEF_SITE_LATITUDE, CONF_SITE_LONGITUDE, DEF_SITE_LONGITUDE,
     CONF_SITE_ALTITUDE, DEF_SITE_ALTITUDE, CONF_SYSTEM_EFFICIENCY, DEF_SYSTEM_EFFICIENCY,
     # lux correction (v0.6.9)
@@ -31,10 +31,29 @@ from .const import (
     CONF_SHADING_WINTER_PCT, DEF_SHADING_WINTER_PCT,
     CONF_SHADING_MONTH_START, DEF_SHADING_MONTH_START,
     CONF_SHADING_MONTH_END, DEF_SHADING_MONTH_END,
+    CONF_SHADING_MASK, DEF_SHADING_MASK, SHADING_MASK_OFF, SHADING_MASK_HORIZON, SHADING_MASK_LEARNED,
+    CONF_HORIZON_FILE, DEF_HORIZON_FILE,
+    # forecast / Open-Meteo interpolation (v0.7.7)
+    CONF_FORECAST_HOURS, DEF_FORECAST_HOURS,
+    CONF_OPEN_METEO_INTERPOLATION, DEF_OPEN_METEO_INTERPOLATION,
+    INTERPOLATION_LINEAR, INTERPOLATION_SOLAR,
+    CONF_OPEN_METEO_MINUTELY_15, DEF_OPEN_METEO_MINUTELY_15,
     # timing
     CONF_UPDATE_INTERVAL_SECONDS, DEF_UPDATE_INTERVAL,
     CONF_SMOOTHING_WINDOW_SECONDS, DEF_SMOOTHING_WINDOW,
+    CONF_ADAPTIVE_INTERVAL, DEF_ADAPTIVE_INTERVAL,
+    CONF_UPDATE_INTERVAL_MIN_SECONDS, DEF_UPDATE_INTERVAL_MIN,
+    CONF_UPDATE_INTERVAL_MAX_SECONDS, DEF_UPDATE_INTERVAL_MAX,
+    CONF_EVENT_DRIVEN, DEF_EVENT_DRIVEN, CONF_EVENT_MIN_INTERVAL_MS, DEF_EVENT_MIN_INTERVAL_MS,
+    CONF_NIGHT_MODE, DEF_NIGHT_MODE, CONF_NIGHT_UPDATE_INTERVAL_SECONDS, DEF_NIGHT_UPDATE_INTERVAL,
+    CONF_PUBLISH_DEADBAND_W, DEF_PUBLISH_DEADBAND_W,
+    CONF_PUBLISH_DEADBAND_YIELD_PCT, DEF_PUBLISH_DEADBAND_YIELD_PCT,
+    CONF_PUBLISH_DEADBAND_REL_PCT, DEF_PUBLISH_DEADBAND_REL_PCT,
+    CONF_PUBLISH_MAX_SILENCE_S, DEF_PUBLISH_MAX_SILENCE_S,
 )
+from .solar_model import array_options, format_arrays, parse_arrays
+
+_LOGGER = logging.getLogger(__name__)
 
 REQUIRED = (CONF_PV_SENSOR, CONF_HOUSE_SENSOR)
 ALL_KEYS = (
@@ -42,13 +61,20 @@ ALL_KEYS = (
     CONF_LUX_SENSOR, CONF_TEMP_SENSOR, CONF_HUM_SENSOR, CONF_CLOUD_SENSOR,
     CONF_UNIT_POWER, CONF_UNIT_TEMP,
     CONF_UNIT_PV, CONF_UNIT_HOUSE, CONF_UNIT_GRID, CONF_UNIT_BATTERY,
-    CONF_PANEL_PEAK_POWER, CONF_PANEL_TILT, CONF_PANEL_AZIMUTH,
+    CONF_PANEL_PEAK_POWER, CONF_PANEL_TILT, CONF_PANEL_AZIMUTH, CONF_ARRAYS,
     CONF_SITE_LATITUDE, CONF_SITE_LONGITUDE, CONF_SITE_ALTITUDE,
     CONF_SYSTEM_EFFICIENCY,
     CONF_RESERVE_W, CONF_CAP_MAX_W, CONF_DEGRADATION_PCT,
     CONF_LUX_MIN_ELEVATION, CONF_LUX_FLOOR_FACTOR,
     CONF_SHADING_WINTER_PCT, CONF_SHADING_MONTH_START, CONF_SHADING_MONTH_END,
+    CONF_SHADING_MASK, CONF_HORIZON_FILE,
+    CONF_FORECAST_HOURS, CONF_OPEN_METEO_INTERPOLATION, CONF_OPEN_METEO_MINUTELY_15,
     CONF_UPDATE_INTERVAL_SECONDS, CONF_SMOOTHING_WINDOW_SECONDS,
+    CONF_ADAPTIVE_INTERVAL, CONF_UPDATE_INTERVAL_MIN_SECONDS, CONF_UPDATE_INTERVAL_MAX_SECONDS,
+    CONF_EVENT_DRIVEN, CONF_EVENT_MIN_INTERVAL_MS,
+    CONF_NIGHT_MODE, CONF_NIGHT_UPDATE_INTERVAL_SECONDS,
+    CONF_PUBLISH_DEADBAND_W, CONF_PUBLISH_DEADBAND_YIELD_PCT, CONF_PUBLISH_DEADBAND_REL_PCT,
+    CONF_PUBLISH_MAX_SILENCE_S,
 )
 
 def _ent_sel() -> EntitySelector:
@@ -80,6 +106,12 @@ def _merge_defaults(hass: HomeAssistant, cur: dict | None) -> dict:
     d.setdefault(CONF_PANEL_PEAK_POWER, DEF_PANEL_PEAK_POWER)
     d.setdefault(CONF_PANEL_TILT, DEF_PANEL_TILT)
     d.setdefault(CONF_PANEL_AZIMUTH, DEF_PANEL_AZIMUTH)
+    if d.get(CONF_ARRAYS) is None:
+        # Groupes 2..N: reprise des anciennes clés array2_* (v0.7.7)
+        try:
+            d[CONF_ARRAYS] = format_arrays(array_options(d))
+        except (TypeError, ValueError):
+            d[CONF_ARRAYS] = ""
     d.setdefault(CONF_SYSTEM_EFFICIENCY, DEF_SYSTEM_EFFICIENCY)
     d.setdefault(CONF_RESERVE_W, DEF_RESERVE_W)
     d.setdefault(CONF_CAP_MAX_W, DEF_CAP_MAX_W)
@@ -91,8 +123,26 @@ def _merge_defaults(hass: HomeAssistant, cur: dict | None) -> dict:
     d.setdefault(CONF_SHADING_WINTER_PCT, DEF_SHADING_WINTER_PCT)
     d.setdefault(CONF_SHADING_MONTH_START, DEF_SHADING_MONTH_START)
     d.setdefault(CONF_SHADING_MONTH_END, DEF_SHADING_MONTH_END)
+    # Shading mask (v0.7.7)
+    d.setdefault(CONF_SHADING_MASK, DEF_SHADING_MASK)
+    d.setdefault(CONF_HORIZON_FILE, DEF_HORIZON_FILE)
+    # Forecast horizon (v0.7.7)
+    d.setdefault(CONF_FORECAST_HOURS, DEF_FORECAST_HOURS)
+    d.setdefault(CONF_OPEN_METEO_INTERPOLATION, DEF_OPEN_METEO_INTERPOLATION)
+    d.setdefault(CONF_OPEN_METEO_MINUTELY_15, DEF_OPEN_METEO_MINUTELY_15)
     d.setdefault(CONF_UPDATE_INTERVAL_SECONDS, DEF_UPDATE_INTERVAL)
     d.setdefault(CONF_SMOOTHING_WINDOW_SECONDS, DEF_SMOOTHING_WINDOW)
+    d.setdefault(CONF_ADAPTIVE_INTERVAL, DEF_ADAPTIVE_INTERVAL)
+    d.setdefault(CONF_UPDATE_INTERVAL_MIN_SECONDS, DEF_UPDATE_INTERVAL_MIN)
+    d.setdefault(CONF_UPDATE_INTERVAL_MAX_SECONDS, DEF_UPDATE_INTERVAL_MAX)
+    d.setdefault(CONF_EVENT_DRIVEN, DEF_EVENT_DRIVEN)
+    d.setdefault(CONF_EVENT_MIN_INTERVAL_MS, DEF_EVENT_MIN_INTERVAL_MS)
+    d.setdefault(CONF_NIGHT_MODE, DEF_NIGHT_MODE)
+    d.setdefault(CONF_NIGHT_UPDATE_INTERVAL_SECONDS, DEF_NIGHT_UPDATE_INTERVAL)
+    d.setdefault(CONF_PUBLISH_DEADBAND_W, DEF_PUBLISH_DEADBAND_W)
+    d.setdefault(CONF_PUBLISH_DEADBAND_YIELD_PCT, DEF_PUBLISH_DEADBAND_YIELD_PCT)
+    d.setdefault(CONF_PUBLISH_DEADBAND_REL_PCT, DEF_PUBLISH_DEADBAND_REL_PCT)
+    d.setdefault(CONF_PUBLISH_MAX_SILENCE_S, DEF_PUBLISH_MAX_SILENCE_S)
     return d
 
 def _schema(hass: HomeAssistant, cur: dict | None) -> vol.Schema:
@@ -181,6 +231,11 @@ def _schema(hass: HomeAssistant, cur: dict | None) -> vol.Schema:
         opt_num(CONF_PANEL_PEAK_POWER, DEF_PANEL_PEAK_POWER)
         opt_num(CONF_PANEL_TILT, DEF_PANEL_TILT)
         opt_num(CONF_PANEL_AZIMUTH, DEF_PANEL_AZIMUTH)
+        # Groupes 2..N (v0.7.7): "Wc, inclinaison, azimut[, fichier horizon]" par ligne.
+        # suggested_value (et non default) pour pouvoir vider le champ
+        schema[vol.Optional(CONF_ARRAYS, description={"suggested_value": v[CONF_ARRAYS]})] = TextSelector(
+            TextSelectorConfig(multiline=True)
+        )
 
         # GPS (HA si dispo, sinon champ sans default)
         lat_default = v.get(CONF_SITE_LATITUDE, DEF_SITE_LATITUDE)
@@ -216,10 +271,56 @@ def _schema(hass: HomeAssistant, cur: dict | None) -> vol.Schema:
         opt_int(CONF_SHADING_MONTH_START, DEF_SHADING_MONTH_START)
         opt_int(CONF_SHADING_MONTH_END, DEF_SHADING_MONTH_END)
 
+        # Masque d'ombrage (v0.7.7): remplace l'ombrage saisonnier quand activé
+        schema[vol.Optional(CONF_SHADING_MASK, default=v.get(CONF_SHADING_MASK, DEF_SHADING_MASK))] = vol.In(
+            [SHADING_MASK_OFF, SHADING_MASK_HORIZON, SHADING_MASK_LEARNED]
+        )
+        schema[vol.Optional(CONF_HORIZON_FILE, default=v.get(CONF_HORIZON_FILE, DEF_HORIZON_FILE))] = str
+
+        # Forecast (v0.7.7): 0 = désactivé, max 168 h
+        curv = v.get(CONF_FORECAST_HOURS, DEF_FORECAST_HOURS)
+        schema[vol.Optional(CONF_FORECAST_HOURS, default=curv)] = vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=168)
+        )
+        schema[vol.Optional(
+            CONF_OPEN_METEO_INTERPOLATION,
+            default=v.get(CONF_OPEN_METEO_INTERPOLATION, DEF_OPEN_METEO_INTERPOLATION),
+        )] = vol.In([INTERPOLATION_SOLAR, INTERPOLATION_LINEAR])
+        schema[vol.Optional(
+            CONF_OPEN_METEO_MINUTELY_15,
+            default=v.get(CONF_OPEN_METEO_MINUTELY_15, DEF_OPEN_METEO_MINUTELY_15),
+        )] = bool
+
         # Timing
         opt_int(CONF_UPDATE_INTERVAL_SECONDS, DEF_UPDATE_INTERVAL)
         opt_int(CONF_SMOOTHING_WINDOW_SECONDS, DEF_SMOOTHING_WINDOW)
 
+        # Intervalle adaptatif (v0.7.7)
+        schema[vol.Optional(
+            CONF_ADAPTIVE_INTERVAL, default=v.get(CONF_ADAPTIVE_INTERVAL, DEF_ADAPTIVE_INTERVAL),
+        )] = bool
+        opt_int(CONF_UPDATE_INTERVAL_MIN_SECONDS, DEF_UPDATE_INTERVAL_MIN)
+        opt_int(CONF_UPDATE_INTERVAL_MAX_SECONDS, DEF_UPDATE_INTERVAL_MAX)
+
+        # Mode événementiel (v0.7.7): surplus/rendement sur changement d'état
+        schema[vol.Optional(
+            CONF_EVENT_DRIVEN, default=v.get(CONF_EVENT_DRIVEN, DEF_EVENT_DRIVEN),
+        )] = bool
+        curv = v.get(CONF_EVENT_MIN_INTERVAL_MS, DEF_EVENT_MIN_INTERVAL_MS)
+        schema[vol.Optional(CONF_EVENT_MIN_INTERVAL_MS, default=curv)] = vol.All(
+            vol.Coerce(int), vol.Range(min=100, max=60000)
+        )
+
+        # Mode nuit (v0.7.7)
+        schema[vol.Optional(CONF_NIGHT_MODE, default=v.get(CONF_NIGHT_MODE, DEF_NIGHT_MODE))] = bool
+        opt_int(CONF_NIGHT_UPDATE_INTERVAL_SECONDS, DEF_NIGHT_UPDATE_INTERVAL)
+
+        # Publication sur seuil (v0.7.7)
+        opt_num(CONF_PUBLISH_DEADBAND_W, DEF_PUBLISH_DEADBAND_W)
+        opt_num(CONF_PUBLISH_DEADBAND_YIELD_PCT, DEF_PUBLISH_DEADBAND_YIELD_PCT)
+        opt_num(CONF_PUBLISH_DEADBAND_REL_PCT, DEF_PUBLISH_DEADBAND_REL_PCT)
+        opt_int(CONF_PUBLISH_MAX_SILENCE_S, DEF_PUBLISH_MAX_SILENCE_S)
+
         return vol.Schema(schema)
 
     except Exception as err:
@@ -240,6 +341,11 @@ def _validate_required(user_input: dict) -> dict:
         errors[CONF_UNIT_POWER] = "invalid_choice"
     if user_input.get(CONF_UNIT_TEMP) not in (UNIT_C, UNIT_F, None, vol.UNDEFINED):
         errors[CONF_UNIT_TEMP] = "invalid_choice"
+    # Groupes 2..N: normalisés, et toujours enregistrés (champ vidé = plus d'ancien array2_*)
+    try:
+        user_input[CONF_ARRAYS] = format_arrays(parse_arrays(user_input.get(CONF_ARRAYS) or ""))
+    except ValueError:
+        errors[CONF_ARRAYS] = "invalid_arrays"
     return errors
 
 
@@ -26,6 +26,8 @@ KW_TO_W: Final = 1000.0
 UNIT_C: Final = "°C"
 UNIT_F: Final = "°F"
 UNIT_PERCENT: Final = "%"
+UNIT_KWH: Final = "kWh"
+UNIT_MS: Final = "ms"
 
 CONF_UNIT_POWER: Final = "unit_power"                   # "W" | "kW" (legacy global)
 CONF_UNIT_TEMP: Final = "unit_temp"                     # "°C" | "°F"
@@ -70,6 +72,11 @@ DEF_ARRAY2_PEAK_POWER: Final = 0.0                  # Désactivé par défaut
 DEF_ARRAY2_TILT: Final = 15.0                       # Pergola/toit plat typique
 DEF_ARRAY2_AZIMUTH: Final = 180.0                   # Sud par défaut
 
+# Groupes 2..N (v0.7.7+) : un par ligne "puissance_w, inclinaison, azimut[, fichier_horizon]"
+# Remplace les clés array2_* ci-dessus (encore lues tant que l'option n'a pas été enregistrée)
+CONF_ARRAYS: Final = "arrays"
+DEF_ARRAYS: Final = ""
+
 CONF_SITE_LATITUDE: Final = "site_lat"
 CONF_SITE_LONGITUDE: Final = "site_lon"
 CONF_SITE_ALTITUDE: Final = "site_alt"                  # m
@@ -97,10 +104,41 @@ DEF_SHADING_MONTH_START: Final = 11                         # Novembre par défa
 CONF_SHADING_MONTH_END: Final = "shading_month_end"        # Mois fin ombrage (1-12)
 DEF_SHADING_MONTH_END: Final = 2                            # Février par défaut
 
+# Masque d'ombrage par position du soleil (v0.7.7+) - remplace l'ombrage saisonnier
+CONF_SHADING_MASK: Final = "shading_mask"                  # "off" | "horizon" | "learned"
+SHADING_MASK_OFF: Final = "off"                             # Ombrage saisonnier (mois) ci-dessus
+SHADING_MASK_HORIZON: Final = "horizon"                     # Profil d'horizon (fichier)
+SHADING_MASK_LEARNED: Final = "learned"                     # Appris par spvm.calibrate
+DEF_SHADING_MASK: Final = SHADING_MASK_OFF
+CONF_HORIZON_FILE: Final = "horizon_file"                  # Chemin relatif à /config
+DEF_HORIZON_FILE: Final = ""
+
 # Open-Meteo API (v0.7.5+) - Irradiance réelle au lieu de modèle clear-sky
 CONF_USE_OPEN_METEO: Final = "use_open_meteo"              # Activer Open-Meteo API
 DEF_USE_OPEN_METEO: Final = True                            # Activé par défaut
 
+# Prévision de production J+1 / J+7 (v0.7.7+)
+CONF_FORECAST_HOURS: Final = "forecast_hours"              # Horizon de prévision (0 = désactivé, max 168)
+DEF_FORECAST_HOURS: Final = 48                              # Aujourd'hui + demain
+
+# Interpolation infra-horaire Open-Meteo (v0.7.7+)
+CONF_OPEN_METEO_INTERPOLATION: Final = "open_meteo_interpolation"  # "linear" | "solar"
+INTERPOLATION_LINEAR: Final = "linear"                      # Linéaire entre échantillons
+INTERPOLATION_SOLAR: Final = "solar"                        # Indice de clarté × GHI ciel clair
+DEF_OPEN_METEO_INTERPOLATION: Final = INTERPOLATION_SOLAR
+CONF_OPEN_METEO_MINUTELY_15: Final = "open_meteo_minutely_15"      # Données 15 min autour de maintenant
+DEF_OPEN_METEO_MINUTELY_15: Final = False
+
+# Gestionnaire de téléchargements Open-Meteo partagé entre entrées (hass.data)
+DATA_OPEN_METEO_FETCHER: Final = f"{DOMAIN}_open_meteo_fetcher"
+
+# Persistance du cache Open-Meteo (.storage) entre redémarrages (v0.7.7+)
+STORAGE_VERSION: Final = 1
+STORAGE_KEY_OPEN_METEO: Final = DOMAIN + ".{entry_id}.open_meteo"
+STORAGE_KEY_SHADING_MASK: Final = DOMAIN + ".{entry_id}.shading_mask"
+STORAGE_KEY_ENERGY: Final = DOMAIN + ".{entry_id}.energy"
+STORAGE_SAVE_DELAY_S: Final = 30
+
 # Intervalle / lissage / debug
 CONF_UPDATE_INTERVAL_SECONDS: Final = "update_interval_seconds"
 DEF_UPDATE_INTERVAL: Final = 30
@@ -108,6 +146,48 @@ DEF_UPDATE_INTERVAL: Final = 30
 CONF_SMOOTHING_WINDOW_SECONDS: Final = "smoothing_window_seconds"
 DEF_SMOOTHING_WINDOW: Final = 60
 
+# Intervalle adaptatif selon la volatilité PV / lux / surplus (v0.7.7+)
+CONF_ADAPTIVE_INTERVAL: Final = "adaptive_interval"
+DEF_ADAPTIVE_INTERVAL: Final = False
+CONF_UPDATE_INTERVAL_MIN_SECONDS: Final = "update_interval_min_seconds"
+DEF_UPDATE_INTERVAL_MIN: Final = 10
+CONF_UPDATE_INTERVAL_MAX_SECONDS: Final = "update_interval_max_seconds"
+DEF_UPDATE_INTERVAL_MAX: Final = 120
+ADAPTIVE_HIGH_CHANGE: Final = 0.10    # Variation > 10 % (de la crête PV, ou du lux) : intervalle / 2
+ADAPTIVE_LOW_CHANGE: Final = 0.02     # Variation < 2 % : intervalle × 1.5
+ADAPTIVE_LUX_FLOOR: Final = 1000.0    # Lux de référence minimal pour la variation relative
+
+# Mode événementiel : surplus/rendement recalculés à chaque changement PV/maison/réseau/batterie (v0.7.7+)
+CONF_EVENT_DRIVEN: Final = "event_driven"
+DEF_EVENT_DRIVEN: Final = False
+CONF_EVENT_MIN_INTERVAL_MS: Final = "event_min_interval_ms"  # Limitation de débit (ms entre 2 recalculs)
+DEF_EVENT_MIN_INTERVAL_MS: Final = 500
+
+# Mode nuit : ni Open-Meteo ni modèle solaire quand le soleil est bien sous l'horizon (v0.7.7+)
+CONF_NIGHT_MODE: Final = "night_mode"
+DEF_NIGHT_MODE: Final = True
+CONF_NIGHT_UPDATE_INTERVAL_SECONDS: Final = "night_update_interval_seconds"  # Intervalle allongé la nuit
+DEF_NIGHT_UPDATE_INTERVAL: Final = 300
+NIGHT_ELEVATION_DEG: Final = -3.0     # Soleil sous -3° : plus d'irradiance exploitable
+NIGHT_PREWARM_S: Final = 1200         # Reprise 20 min avant (cache Open-Meteo rechargé avant l'aube)
+NIGHT_MAX_SKIP_S: Final = 6 * 3600    # Nuit polaire : re-vérification au moins toutes les 6 h
+
+# Publication sur seuil : pas d'écriture d'état si la variation reste dans la bande morte (v0.7.7+)
+CONF_PUBLISH_DEADBAND_W: Final = "publish_deadband_w"              # Capteurs en W (absolu)
+DEF_PUBLISH_DEADBAND_W: Final = 0.0                                 # 0 = seules les valeurs identiques sont ignorées
+CONF_PUBLISH_DEADBAND_YIELD_PCT: Final = "publish_deadband_yield_pct"  # Rendement (points de %)
+DEF_PUBLISH_DEADBAND_YIELD_PCT: Final = 0.0
+CONF_PUBLISH_DEADBAND_REL_PCT: Final = "publish_deadband_rel_pct"  # Relatif à la dernière valeur publiée (%)
+DEF_PUBLISH_DEADBAND_REL_PCT: Final = 0.0
+CONF_PUBLISH_MAX_SILENCE_S: Final = "publish_max_silence_s"        # Republication forcée (heartbeat)
+DEF_PUBLISH_MAX_SILENCE_S: Final = 300
+PUBLISH_DEADBAND_KWH: Final = 0.01                               # Capteurs d'énergie (kWh, absolu)
+
+# Compteurs d'énergie du jour (intégration trapèzes, remise à zéro à minuit local) (v0.7.7+)
+ENERGY_SAVE_DELAY_S: Final = 300         # Sauvegarde .storage au plus toutes les 5 min (et à l'arrêt)
+ENERGY_REMAINING_REFRESH_S: Final = 3600  # Courbe "reste à produire" recalculée toutes les heures
+ENERGY_REMAINING_STEP_S: Final = 300     # Pas de la courbe du modèle (sans prévision Open-Meteo)
+
 CONF_DEBUG_EXPECTED: Final = "debug_expected"
 DEF_DEBUG_EXPECTED: Final = False
 
@@ -125,6 +205,32 @@ L_YIELD_RATIO: Final = "SPVM – Rendement (%)"
 S_SPVM_SURPLUS_NET: Final = "spvm_surplus_net"
 L_SURPLUS_NET: Final = "SPVM – Surplus net"
 
+# Valeurs lissées (moyenne pondérée dans le temps sur smoothing_window_seconds)
+S_SPVM_EXPECTED_PRODUCTION_SMOOTHED: Final = "spvm_expected_production_smoothed"
+L_EXPECTED_PRODUCTION_SMOOTHED: Final = "SPVM – Production attendue (lissée)"
+
+S_SPVM_YIELD_RATIO_SMOOTHED: Final = "spvm_yield_ratio_smoothed"
+L_YIELD_RATIO_SMOOTHED: Final = "SPVM – Rendement lissé (%)"
+
+S_SPVM_SURPLUS_NET_SMOOTHED: Final = "spvm_surplus_net_smoothed"
+L_SURPLUS_NET_SMOOTHED: Final = "SPVM – Surplus net (lissé)"
+
+S_SPVM_FORECAST_TOMORROW: Final = "spvm_forecast_tomorrow"
+L_FORECAST_TOMORROW: Final = "SPVM – Production prévue demain"
+
+# Énergie du jour (kWh, remise à zéro à minuit local)
+S_SPVM_EXPECTED_ENERGY_TODAY: Final = "spvm_expected_energy_today"
+L_EXPECTED_ENERGY_TODAY: Final = "SPVM – Énergie attendue aujourd'hui"
+
+S_SPVM_ACTUAL_ENERGY_TODAY: Final = "spvm_actual_energy_today"
+L_ACTUAL_ENERGY_TODAY: Final = "SPVM – Énergie produite aujourd'hui"
+
+S_SPVM_REMAINING_ENERGY_TODAY: Final = "spvm_remaining_energy_today"
+L_REMAINING_ENERGY_TODAY: Final = "SPVM – Énergie restant à produire aujourd'hui"
+
+S_SPVM_UPDATE_DURATION: Final = "spvm_update_duration"
+L_UPDATE_DURATION: Final = "SPVM – Durée de mise à jour"
+
 # Attributs
 ATTR_MODEL_TYPE: Final = "model_type"
 ATTR_SOURCE: Final = "source"
@@ -135,3 +241,19 @@ ATTR_PANEL: Final = "panel"
 ATTR_NOTE: Final = "note"
 
 NOTE_SOLAR_MODEL: Final = "physical_solar_model"
+
+# Services
+SERVICE_CAPTURE_PROFILE: Final = "capture_profile"
+ATTR_DURATION: Final = "duration"
+DEF_PROFILE_DURATION_S: Final = 60
+MAX_PROFILE_DURATION_S: Final = 600
+SERVICE_DUMP_TRACE: Final = "dump_trace"
+ATTR_COUNT: Final = "count"
+SERVICE_CALIBRATE: Final = "calibrate"
+ATTR_DAYS: Final = "days"
+ATTR_APPLY: Final = "apply"
+ATTR_ENTRY_ID: Final = "entry_id"
+DEF_CALIBRATION_DAYS: Final = 30
+MAX_CALIBRATION_DAYS: Final = 365
+CALIBRATION_STEP_S: Final = 60.0          # Historique ré-échantillonné à la minute
+CALIBRATION_CHUNK_S: Final = 86400.0      # Historique lu et modélisé jour par jour (mémoire bornée)
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass
+import math
+from dataclasses import dataclass, replace
 from datetime import timedelta, datetime, timezone
-from typing import Any, Optional, Union, Dict
+from time import monotonic, perf_counter
+from typing import Any, Optional, Union, Dict, List, Tuple
 
-from homeassistant.core import HomeAssistant, State
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
@@ -27,37 +34,101 @@ from .const import (
     CONF_PANEL_AZIMUTH, DEF_PANEL_AZIMUTH,
     CONF_SITE_LATITUDE, DEF_SITE_LATITUDE, CONF_SITE_LONGITUDE, DEF_SITE_LONGITUDE,
     CONF_SITE_ALTITUDE, DEF_SITE_ALTITUDE, CONF_SYSTEM_EFFICIENCY, DEF_SYSTEM_EFFICIENCY,
-    # second array (multi-orientation support)
-    CONF_ARRAY2_PEAK_POWER, DEF_ARRAY2_PEAK_POWER,
-    CONF_ARRAY2_TILT, DEF_ARRAY2_TILT,
-    CONF_ARRAY2_AZIMUTH, DEF_ARRAY2_AZIMUTH,
     # lux correction & seasonal shading
     CONF_LUX_MIN_ELEVATION, DEF_LUX_MIN_ELEVATION, CONF_LUX_FLOOR_FACTOR, DEF_LUX_FLOOR_FACTOR,
     CONF_LUX_MAX_CHANGE_PCT, DEF_LUX_MAX_CHANGE_PCT,
     CONF_SHADING_WINTER_PCT, DEF_SHADING_WINTER_PCT,
     CONF_SHADING_MONTH_START, DEF_SHADING_MONTH_START, CONF_SHADING_MONTH_END, DEF_SHADING_MONTH_END,
+    CONF_SHADING_MASK, DEF_SHADING_MASK, SHADING_MASK_HORIZON, SHADING_MASK_LEARNED,
+    CONF_HORIZON_FILE, DEF_HORIZON_FILE,
     # Open-Meteo API
     CONF_USE_OPEN_METEO, DEF_USE_OPEN_METEO,
+    CONF_FORECAST_HOURS, DEF_FORECAST_HOURS,
+    CONF_OPEN_METEO_INTERPOLATION, DEF_OPEN_METEO_INTERPOLATION,
+    CONF_OPEN_METEO_MINUTELY_15, DEF_OPEN_METEO_MINUTELY_15,
+    DATA_OPEN_METEO_FETCHER,
+    STORAGE_VERSION, STORAGE_KEY_OPEN_METEO, STORAGE_KEY_SHADING_MASK, STORAGE_SAVE_DELAY_S,
     # timing
     CONF_UPDATE_INTERVAL_SECONDS, DEF_UPDATE_INTERVAL,
     CONF_SMOOTHING_WINDOW_SECONDS, DEF_SMOOTHING_WINDOW,
+    CONF_ADAPTIVE_INTERVAL, DEF_ADAPTIVE_INTERVAL,
+    CONF_UPDATE_INTERVAL_MIN_SECONDS, DEF_UPDATE_INTERVAL_MIN,
+    CONF_UPDATE_INTERVAL_MAX_SECONDS, DEF_UPDATE_INTERVAL_MAX,
+    ADAPTIVE_HIGH_CHANGE, ADAPTIVE_LOW_CHANGE, ADAPTIVE_LUX_FLOOR,
+    CONF_EVENT_DRIVEN, DEF_EVENT_DRIVEN, CONF_EVENT_MIN_INTERVAL_MS, DEF_EVENT_MIN_INTERVAL_MS,
+    CONF_NIGHT_MODE, DEF_NIGHT_MODE, CONF_NIGHT_UPDATE_INTERVAL_SECONDS, DEF_NIGHT_UPDATE_INTERVAL,
+    NIGHT_ELEVATION_DEG, NIGHT_PREWARM_S, NIGHT_MAX_SKIP_S,
+    CALIBRATION_STEP_S, CALIBRATION_CHUNK_S,
+    CONF_PUBLISH_DEADBAND_W, DEF_PUBLISH_DEADBAND_W,
+    CONF_PUBLISH_DEADBAND_YIELD_PCT, DEF_PUBLISH_DEADBAND_YIELD_PCT,
+    CONF_PUBLISH_DEADBAND_REL_PCT, DEF_PUBLISH_DEADBAND_REL_PCT,
+    CONF_PUBLISH_MAX_SILENCE_S, DEF_PUBLISH_MAX_SILENCE_S,
+    STORAGE_KEY_ENERGY, ENERGY_SAVE_DELAY_S, ENERGY_REMAINING_REFRESH_S, ENERGY_REMAINING_STEP_S,
     # labels
     ATTR_MODEL_TYPE, ATTR_SOURCE, ATTR_DEGRADATION_PCT, ATTR_SYSTEM_EFFICIENCY,
     ATTR_SITE, ATTR_PANEL, ATTR_NOTE, NOTE_SOLAR_MODEL,
 )
-from .solar_model import SolarInputs, compute as solar_compute
-from .open_meteo import OpenMeteoClient, SolarIrradiance
+from .solar_model import (
+    ArraySpec,
+    ModelParams,
+    SolarResult,
+    SolarSite,
+    clear_sky_ghi_at,
+    next_elevation_crossing,
+    array_options,
+    compute_batch as solar_compute_batch,
+    np,
+)
+from .profiling import UpdateProfiler
+from .diagnostic_trace import DiagnosticTrace, TraceRecord
+from .smoothing import TimeWeightedAverage
+from .energy import EnergyAccumulator, RemainingEnergy
+from .shading_mask import ShadingMask, load_shading_mask
+from .calibration import (
+    CalibrationResult, CalibrationSamples, fit_samples, resample_steps, select_samples,
+)
+from .open_meteo import OpenMeteoClient, OpenMeteoFetchManager, SolarIrradiance, IrradianceSeries
 
 _LOGGER = logging.getLogger(__name__)
 Number = Union[float, int]
 
 
-@dataclass
+@dataclass(slots=True)
+class ProductionForecast:
+    """Hourly expected production (W, mean over each hour) from Open-Meteo."""
+
+    period_start: List[float]   # UTC epoch seconds, start of each hour
+    expected_w: List[float]     # Degradation + cap applied, like expected_w
+    generated_at: datetime
+
+    def covers(self, start_ts: float, end_ts: float) -> bool:
+        """True if the forecast has every hour of [start_ts, end_ts)."""
+        return bool(self.period_start) and (
+            self.period_start[0] <= start_ts and self.period_start[-1] >= end_ts - 3600.0
+        )
+
+    def energy_kwh(self, start_ts: float, end_ts: float) -> float:
+        """Expected energy (kWh) for hours starting in [start_ts, end_ts)."""
+        return sum(
+            w for t, w in zip(self.period_start, self.expected_w) if start_ts <= t < end_ts
+        ) / 1000.0
+
+
+@dataclass(slots=True)
 class SPVMData:
     expected_w: float
     yield_ratio_pct: Optional[float]
     surplus_net_w: Optional[float]
     attrs: Dict[str, Any]
+    forecast: Optional[ProductionForecast] = None
+    # Time-weighted averages over smoothing_window_seconds (None when disabled)
+    expected_w_smoothed: Optional[float] = None
+    yield_ratio_pct_smoothed: Optional[float] = None
+    surplus_net_w_smoothed: Optional[float] = None
+    # Energy since local midnight (kWh) and model energy left until midnight
+    expected_kwh_today: Optional[float] = None
+    actual_kwh_today: Optional[float] = None
+    remaining_kwh_today: Optional[float] = None
 
 
 def _safe_float(state: Optional[State]) -> Optional[float]:
@@ -69,6 +140,39 @@ def _safe_float(state: Optional[State]) -> Optional[float]:
         return None
 
 
+def _to_w(value: Optional[float], unit: str) -> Optional[float]:
+    """Convert a power reading to W according to its configured unit."""
+    if value is None:
+        return None
+    return value * (KW_TO_W if unit == UNIT_KW else 1.0)
+
+
+def _load_power_history(
+    hass: HomeAssistant, entity_id: str, unit: str, start: datetime, end: datetime
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Recorded state changes of a power sensor as (epoch seconds, W) arrays (recorder thread)."""
+    from homeassistant.components.recorder import history
+
+    states = history.state_changes_during_period(
+        hass, start, end, entity_id, no_attributes=True, include_start_time_state=True
+    ).get(entity_id, [])
+    change_ts = np.fromiter((s.last_changed.timestamp() for s in states), float, len(states))
+    values = np.fromiter(
+        (math.nan if (w := _to_w(_safe_float(s), unit)) is None else w for s in states),
+        float, len(states),
+    )
+    return change_ts, values
+
+
+def _get_open_meteo_fetcher(hass: HomeAssistant) -> OpenMeteoFetchManager:
+    """Return the Open-Meteo fetch manager shared by all SPVM entries."""
+    fetcher: Optional[OpenMeteoFetchManager] = hass.data.get(DATA_OPEN_METEO_FETCHER)
+    if fetcher is None:
+        fetcher = OpenMeteoFetchManager(async_get_clientsession(hass))
+        hass.data[DATA_OPEN_METEO_FETCHER] = fetcher
+    return fetcher
+
+
 class SPVMCoordinator(DataUpdateCoordinator[SPVMData]):
     """Compute expected solar production with physical model + KPIs."""
 
@@ -112,10 +216,13 @@ class SPVMCoordinator(DataUpdateCoordinator[SPVMData]):
         self.panel_tilt_deg: float = float(data.get(CONF_PANEL_TILT, DEF_PANEL_TILT))
         self.panel_az_deg: float = float(data.get(CONF_PANEL_AZIMUTH, DEF_PANEL_AZIMUTH))
 
-        # Second array (multi-orientation installations, v0.7.4+)
-        self.array2_peak_w: float = float(data.get(CONF_ARRAY2_PEAK_POWER, DEF_ARRAY2_PEAK_POWER))
-        self.array2_tilt_deg: float = float(data.get(CONF_ARRAY2_TILT, DEF_ARRAY2_TILT))
-        self.array2_az_deg: float = float(data.get(CONF_ARRAY2_AZIMUTH, DEF_ARRAY2_AZIMUTH))
+        # Arrays 2..N (multi-orientation installations, v0.7.4+; any number since v0.7.7):
+        # (peak_w, tilt_deg, azimuth_deg, horizon_file)
+        try:
+            self.extra_arrays: List[Tuple[float, float, float, str]] = array_options(data)
+        except ValueError as e:
+            _LOGGER.error(f"SPVM: invalid arrays option, only the main array is used: {e}")
+            self.extra_arrays = []
 
         self.site_lat: float = float(
             data.get(CONF_SITE_LATITUDE, self.hass.config.latitude if self.hass.config.latitude is not None else 0.0)
@@ -141,23 +248,156 @@ class SPVMCoordinator(DataUpdateCoordinator[SPVMData]):
         self.shading_month_start: int = int(data.get(CONF_SHADING_MONTH_START, DEF_SHADING_MONTH_START))
         self.shading_month_end: int = int(data.get(CONF_SHADING_MONTH_END, DEF_SHADING_MONTH_END))
 
+        # Sun-position shading mask (v0.7.7+), loaded by async_load_shading_masks()
+        self.shading_mask_mode: str = data.get(CONF_SHADING_MASK, DEF_SHADING_MASK)
+        self.horizon_file: str = data.get(CONF_HORIZON_FILE, DEF_HORIZON_FILE) or ""
+        self._shading_mask_store: Store = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY_SHADING_MASK.format(entry_id=entry.entry_id)
+        )
+
+        # Prepared site model: constants bound once, with its solar geometry table
+        # (rebuilt with the coordinator on options change; masks set by async_load_shading_masks)
+        self._site = SolarSite(
+            lat_deg=self.site_lat,
+            lon_deg=self.site_lon,
+            altitude_m=self.site_alt,
+            arrays=[ArraySpec(self.panel_peak_w, self.panel_tilt_deg, self.panel_az_deg)] + [
+                ArraySpec(peak_w, tilt_deg, azimuth_deg) for peak_w, tilt_deg, azimuth_deg, _f in self.extra_arrays
+            ],
+            system_efficiency=self.system_eff,
+            lux_min_elevation_deg=self.lux_min_elevation,
+            lux_floor_factor=self.lux_floor_factor,
+            shading_winter_pct=self.shading_winter_pct,
+            shading_month_start=self.shading_month_start,
+            shading_month_end=self.shading_month_end,
+        )
+
+        # Production estimate breakdown, recorded every update, formatted on read only
+        self.trace = DiagnosticTrace({
+            "panel_peak_w": self.panel_peak_w,
+            "system_efficiency": self.system_eff,
+            "panel_tilt_deg": self.panel_tilt_deg,
+            "panel_azimuth_deg": self.panel_az_deg,
+            "site_lat": self.site_lat,
+            "site_lon": self.site_lon,
+            "arrays": [(peak_w, tilt_deg, azimuth_deg) for peak_w, tilt_deg, azimuth_deg, _f in self.extra_arrays],
+            "degradation_pct": self.degradation_pct,
+            "cap_max_w": self.cap_max_w,
+        })
+
         # Open-Meteo API (v0.7.5+)
         self.use_open_meteo: bool = bool(data.get(CONF_USE_OPEN_METEO, DEF_USE_OPEN_METEO))
+        self.forecast_hours: int = int(data.get(CONF_FORECAST_HOURS, DEF_FORECAST_HOURS))
+        self.open_meteo_interpolation: str = data.get(CONF_OPEN_METEO_INTERPOLATION, DEF_OPEN_METEO_INTERPOLATION)
+        self.open_meteo_minutely_15: bool = bool(data.get(CONF_OPEN_METEO_MINUTELY_15, DEF_OPEN_METEO_MINUTELY_15))
         self._open_meteo_client: Optional[OpenMeteoClient] = None
+        self._forecast: Optional[ProductionForecast] = None
+        self._forecast_key: Optional[tuple] = None  # (fetch time, first hour) of last forecast
+        self._open_meteo_store: Store = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY_OPEN_METEO.format(entry_id=entry.entry_id)
+        )
+        self._open_meteo_saved: Optional[datetime] = None  # fetch time of the saved series
         if self.use_open_meteo and self.site_lat != 0.0 and self.site_lon != 0.0:
             self._open_meteo_client = OpenMeteoClient(
                 latitude=self.site_lat,
                 longitude=self.site_lon,
                 panel_tilt=self.panel_tilt_deg,
                 panel_azimuth=self.panel_az_deg,
-                array2_tilt=self.array2_tilt_deg if self.array2_peak_w > 0 else None,
-                array2_azimuth=self.array2_az_deg if self.array2_peak_w > 0 else None,
+                forecast_hours=self.forecast_hours,
+                interpolation=self.open_meteo_interpolation,
+                use_minutely_15=self.open_meteo_minutely_15,
+                clear_sky=self._clear_sky_ghi_at,
+                fetcher=_get_open_meteo_fetcher(hass),
+                # Refreshes run in the background (v0.7.7+); updates never wait for the network
+                task_factory=lambda coro: entry.async_create_background_task(
+                    hass, coro, "spvm_open_meteo_refresh"
+                ),
+                on_refresh=self._on_open_meteo_refresh,
             )
             _LOGGER.info(f"SPVM: Open-Meteo API enabled for location {self.site_lat:.2f}, {self.site_lon:.2f}")
 
+        # Static configuration, built once (diagnostics; small per-sensor subsets)
+        self.static_attrs: Dict[str, Any] = {
+            ATTR_MODEL_TYPE: NOTE_SOLAR_MODEL,
+            ATTR_SOURCE: {
+                "pv": self.pv_entity,
+                "house": self.house_entity,
+                "grid": self.grid_entity,
+                "battery": self.batt_entity,
+                "lux": self.lux_entity,
+                "temp": self.temp_entity,
+                "hum": self.hum_entity,
+                "cloud": self.cloud_entity,
+            },
+            ATTR_SYSTEM_EFFICIENCY: self.system_eff,
+            ATTR_DEGRADATION_PCT: self.degradation_pct,
+            ATTR_SITE: {"lat": self.site_lat, "lon": self.site_lon, "alt_m": self.site_alt},
+            ATTR_PANEL: {"tilt_deg": self.panel_tilt_deg, "azimuth_deg": self.panel_az_deg, "peak_w": self.panel_peak_w},
+            "arrays": [
+                {"peak_w": peak_w, "tilt_deg": tilt_deg, "azimuth_deg": azimuth_deg, "horizon_file": horizon_file}
+                for peak_w, tilt_deg, azimuth_deg, horizon_file in self.extra_arrays
+            ] or None,
+            "reserve_w": self.reserve_w,
+            "cap_max_w": self.cap_max_w,
+            "shading_mask": self.shading_mask_mode,
+            ATTR_NOTE: "Open-Meteo real irradiance or clear-sky model; temp & shading corrections; then degradation, cap.",
+            "open_meteo_enabled": self.use_open_meteo,
+        }
+
+        # Hot-path timing (diagnostics / diagnostic sensor)
+        self.profiler = UpdateProfiler()
+
         # Timing
         self.update_interval_s: int = int(data.get(CONF_UPDATE_INTERVAL_SECONDS, DEF_UPDATE_INTERVAL))
         self.smoothing_window_s: int = int(data.get(CONF_SMOOTHING_WINDOW_SECONDS, DEF_SMOOTHING_WINDOW))
+        self._smooth_expected: Optional[TimeWeightedAverage] = None
+        self._smooth_yield: Optional[TimeWeightedAverage] = None
+        self._smooth_surplus: Optional[TimeWeightedAverage] = None
+        if self.smoothing_window_s > 0:
+            self._smooth_expected = TimeWeightedAverage(self.smoothing_window_s)
+            self._smooth_yield = TimeWeightedAverage(self.smoothing_window_s)
+            self._smooth_surplus = TimeWeightedAverage(self.smoothing_window_s)
+
+        # Adaptive interval (volatility of PV / lux / surplus), bounded by min / max
+        self.adaptive_interval: bool = bool(data.get(CONF_ADAPTIVE_INTERVAL, DEF_ADAPTIVE_INTERVAL))
+        self.update_interval_min_s: int = int(data.get(CONF_UPDATE_INTERVAL_MIN_SECONDS, DEF_UPDATE_INTERVAL_MIN))
+        self.update_interval_max_s: int = max(
+            self.update_interval_min_s,
+            int(data.get(CONF_UPDATE_INTERVAL_MAX_SECONDS, DEF_UPDATE_INTERVAL_MAX)),
+        )
+        self._interval_s: float = float(self.update_interval_s)  # Interval chosen for the next update
+        self._volatility_prev: Optional[Tuple[float, Optional[float], float]] = None  # (pv_w, lux, surplus_w)
+
+        # Night mode: no Open-Meteo / solar model while the sun is well below the horizon
+        self.night_mode: bool = bool(data.get(CONF_NIGHT_MODE, DEF_NIGHT_MODE))
+        self.night_interval_s: int = int(data.get(CONF_NIGHT_UPDATE_INTERVAL_SECONDS, DEF_NIGHT_UPDATE_INTERVAL))
+        self._night_resume_ts: Optional[float] = None  # UTC epoch of the pre-dawn resume
+
+        # State publishing deadbands (applied by the sensors)
+        self.publish_deadband_w: float = float(data.get(CONF_PUBLISH_DEADBAND_W, DEF_PUBLISH_DEADBAND_W))
+        self.publish_deadband_yield_pct: float = float(
+            data.get(CONF_PUBLISH_DEADBAND_YIELD_PCT, DEF_PUBLISH_DEADBAND_YIELD_PCT)
+        )
+        self.publish_deadband_rel_pct: float = float(
+            data.get(CONF_PUBLISH_DEADBAND_REL_PCT, DEF_PUBLISH_DEADBAND_REL_PCT)
+        )
+        self.publish_max_silence_s: int = int(data.get(CONF_PUBLISH_MAX_SILENCE_S, DEF_PUBLISH_MAX_SILENCE_S))
+
+        # Event-driven KPIs (surplus / yield) between model updates
+        self.event_driven: bool = bool(data.get(CONF_EVENT_DRIVEN, DEF_EVENT_DRIVEN))
+        self.event_min_interval_s: float = int(data.get(CONF_EVENT_MIN_INTERVAL_MS, DEF_EVENT_MIN_INTERVAL_MS)) / 1000.0
+
+        # Daily energy (kWh): O(1) integrators fed by every update, saved in .storage
+        self.energy_expected = EnergyAccumulator()
+        self.energy_actual = EnergyAccumulator()
+        self._energy_store: Store = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY_ENERGY.format(entry_id=entry.entry_id)
+        )
+        self._energy_save_pending = False
+        self._day_bounds: Tuple[float, float] = (0.0, 0.0)  # Local day [start, end) as UTC epochs
+        self._remaining: Optional[RemainingEnergy] = None
+        self._remaining_built_ts = 0.0
+        self._remaining_forecast: Optional[ProductionForecast] = None  # Forecast the curve was built from
 
         super().__init__(
             hass,
@@ -166,8 +406,497 @@ class SPVMCoordinator(DataUpdateCoordinator[SPVMData]):
             update_interval=timedelta(seconds=self.update_interval_s),
         )
 
+    async def async_restore_open_meteo(self) -> None:
+        """Reload the last Open-Meteo series saved before a restart."""
+        if self._open_meteo_client is None:
+            return
+        try:
+            snapshot = await self._open_meteo_store.async_load()
+        except Exception as e:
+            _LOGGER.warning(f"SPVM: could not load saved Open-Meteo data: {e}")
+            return
+        if snapshot and self._open_meteo_client.restore(snapshot):
+            self._open_meteo_saved = self._open_meteo_client.last_fetch
+            _LOGGER.debug(
+                "SPVM: restored Open-Meteo series fetched at %s", self._open_meteo_saved
+            )
+
+    async def async_load_shading_masks(self) -> None:
+        """Load the horizon profile files or the learned mask selected by the shading_mask option."""
+        if self.shading_mask_mode == SHADING_MASK_LEARNED:
+            try:
+                saved = await self._shading_mask_store.async_load()
+                mask = ShadingMask.from_dict(saved) if saved else None
+            except (KeyError, TypeError, ValueError) as e:
+                _LOGGER.warning(f"SPVM: invalid learned shading mask: {e}")
+                mask = None
+            if mask is None:
+                _LOGGER.warning("SPVM: no learned shading mask yet (run spvm.calibrate with apply), seasonal shading used")
+            self._set_shading_mask(mask)
+        elif self.shading_mask_mode == SHADING_MASK_HORIZON:
+            if not self.horizon_file:
+                _LOGGER.warning("SPVM: shading_mask is 'horizon' but no horizon_file is set, seasonal shading used")
+                return
+            try:
+                # Arrays without their own horizon file share the array 1 profile
+                files = [self.horizon_file] + [horizon_file for _p, _t, _a, horizon_file in self.extra_arrays]
+                masks = {}
+                for horizon_file in files:
+                    if horizon_file and horizon_file not in masks:
+                        masks[horizon_file] = await self.hass.async_add_executor_job(
+                            load_shading_mask, self.hass.config.path(horizon_file)
+                        )
+                for spec, horizon_file in zip(self._site.arrays, files):
+                    spec.shading_mask = masks[horizon_file or self.horizon_file]
+            except (OSError, KeyError, TypeError, ValueError) as e:
+                _LOGGER.warning(f"SPVM: could not load horizon profile: {e}, seasonal shading used")
+                self._set_shading_mask(None)
+
+    def _set_shading_mask(self, mask: Optional[ShadingMask]) -> None:
+        """Use the same shading mask for every array (None = seasonal shading)."""
+        for spec in self._site.arrays:
+            spec.shading_mask = mask
+
+    async def async_save_learned_mask(self, mask: ShadingMask) -> None:
+        """Persist a mask fitted by spvm.calibrate (used at once when shading_mask is 'learned')."""
+        await self._shading_mask_store.async_save(mask.to_dict())
+        if self.shading_mask_mode == SHADING_MASK_LEARNED:
+            self._set_shading_mask(mask)
+
+    async def async_restore_energy(self) -> None:
+        """Reload today's energy totals saved before a restart or reload."""
+        try:
+            saved = await self._energy_store.async_load()
+            if saved:
+                self.energy_expected.restore(saved["expected"])
+                self.energy_actual.restore(saved["actual"])
+        except Exception as e:
+            _LOGGER.warning(f"SPVM: could not load saved energy totals: {e}")
+
+    async def async_save_energy(self) -> None:
+        """Save the energy totals now (entry unload / reload)."""
+        await self._energy_store.async_save(self._energy_snapshot())
+
+    def _energy_snapshot(self) -> dict:
+        self._energy_save_pending = False
+        return {"expected": self.energy_expected.to_dict(), "actual": self.energy_actual.to_dict()}
+
+    def _local_day(self, ts: float) -> Tuple[float, float]:
+        """Local day [start, end) containing ts, as UTC epochs (cached until midnight)."""
+        start, end = self._day_bounds
+        if not start <= ts < end:
+            today = dt_util.as_local(datetime.fromtimestamp(ts, timezone.utc)).date()
+            start = dt_util.start_of_local_day(today).timestamp()
+            end = dt_util.start_of_local_day(today + timedelta(days=1)).timestamp()
+            self._day_bounds = (start, end)
+        return start, end
+
+    def _accumulate_energy(
+        self, ts: float, pv_w: float, expected_w: Optional[float]
+    ) -> Tuple[float, float, Optional[float]]:
+        """Feed the daily integrators; returns (expected, actual, remaining) kWh, rounded.
+
+        expected_w None (event-driven KPI refresh) only advances the actual total.
+        """
+        day_start, day_end = self._local_day(ts)
+        if expected_w is not None:
+            self.energy_expected.add(ts, expected_w, day_start)
+        self.energy_actual.add(ts, pv_w, day_start)
+        if not self._energy_save_pending:
+            # One write per ENERGY_SAVE_DELAY_S at most; a pending save is also flushed at shutdown
+            self._energy_save_pending = True
+            self._energy_store.async_delay_save(self._energy_snapshot, ENERGY_SAVE_DELAY_S)
+        remaining = self._remaining_today(ts, day_end)
+        return (
+            round(self.energy_expected.kwh, 3),
+            round(self.energy_actual.kwh, 3),
+            None if remaining is None else round(remaining, 3),
+        )
+
+    def _remaining_today(self, ts: float, day_end: float) -> Optional[float]:
+        """Expected energy left until midnight (kWh), from a curve rebuilt hourly."""
+        forecast = self._forecast
+        curve = self._remaining
+        if (
+            curve is None
+            or curve.end_ts != day_end
+            or forecast is not self._remaining_forecast
+            or ts - self._remaining_built_ts >= ENERGY_REMAINING_REFRESH_S
+        ):
+            try:
+                curve = self._build_remaining_curve(ts, day_end, forecast)
+            except Exception as e:
+                _LOGGER.warning(f"SPVM: remaining energy computation failed: {e}")
+                curve = None
+            self._remaining = curve
+            self._remaining_built_ts = ts
+            self._remaining_forecast = forecast
+        return None if curve is None else curve.at(ts)
+
+    def _build_remaining_curve(
+        self, ts: float, day_end: float, forecast: Optional[ProductionForecast]
+    ) -> Optional[RemainingEnergy]:
+        """Rest of today's production curve: Open-Meteo forecast if it reaches midnight, else the model."""
+        if forecast is not None and forecast.period_start:
+            starts = forecast.period_start
+            step_s = starts[1] - starts[0] if len(starts) > 1 else 3600.0
+            if starts[0] <= ts and starts[-1] + step_s >= day_end:
+                return RemainingEnergy.from_hourly(starts, forecast.expected_w, step_s, ts, day_end)
+        if np is None:
+            return None
+        # Clear-sky model (shading, degradation and cap applied) on a fixed grid
+        times = np.append(np.arange(ts, day_end, ENERGY_REMAINING_STEP_S), day_end)
+        model = solar_compute_batch(times, **self.model_params().batch_kwargs())
+        degradation = max(0.0, 1.0 - float(self.degradation_pct) / 100.0)
+        power = (model.expected_corrected_w * degradation).clip(max=float(self.cap_max_w))
+        return RemainingEnergy.from_samples(times.tolist(), power.tolist(), day_end)
+
+    def _schedule_open_meteo_save(self) -> None:
+        """Persist the Open-Meteo series after each new download (coalesced)."""
+        client = self._open_meteo_client
+        if client is None or client.last_fetch is None or client.last_fetch == self._open_meteo_saved:
+            return
+        self._open_meteo_saved = client.last_fetch
+        self._open_meteo_store.async_delay_save(client.snapshot, STORAGE_SAVE_DELAY_S)
+
+    def _clear_sky_ghi_at(self, ts: float) -> float:
+        """Clear-sky GHI at a UTC epoch for this site (Open-Meteo interpolation)."""
+        return clear_sky_ghi_at(
+            datetime.fromtimestamp(ts, timezone.utc), self.site_lat, self.site_lon, self.site_alt
+        )
+
+    def _compute_forecast(self, series: IrradianceSeries) -> ProductionForecast:
+        """Run the whole forecast series through the solar model in one batch."""
+        # Sample T is the mean over [T - step, T): evaluate geometry mid-step
+        times = [t - series.step_s / 2.0 for t in series.times]
+        model = solar_compute_batch(
+            times,
+            cloud_pct=series.column("cloud"),
+            temp_c=series.column("temp"),
+            real_ghi_wm2=series.column("ghi"),
+            real_gti_wm2=[series.column("gti")],
+            real_dni_wm2=series.column("dni"),
+            real_dhi_wm2=series.column("dhi"),
+            **self.model_params().batch_kwargs(),
+        )
+        degradation = max(0.0, 1.0 - float(self.degradation_pct) / 100.0)
+        expected = (model.expected_corrected_w * degradation).clip(max=float(self.cap_max_w))
+        return ProductionForecast(
+            period_start=[t - series.step_s for t in series.times],
+            expected_w=[round(float(w), 1) for w in expected],
+            generated_at=datetime.now(timezone.utc),
+        )
+
+    def open_meteo_status(self) -> Optional[Dict[str, Any]]:
+        """Open-Meteo refresh state (cache age, retries, circuit breaker), for diagnostics."""
+        if self._open_meteo_client is None:
+            return None
+        return self._open_meteo_client.status()
+
+    @callback
+    def _on_open_meteo_refresh(self) -> None:
+        """New Open-Meteo series: update now if the last update had no irradiance data."""
+        if self.data is None or self.data.attrs.get("irradiance_source") != "open_meteo":
+            self.hass.async_create_task(self.async_request_refresh())
+
+    def _update_forecast(self) -> Optional[ProductionForecast]:
+        """Refresh the production forecast when a new Open-Meteo series is available."""
+        if self._open_meteo_client is None or self.forecast_hours <= 0:
+            return None
+        try:
+            series = self._open_meteo_client.forecast(self.forecast_hours)
+            if series is not None and len(series):
+                # Only recompute after a new download or when the hour rolls over
+                key = (self._open_meteo_client.last_fetch, series.start)
+                if key != self._forecast_key:
+                    self._forecast = self._compute_forecast(series)
+                    self._forecast_key = key
+        except Exception as e:
+            _LOGGER.warning(f"SPVM forecast computation failed: {e}")
+        return self._forecast
+
+    def _compute_kpis(
+        self, pv_w: float, house_w: float, grid_w: Optional[float], expected_w: float
+    ) -> Tuple[Optional[float], float, float]:
+        """Yield ratio (%), virtual surplus (W) and net surplus after reserve (W)."""
+        yield_ratio_pct = (pv_w / expected_w) * 100.0 if expected_w > 1e-6 else None
+
+        surplus_virtual = pv_w - house_w
+        export_w: Optional[float] = None
+        if grid_w is not None:
+            export_w = max(-grid_w, 0.0)  # grid +import/-export
+            surplus_virtual = max(surplus_virtual, export_w)
+        surplus_net_w = max(surplus_virtual - float(self.reserve_w), 0.0)
+        _LOGGER.debug(
+            "SPVM surplus: pv_w=%.1fW, house_w=%.1fW, export_w=%s, surplus_virtual=%.1fW, "
+            "reserve=%sW, surplus_net_w=%.1fW",
+            pv_w, house_w, export_w, surplus_virtual, self.reserve_w, surplus_net_w,
+        )
+        return yield_ratio_pct, surplus_virtual, surplus_net_w
+
+    def _smoothed_expected(self, t: float, expected_w: float) -> Optional[float]:
+        if self._smooth_expected is None:
+            return None
+        return float(round(self._smooth_expected.add(t, expected_w), 3))
+
+    def _next_interval_s(self, pv_w: float, lux: Optional[float], surplus_net_w: float) -> float:
+        """Daytime update interval: fixed, or adapted to how fast the inputs move.
+
+        The largest change since the previous update (PV and surplus relative to
+        the installed peak, lux relative to its previous value) halves the
+        interval above ADAPTIVE_HIGH_CHANGE and stretches it by 1.5 below
+        ADAPTIVE_LOW_CHANGE, within [update_interval_min_s, update_interval_max_s].
+        """
+        if not self.adaptive_interval:
+            return float(self.update_interval_s)
+        prev = self._volatility_prev
+        self._volatility_prev = (pv_w, lux, surplus_net_w)
+        if prev is None:
+            return self._interval_s
+        peak = max(1.0, self._site.peak_w)
+        change = max(abs(pv_w - prev[0]), abs(surplus_net_w - prev[2])) / peak
+        if lux is not None and prev[1] is not None:
+            change = max(change, abs(lux - prev[1]) / max(prev[1], ADAPTIVE_LUX_FLOOR))
+        if change > ADAPTIVE_HIGH_CHANGE:
+            self._interval_s /= 2.0
+        elif change < ADAPTIVE_LOW_CHANGE:
+            self._interval_s *= 1.5
+        self._interval_s = min(max(self._interval_s, float(self.update_interval_min_s)),
+                               float(self.update_interval_max_s))
+        return self._interval_s
+
+    def _night_resume_at(self, ts: float) -> Optional[float]:
+        """Pre-dawn resume time (UTC epoch) if ts is in the night window, else None.
+
+        The window opens once the sun is below NIGHT_ELEVATION_DEG and closes
+        NIGHT_PREWARM_S before it rises back above it, so the first full update
+        reloads the Open-Meteo cache before any production is possible.
+        """
+        if not self.night_mode:
+            return None
+        if self._night_resume_ts is not None and ts < self._night_resume_ts:
+            return self._night_resume_ts
+        self._night_resume_ts = None
+        if self._site.ephemeris.geometry_at(ts).elevation_deg > NIGHT_ELEVATION_DEG:
+            return None
+        dawn = next_elevation_crossing(ts, self.site_lat, self.site_lon, NIGHT_ELEVATION_DEG, rising=True)
+        resume = ts + NIGHT_MAX_SKIP_S
+        if dawn is not None:
+            resume = min(resume, dawn - NIGHT_PREWARM_S)
+        if resume <= ts:
+            return None  # Pre-dawn: full updates
+        self._night_resume_ts = resume
+        return resume
+
+    def _night_data(
+        self,
+        ts: float,
+        resume_ts: float,
+        pv_w: float,
+        house_w: float,
+        grid_w: Optional[float],
+        grid: Optional[float],
+        batt: Optional[float],
+    ) -> SPVMData:
+        """Night update: KPIs from the power sensors only, expected production is 0."""
+        yield_ratio_pct, surplus_virtual, surplus_net_w = self._compute_kpis(pv_w, house_w, grid_w, 0.0)
+        attrs: Dict[str, Any] = {
+            "irradiance_source": "night",
+            "night_resume": datetime.fromtimestamp(resume_ts, timezone.utc).isoformat(timespec="seconds"),
+            "debug_pv_w": round(pv_w, 1),
+            "debug_house_w": round(house_w, 1),
+            "debug_surplus_virtual": round(surplus_virtual, 1),
+        }
+        if grid is not None:
+            attrs["grid_now"] = grid
+        if batt is not None:
+            attrs["battery_now"] = batt
+
+        # Stretch the interval, but wake up on time for the pre-dawn resume
+        interval_s = max(float(self.update_interval_s), min(float(self.night_interval_s), resume_ts - ts))
+        self.update_interval = timedelta(seconds=interval_s)
+        attrs["update_interval_s"] = round(interval_s, 1)
+        self._volatility_prev = None  # Adaptive interval restarts from scratch at dawn
+
+        t_mono = monotonic()
+        yield_smoothed, surplus_smoothed = self._smoothed_kpis(t_mono, yield_ratio_pct, surplus_net_w)
+        expected_kwh, actual_kwh, remaining_kwh = self._accumulate_energy(ts, pv_w, 0.0)
+        return SPVMData(
+            expected_w=0.0,
+            yield_ratio_pct=None,
+            surplus_net_w=float(round(surplus_net_w, 1)),
+            attrs=attrs,
+            forecast=self._forecast,
+            expected_w_smoothed=self._smoothed_expected(t_mono, 0.0),
+            yield_ratio_pct_smoothed=yield_smoothed,
+            surplus_net_w_smoothed=surplus_smoothed,
+            expected_kwh_today=expected_kwh,
+            actual_kwh_today=actual_kwh,
+            remaining_kwh_today=remaining_kwh,
+        )
+
+    def _smoothed_kpis(
+        self, t: float, yield_ratio_pct: Optional[float], surplus_net_w: float
+    ) -> Tuple[Optional[float], Optional[float]]:
+        """Feed the KPI filters; returns smoothed (yield %, surplus W), rounded like the raw values."""
+        if self._smooth_yield is None or self._smooth_surplus is None:
+            return None, None
+        y = self._smooth_yield.add(t, yield_ratio_pct)
+        s = self._smooth_surplus.add(t, surplus_net_w)
+        return (
+            None if y is None else float(round(y, 2)),
+            None if s is None else float(round(s, 1)),
+        )
+
+    @callback
+    def async_setup_event_listeners(self) -> CALLBACK_TYPE:
+        """Event-driven mode: recompute surplus / yield when a power input changes.
+
+        The solar model and Open-Meteo stay on the regular update interval;
+        state changes only re-run the cheap KPI path against the last expected
+        production. Bursts of events are rate limited to one recomputation per
+        event_min_interval_ms (leading call immediate, trailing call coalesced).
+        """
+        entities = [
+            e for e in (self.pv_entity, self.house_entity, self.grid_entity, self.batt_entity) if e
+        ]
+        debouncer = Debouncer(
+            self.hass,
+            _LOGGER,
+            cooldown=self.event_min_interval_s,
+            immediate=True,
+            function=self._async_refresh_kpis,
+        )
+
+        @callback
+        def _async_state_changed(event: Event) -> None:
+            self.hass.async_create_task(debouncer.async_call())
+
+        unsub_track = async_track_state_change_event(self.hass, entities, _async_state_changed)
+
+        @callback
+        def _async_unsub() -> None:
+            unsub_track()
+            debouncer.async_cancel()
+
+        return _async_unsub
+
+    async def _async_refresh_kpis(self) -> None:
+        """Recompute surplus / yield from the current power states (no model, no network)."""
+        d = self.data
+        if d is None or not self.last_update_success:
+            return
+        start = perf_counter()
+        pv_w = _to_w(_safe_float(self.hass.states.get(self.pv_entity)), self.unit_pv)
+        house_w = _to_w(_safe_float(self.hass.states.get(self.house_entity)), self.unit_house)
+        if pv_w is None or house_w is None:
+            return  # Fallbacks and errors are handled by the next model update
+        grid = _safe_float(self.hass.states.get(self.grid_entity)) if self.grid_entity else None
+        batt = _safe_float(self.hass.states.get(self.batt_entity)) if self.batt_entity else None
+        self._last_pv_w = pv_w
+
+        yield_ratio_pct, surplus_virtual, surplus_net_w = self._compute_kpis(
+            pv_w, house_w, _to_w(grid, self.unit_grid), d.expected_w
+        )
+        attrs = dict(d.attrs)
+        attrs["debug_pv_w"] = round(pv_w, 1)
+        attrs["debug_house_w"] = round(house_w, 1)
+        attrs["debug_surplus_virtual"] = round(surplus_virtual, 1)
+        if grid is not None:
+            attrs["grid_now"] = grid
+        if batt is not None:
+            attrs["battery_now"] = batt
+
+        yield_smoothed, surplus_smoothed = self._smoothed_kpis(monotonic(), yield_ratio_pct, surplus_net_w)
+        _expected_kwh, actual_kwh, remaining_kwh = self._accumulate_energy(
+            datetime.now(timezone.utc).timestamp(), pv_w, None
+        )
+
+        # Not async_set_updated_data(): that would reschedule (and so starve) the model update
+        self.data = replace(
+            d,
+            yield_ratio_pct=None if yield_ratio_pct is None else float(round(yield_ratio_pct, 2)),
+            surplus_net_w=float(round(surplus_net_w, 1)),
+            attrs=attrs,
+            yield_ratio_pct_smoothed=yield_smoothed,
+            surplus_net_w_smoothed=surplus_smoothed,
+            actual_kwh_today=actual_kwh,
+            remaining_kwh_today=remaining_kwh,
+        )
+        self.async_update_listeners()
+        self.profiler.record("event_kpis", perf_counter() - start)
+
+    @staticmethod
+    def _array_breakdown(model: SolarResult) -> Tuple[Tuple[float, float, float, float], ...]:
+        """(incidence, POA, expected clear, expected corrected) per array of a model result."""
+        return tuple(zip(
+            model.array_incidence_deg,
+            model.array_poa_wm2,
+            model.array_expected_clear_w,
+            model.array_expected_corrected_w,
+        ))
+
+    def model_params(self) -> ModelParams:
+        """Current solar model parameters, for the backtest and calibration tools."""
+        return ModelParams(
+            lat_deg=self.site_lat,
+            lon_deg=self.site_lon,
+            altitude_m=self.site_alt,
+            panel_tilt_deg=self.panel_tilt_deg,
+            panel_azimuth_deg=self.panel_az_deg,
+            panel_peak_w=self.panel_peak_w,
+            system_efficiency=self.system_eff,
+            degradation_pct=float(self.degradation_pct),
+            cap_max_w=float(self.cap_max_w),
+            lux_min_elevation_deg=self.lux_min_elevation,
+            lux_floor_factor=self.lux_floor_factor,
+            shading_winter_pct=self.shading_winter_pct,
+            shading_month_start=self.shading_month_start,
+            shading_month_end=self.shading_month_end,
+            shading_mask=self._site.arrays[0].shading_mask,
+            extra_arrays=tuple(self._site.arrays[1:]),
+        )
+
+    async def async_calibrate(self, days: int) -> CalibrationResult:
+        """Fit efficiency, degradation and shading to the recorded PV history of the last days.
+
+        The history is read and modelled one chunk (CALIBRATION_CHUNK_S) at a
+        time; only the daytime rows usable by the fit are kept in memory.
+        """
+        # Imported here: the recorder is only needed by this service
+        from homeassistant.components.recorder import get_instance
+
+        recorder = get_instance(self.hass)
+        tz = dt_util.get_time_zone(self.hass.config.time_zone)
+        params = self.model_params()
+        end = datetime.now(timezone.utc)
+        chunk_start = end - timedelta(days=days)
+        parts: List[CalibrationSamples] = []
+
+        def _select(change_ts: np.ndarray, values: np.ndarray, t0: float, t1: float) -> CalibrationSamples:
+            ts, pv_w = resample_steps(change_ts, values, t0, t1, CALIBRATION_STEP_S)
+            return select_samples(ts, pv_w, params, tz)
+
+        while chunk_start < end:
+            chunk_end = min(end, chunk_start + timedelta(seconds=CALIBRATION_CHUNK_S))
+            change_ts, values = await recorder.async_add_executor_job(
+                _load_power_history, self.hass, self.pv_entity, self.unit_pv, chunk_start, chunk_end
+            )
+            if change_ts.size:
+                parts.append(await self.hass.async_add_executor_job(
+                    _select, change_ts, values, chunk_start.timestamp(), chunk_end.timestamp()
+                ))
+            chunk_start = chunk_end
+        if not parts:
+            raise HomeAssistantError(f"SPVM: no recorded history for {self.pv_entity}")
+
+        return await self.hass.async_add_executor_job(
+            lambda: fit_samples(CalibrationSamples.merge(parts), params, tz)
+        )
+
     async def _async_update_data(self) -> SPVMData:
         """Compute expected production (W) and KPIs with physical model."""
+        lap = self.profiler.lap()
         # Read current states (inputs)
         pv_state = self.hass.states.get(self.pv_entity)
         house_state = self.hass.states.get(self.house_entity)
@@ -217,39 +946,53 @@ class SPVMCoordinator(DataUpdateCoordinator[SPVMData]):
             raise UpdateFailed(f"house_sensor has no numeric state ('{house_state_str}')")
 
         # Convert to W per sensor unit
-        pv_w = pv * (KW_TO_W if self.unit_pv == UNIT_KW else 1.0)
-        house_w = house * (KW_TO_W if self.unit_house == UNIT_KW else 1.0)
-        grid_w = grid * (KW_TO_W if self.unit_grid == UNIT_KW else 1.0) if grid is not None else None
-        batt_w = batt * (KW_TO_W if self.unit_battery == UNIT_KW else 1.0) if batt is not None else None
+        pv_w = _to_w(pv, self.unit_pv)
+        house_w = _to_w(house, self.unit_house)
+        grid_w = _to_w(grid, self.unit_grid)
 
         # Cache dernière valeur PV valide pour tolérance aux erreurs temporaires
         self._last_pv_w = pv_w
+        lap.split("state_read")
+
+        # ---- Night mode (v0.7.7+): skip Open-Meteo and the solar model ----
+        now_ts = datetime.now(timezone.utc).timestamp()
+        resume_ts = self._night_resume_at(now_ts)
+        if resume_ts is not None:
+            data = self._night_data(now_ts, resume_ts, pv_w, house_w, grid_w, grid, batt)
+            lap.split("night")
+            lap.finish()
+            return data
 
         # ---- Fetch real irradiance from Open-Meteo (v0.7.5+) ----
         real_ghi: Optional[float] = None
-        real_gti: Optional[float] = None
-        real_gti2: Optional[float] = None
+        real_gti: Optional[float] = None   # Main array (others: Perez transposition of DNI / DHI)
+        real_dni: Optional[float] = None
+        real_dhi: Optional[float] = None
         open_meteo_data: Optional[SolarIrradiance] = None
 
         if self._open_meteo_client is not None:
             try:
-                open_meteo_data = await self._open_meteo_client.fetch_current()
+                open_meteo_data = self._open_meteo_client.current()
                 if open_meteo_data is not None:
                     real_ghi = open_meteo_data.ghi_wm2
                     real_gti = open_meteo_data.gti_wm2
-                    real_gti2 = open_meteo_data.gti2_wm2
+                    real_dni = open_meteo_data.dni_wm2
+                    real_dhi = open_meteo_data.dhi_wm2
                     # Use Open-Meteo cloud/temp if local sensors not available
                     if cloud is None and open_meteo_data.cloud_cover_pct is not None:
                         cloud = open_meteo_data.cloud_cover_pct
                     if temp is None and open_meteo_data.temperature_c is not None:
                         temp = open_meteo_data.temperature_c
-                    _LOGGER.debug(
-                        f"Open-Meteo data: GHI={real_ghi:.1f} W/m², "
-                        f"GTI={real_gti:.1f if real_gti else 'N/A'} W/m²"
-                    )
+                    _LOGGER.debug("Open-Meteo data: GHI=%s W/m², GTI=%s W/m²", real_ghi, real_gti)
             except Exception as e:
                 _LOGGER.warning(f"Open-Meteo fetch failed, using clear-sky model: {e}")
 
+        lap.split("open_meteo")
+
+        forecast = self._update_forecast()
+        self._schedule_open_meteo_save()
+        lap.split("forecast")
+
         # ---- Lux as trend validator (v0.7.5+) ----
         # Compare lux trend with Open-Meteo to detect discrepancies
         lux_validation: Optional[str] = None
@@ -261,100 +1004,38 @@ class SPVMCoordinator(DataUpdateCoordinator[SPVMData]):
 
             if lux_ghi_ratio > 1.5:
                 lux_validation = "lux_high"  # Lux higher than expected (direct sun reflection?)
-                _LOGGER.debug(f"Lux validation: HIGH - lux={lux:.0f} vs expected={expected_lux:.0f} (ratio={lux_ghi_ratio:.2f})")
+                _LOGGER.debug(
+                    "Lux validation: HIGH - lux=%.0f vs expected=%.0f (ratio=%.2f)", lux, expected_lux, lux_ghi_ratio
+                )
             elif lux_ghi_ratio < 0.3:
                 lux_validation = "lux_low"   # Lux lower than expected (sensor in shade)
-                _LOGGER.debug(f"Lux validation: LOW - lux={lux:.0f} vs expected={expected_lux:.0f} (ratio={lux_ghi_ratio:.2f})")
+                _LOGGER.debug(
+                    "Lux validation: LOW - lux=%.0f vs expected=%.0f (ratio=%.2f)", lux, expected_lux, lux_ghi_ratio
+                )
             else:
                 lux_validation = "consistent"  # Lux consistent with Open-Meteo
-                _LOGGER.debug(f"Lux validation: OK - lux={lux:.0f} vs expected={expected_lux:.0f} (ratio={lux_ghi_ratio:.2f})")
+                _LOGGER.debug(
+                    "Lux validation: OK - lux=%.0f vs expected=%.0f (ratio=%.2f)", lux, expected_lux, lux_ghi_ratio
+                )
 
         # ---- Physical solar model ----
         now_utc = datetime.now(timezone.utc)
-        inputs = SolarInputs(
-            dt_utc=now_utc,
-            lat_deg=self.site_lat,
-            lon_deg=self.site_lon,
-            altitude_m=self.site_alt,
-            panel_tilt_deg=self.panel_tilt_deg,
-            panel_azimuth_deg=self.panel_az_deg,
-            panel_peak_w=self.panel_peak_w,
-            system_efficiency=self.system_eff,
+        model = self._site.compute(
+            now_utc,
             cloud_pct=cloud,
             temp_c=temp,
             lux=lux,
-            lux_min_elevation_deg=self.lux_min_elevation,
-            lux_floor_factor=self.lux_floor_factor,
-            shading_winter_pct=self.shading_winter_pct,
-            shading_month_start=self.shading_month_start,
-            shading_month_end=self.shading_month_end,
-            # Second array (multi-orientation, v0.7.4+)
-            array2_peak_w=self.array2_peak_w,
-            array2_tilt_deg=self.array2_tilt_deg,
-            array2_azimuth_deg=self.array2_az_deg,
             # Open-Meteo real irradiance (v0.7.5+)
             real_ghi_wm2=real_ghi,
-            real_gti_wm2=real_gti,
-            real_gti2_wm2=real_gti2,
+            real_gti_wm2=(real_gti,),
+            real_dni_wm2=real_dni,
+            real_dhi_wm2=real_dhi,
         )
-        model = solar_compute(inputs)
 
         # Degradation correction (linéaire) + cap
-        expected_w = model.expected_corrected_w * max(0.0, 1.0 - float(self.degradation_pct) / 100.0)
-        expected_w = min(expected_w, float(self.cap_max_w))
-
-        # Logs de diagnostic détaillés pour comprendre les estimations faibles
-        array2_info = ""
-        if self.array2_peak_w > 0:
-            array2_info = (
-                f"  Array 2 (multi-orientation):\n"
-                f"    - peak_w: {self.array2_peak_w}W\n"
-                f"    - tilt: {self.array2_tilt_deg}°, azimuth: {self.array2_az_deg}°\n"
-                f"    - incidence: {model.array2_incidence_deg:.1f}°\n"
-                f"    - POA: {model.array2_poa_clear_wm2:.1f} W/m²\n"
-                f"    - expected clear: {model.array2_expected_clear_w:.1f}W\n"
-                f"    - expected corrected: {model.array2_expected_corrected_w:.1f}W\n"
-            )
-        irradiance_source = "Open-Meteo API" if model.using_real_irradiance else "Clear-sky model"
-        open_meteo_info = ""
-        if model.using_real_irradiance:
-            open_meteo_info = (
-                f"  Open-Meteo (real irradiance):\n"
-                f"    - GHI: {model.real_ghi_wm2:.1f} W/m²\n"
-                f"    - GTI (POA): {(model.real_gti_wm2 or 0.0):.1f} W/m²\n"
-            )
-        _LOGGER.info(
-            f"SPVM DIAGNOSTIC - Production Estimate Breakdown:\n"
-            f"  Irradiance Source: {irradiance_source}\n"
-            f"{open_meteo_info}"
-            f"  Solar Model Params:\n"
-            f"    - panel_peak_w: {self.panel_peak_w}W\n"
-            f"    - system_efficiency: {self.system_eff}\n"
-            f"    - panel_tilt: {self.panel_tilt_deg}°\n"
-            f"    - panel_azimuth: {self.panel_az_deg}°\n"
-            f"    - site_lat/lon: {self.site_lat:.2f}/{self.site_lon:.2f}\n"
-            f"{array2_info}"
-            f"  Solar Geometry:\n"
-            f"    - elevation: {model.elevation_deg:.1f}°\n"
-            f"    - azimuth: {model.azimuth_deg:.1f}°\n"
-            f"    - incidence (array1): {model.incidence_deg:.1f}°\n"
-            f"  Irradiance:\n"
-            f"    - GHI: {model.ghi_clear_wm2:.1f} W/m²\n"
-            f"    - POA (total): {model.poa_clear_wm2:.1f} W/m²\n"
-            f"  Expected Power (step-by-step):\n"
-            f"    - Before corrections: {model.expected_clear_w:.1f}W\n"
-            f"    - After temp/shading corrections: {model.expected_corrected_w:.1f}W\n"
-            f"    - After degradation ({self.degradation_pct}%): {expected_w:.1f}W (before cap)\n"
-            f"    - Final (after cap {self.cap_max_w}W): {expected_w:.1f}W\n"
-            f"  Correction Factors:\n"
-            f"    - Lux correction: {model.lux_factor if model.lux_factor is not None else 'N/A'}\n"
-            f"    - Cloud coverage: {cloud if cloud is not None else 'N/A'}%\n"
-            f"    - Temperature: {temp if temp is not None else 'N/A'}°C\n"
-            f"  Current Production:\n"
-            f"    - PV actual: {pv_w:.1f}W\n"
-            f"    - PV expected: {expected_w:.1f}W\n"
-            f"    - Yield ratio: {(pv_w/expected_w*100) if expected_w > 1e-6 else 0:.1f}%"
-        )
+        expected_degraded_w = model.expected_corrected_w * max(0.0, 1.0 - float(self.degradation_pct) / 100.0)
+        expected_w = min(expected_degraded_w, float(self.cap_max_w))
+        lap.split("solar_model")
 
         # ⚠️ Detect suspiciously low lux readings that might indicate sensor placement issues
         if (
@@ -381,64 +1062,64 @@ class SPVMCoordinator(DataUpdateCoordinator[SPVMData]):
                         f"     3. Increase 'lux_floor_factor' to 0.5-0.7 in configuration"
                     )
 
+        lap.split("logging")
+
         # KPIs
-        yield_ratio_pct = (pv_w / expected_w) * 100.0 if expected_w > 1e-6 else None
+        yield_ratio_pct, surplus_virtual, surplus_net_w = self._compute_kpis(pv_w, house_w, grid_w, expected_w)
 
-        surplus_virtual = pv_w - house_w
-        _LOGGER.debug(
-            f"SPVM surplus calculation: pv_w={pv_w:.1f}W, house_w={house_w:.1f}W, "
-            f"surplus_virtual={surplus_virtual:.1f}W, reserve={self.reserve_w}W"
-        )
-        if grid_w is not None:
-            export_w = max(-grid_w, 0.0)  # grid +import/-export
-            _LOGGER.debug(f"SPVM grid_w={grid_w:.1f}W, export_w={export_w:.1f}W")
-            surplus_virtual = max(surplus_virtual, export_w)
-            _LOGGER.debug(f"SPVM surplus_virtual after grid adjustment: {surplus_virtual:.1f}W")
-        surplus_net_w = max(surplus_virtual - float(self.reserve_w), 0.0)
-        _LOGGER.debug(f"SPVM surplus_net_w final: {surplus_net_w:.1f}W")
+        lap.split("kpis")
 
+        self.trace.append(TraceRecord(
+            now_utc.timestamp(),
+            model.using_real_irradiance,
+            model.real_ghi_wm2,
+            model.real_gti_wm2,
+            model.elevation_deg,
+            model.azimuth_deg,
+            model.incidence_deg,
+            model.ghi_clear_wm2,
+            model.poa_clear_wm2,
+            model.expected_clear_w,
+            model.expected_corrected_w,
+            expected_degraded_w,
+            expected_w,
+            model.lux_factor,
+            cloud,
+            temp,
+            pv_w,
+            house_w,
+            surplus_net_w,
+            self._array_breakdown(model) if self.extra_arrays else (),
+            real_dni,
+            real_dhi,
+            model.transposed,
+        ))
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(self.trace.format_last())
+        lap.split("trace")
+
+        # Dynamic attributes only: static config lives in self.static_attrs.
+        # Rounded so that recorder attribute rows can be shared between updates.
         attrs: Dict[str, Any] = {
-            ATTR_MODEL_TYPE: NOTE_SOLAR_MODEL,
-            ATTR_SOURCE: {
-                "pv": self.pv_entity,
-                "house": self.house_entity,
-                "grid": self.grid_entity,
-                "battery": self.batt_entity,
-                "lux": self.lux_entity,
-                "temp": self.temp_entity,
-                "hum": self.hum_entity,
-                "cloud": self.cloud_entity,
-            },
-            ATTR_SYSTEM_EFFICIENCY: self.system_eff,
-            ATTR_DEGRADATION_PCT: self.degradation_pct,
-            ATTR_SITE: {"lat": self.site_lat, "lon": self.site_lon, "alt_m": self.site_alt},
-            ATTR_PANEL: {"tilt_deg": self.panel_tilt_deg, "azimuth_deg": self.panel_az_deg, "peak_w": self.panel_peak_w},
-            "array2": {
-                "enabled": self.array2_peak_w > 0,
-                "peak_w": self.array2_peak_w,
-                "tilt_deg": self.array2_tilt_deg,
-                "azimuth_deg": self.array2_az_deg,
-            } if self.array2_peak_w > 0 else None,
-            "reserve_w": self.reserve_w,
-            "cap_max_w": self.cap_max_w,
-            "model_elevation_deg": model.elevation_deg,
-            "model_azimuth_deg": model.azimuth_deg,
-            "model_declination_deg": model.declination_deg,
-            "model_incidence_deg": model.incidence_deg,
-            "ghi_clear_wm2": model.ghi_clear_wm2,
-            "poa_clear_wm2": model.poa_clear_wm2,
+            "model_elevation_deg": round(model.elevation_deg, 1),
+            "model_azimuth_deg": round(model.azimuth_deg, 1),
+            "model_declination_deg": round(model.declination_deg, 2),
+            "model_incidence_deg": round(model.incidence_deg, 1),
+            "ghi_clear_wm2": round(model.ghi_clear_wm2, 1),
+            "poa_clear_wm2": round(model.poa_clear_wm2, 1),
             "debug_pv_w": round(pv_w, 1),
             "debug_house_w": round(house_w, 1),
             "debug_surplus_virtual": round(surplus_virtual, 1),
-            ATTR_NOTE: "Open-Meteo real irradiance or clear-sky model; temp & shading corrections; then degradation, cap.",
             # Open-Meteo status (v0.7.5+)
             "irradiance_source": "open_meteo" if model.using_real_irradiance else "clear_sky_model",
-            "open_meteo_enabled": self.use_open_meteo,
         }
         # Open-Meteo data (if available)
         if model.using_real_irradiance:
             attrs["open_meteo_ghi_wm2"] = round(model.real_ghi_wm2, 1) if model.real_ghi_wm2 else None
             attrs["open_meteo_gti_wm2"] = round(model.real_gti_wm2, 1) if model.real_gti_wm2 else None
+            attrs["open_meteo_dni_wm2"] = None if real_dni is None else round(real_dni, 1)
+            attrs["open_meteo_dhi_wm2"] = None if real_dhi is None else round(real_dhi, 1)
+            attrs["transposition"] = "perez" if model.transposed else None
         # Lux validation (v0.7.5+)
         if lux_validation is not None:
             attrs["lux_validation"] = lux_validation
@@ -465,16 +1146,45 @@ class SPVMCoordinator(DataUpdateCoordinator[SPVMData]):
         if cloud is not None:
             attrs["cloud_now_pct"] = cloud
 
-        # Array 2 model outputs (if enabled)
-        if self.array2_peak_w > 0 and model.array2_incidence_deg is not None:
-            attrs["array2_incidence_deg"] = round(model.array2_incidence_deg, 1)
-            attrs["array2_poa_clear_wm2"] = round(model.array2_poa_clear_wm2, 1)
-            attrs["array2_expected_clear_w"] = round(model.array2_expected_clear_w, 1)
-            attrs["array2_expected_corrected_w"] = round(model.array2_expected_corrected_w, 1)
+        # Per-array model outputs (multi-orientation installations)
+        if self.extra_arrays:
+            attrs["arrays"] = [
+                {
+                    "incidence_deg": round(inc, 1),
+                    "poa_wm2": round(poa, 1),
+                    "expected_clear_w": round(clear, 1),
+                    "expected_corrected_w": round(corrected, 1),
+                    "open_meteo_gti_wm2": None if gti is None else round(gti, 1),
+                }
+                for (inc, poa, clear, corrected), gti in zip(
+                    self._array_breakdown(model), (real_gti,) + (None,) * len(self.extra_arrays)
+                )
+            ]
+
+        # Next update: fixed or adaptive interval
+        interval_s = self._next_interval_s(pv_w, lux, surplus_net_w)
+        self.update_interval = timedelta(seconds=interval_s)
+        attrs["update_interval_s"] = round(interval_s, 1)
+
+        # Streaming smoothing (O(1) per update)
+        t_mono = monotonic()
+        expected_smoothed = self._smoothed_expected(t_mono, expected_w)
+        yield_smoothed, surplus_smoothed = self._smoothed_kpis(t_mono, yield_ratio_pct, surplus_net_w)
+        expected_kwh, actual_kwh, remaining_kwh = self._accumulate_energy(now_ts, pv_w, expected_w)
+
+        lap.split("attributes")
+        lap.finish()
 
         return SPVMData(
             expected_w=float(round(expected_w, 3)),
             yield_ratio_pct=None if yield_ratio_pct is None else float(round(yield_ratio_pct, 2)),
             surplus_net_w=float(round(surplus_net_w, 1)),
             attrs=attrs,
+            forecast=forecast,
+            expected_w_smoothed=expected_smoothed,
+            yield_ratio_pct_smoothed=yield_smoothed,
+            surplus_net_w_smoothed=surplus_smoothed,
+            expected_kwh_today=expected_kwh,
+            actual_kwh_today=actual_kwh,
+            remaining_kwh_today=remaining_kwh,
         )
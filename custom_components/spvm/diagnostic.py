@@ -12,7 +12,7 @@ from datetime import datetime, timezone
 # Add the SPVM path for Home Assistant installations
 sys.path.insert(0, '/config/custom_components/spvm')
 
-from solar_model import SolarInputs, compute as solar_compute
+from solar_model import ArraySpec, SolarInputs, compute as solar_compute
 
 # =============================================================================
 # CONFIGURATION - MODIFY THESE VALUES FOR YOUR INSTALLATION
@@ -28,10 +28,8 @@ PANEL_PEAK_W = 3000    # Total peak power in Watts
 PANEL_TILT = 30        # Tilt angle in degrees (0 = flat, 90 = vertical)
 PANEL_AZIMUTH = 180    # Azimuth (0 = North, 90 = East, 180 = South, 270 = West)
 
-# Panel configuration - Array 2 (optional, set to 0 to disable)
-ARRAY2_PEAK_W = 0      # Second array peak power (0 = disabled)
-ARRAY2_TILT = 15       # Second array tilt
-ARRAY2_AZIMUTH = 180   # Second array azimuth
+# Panel configuration - Arrays 2..N (optional): (peak W, tilt, azimuth) per array
+EXTRA_ARRAYS = []      # e.g. [(2000, 15, 180), (1500, 90, 90)] for a pergola and an east wall
 
 # System parameters
 SYSTEM_EFFICIENCY = 0.85  # Efficiency (0.80 - 0.90 typical)
@@ -64,11 +62,11 @@ def main():
     print(f"   Tilt: {PANEL_TILT}°")
     print(f"   Azimuth: {PANEL_AZIMUTH}° (180 = South)")
 
-    if ARRAY2_PEAK_W > 0:
-        print(f"\n⚡ Panel Configuration (Array 2):")
-        print(f"   Peak power: {ARRAY2_PEAK_W}W")
-        print(f"   Tilt: {ARRAY2_TILT}°")
-        print(f"   Azimuth: {ARRAY2_AZIMUTH}°")
+    for index, (peak_w, tilt, azimuth) in enumerate(EXTRA_ARRAYS, start=2):
+        print(f"\n⚡ Panel Configuration (Array {index}):")
+        print(f"   Peak power: {peak_w}W")
+        print(f"   Tilt: {tilt}°")
+        print(f"   Azimuth: {azimuth}°")
 
     print(f"\n⚙️  System efficiency: {SYSTEM_EFFICIENCY * 100:.0f}%")
 
@@ -78,16 +76,13 @@ def main():
         lat_deg=LATITUDE,
         lon_deg=LONGITUDE,
         altitude_m=ALTITUDE_M,
-        panel_tilt_deg=PANEL_TILT,
-        panel_azimuth_deg=PANEL_AZIMUTH,
-        panel_peak_w=PANEL_PEAK_W,
+        arrays=[ArraySpec(PANEL_PEAK_W, PANEL_TILT, PANEL_AZIMUTH)] + [
+            ArraySpec(peak_w, tilt, azimuth) for peak_w, tilt, azimuth in EXTRA_ARRAYS
+        ],
         system_efficiency=SYSTEM_EFFICIENCY,
         cloud_pct=CLOUD_PCT,
         temp_c=TEMP_C,
         lux=LUX,
-        array2_peak_w=ARRAY2_PEAK_W,
-        array2_tilt_deg=ARRAY2_TILT,
-        array2_azimuth_deg=ARRAY2_AZIMUTH,
     )
 
     # Compute
@@ -113,10 +108,13 @@ def main():
     print(f"   Clear-sky (no corrections): {result.expected_clear_w:.1f}W")
     print(f"   Corrected (with weather): {result.expected_corrected_w:.1f}W")
 
-    if ARRAY2_PEAK_W > 0 and result.array2_expected_clear_w:
-        print(f"\n   Array 2 contribution:")
-        print(f"     Clear-sky: {result.array2_expected_clear_w:.1f}W")
-        print(f"     Corrected: {result.array2_expected_corrected_w:.1f}W")
+    if EXTRA_ARRAYS:
+        for index, (clear_w, corrected_w) in enumerate(
+            zip(result.array_expected_clear_w, result.array_expected_corrected_w), start=1
+        ):
+            print(f"\n   Array {index} contribution:")
+            print(f"     Clear-sky: {clear_w:.1f}W")
+            print(f"     Corrected: {corrected_w:.1f}W")
 
     # Diagnostics
     print("\n" + "=" * 60)
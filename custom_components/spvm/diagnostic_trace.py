@@ -0,0 +1,146 @@
+"""Structured diagnostic trace of the production estimate.
+
+Every coordinator update appends one compact record (plain floats, no strings)
+to a bounded ring buffer. The human-readable "Production Estimate Breakdown"
+is only formatted when someone reads it: integration diagnostics, the
+``spvm.dump_trace`` service, or DEBUG logging enabled for the coordinator.
+"""
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Records kept per entry (≈ 1 h at the default 30 s interval)
+DEFAULT_TRACE_SIZE = 120
+
+
+class TraceRecord(NamedTuple):
+    """Model breakdown for one update (W, W/m², degrees)."""
+
+    ts: float                          # UTC epoch seconds
+    using_real_irradiance: bool
+    real_ghi_wm2: Optional[float]
+    real_gti_wm2: Optional[float]
+    elevation_deg: float
+    azimuth_deg: float
+    incidence_deg: float
+    ghi_clear_wm2: float
+    poa_clear_wm2: float
+    expected_clear_w: float
+    expected_corrected_w: float
+    expected_degraded_w: float         # after degradation, before cap
+    expected_w: float                  # final (after cap)
+    lux_factor: Optional[float]
+    cloud_pct: Optional[float]
+    temp_c: Optional[float]
+    pv_w: float
+    house_w: float
+    surplus_net_w: float
+    # Multi-array installations: (incidence, POA, expected clear, expected corrected) per array
+    arrays: tuple[tuple[float, float, float, float], ...] = ()
+    # Open-Meteo DNI / DHI and whether the Perez transposition was used
+    real_dni_wm2: Optional[float] = None
+    real_dhi_wm2: Optional[float] = None
+    transposed: bool = False
+
+
+def _opt(value: Optional[float], fmt: str = ".1f") -> str:
+    return "N/A" if value is None else format(value, fmt)
+
+
+def format_breakdown(record: TraceRecord, params: Dict[str, Any]) -> str:
+    """Multi-line production estimate breakdown for one record."""
+    r = record
+    p = params
+    lines = [
+        "SPVM DIAGNOSTIC - Production Estimate Breakdown:",
+        f"  Time (UTC): {datetime.fromtimestamp(r.ts, timezone.utc).isoformat(timespec='seconds')}",
+        f"  Irradiance Source: {'Open-Meteo API' if r.using_real_irradiance else 'Clear-sky model'}",
+    ]
+    if r.using_real_irradiance:
+        lines += [
+            "  Open-Meteo (real irradiance):",
+            f"    - GHI: {_opt(r.real_ghi_wm2)} W/m²",
+            f"    - GTI (POA): {(r.real_gti_wm2 or 0.0):.1f} W/m²",
+            f"    - DNI: {_opt(r.real_dni_wm2)} W/m², DHI: {_opt(r.real_dhi_wm2)} W/m²",
+        ]
+        if r.transposed:
+            lines.append("    - POA without GTI: Perez transposition of DNI/DHI")
+    lines += [
+        "  Solar Model Params:",
+        f"    - panel_peak_w: {p['panel_peak_w']}W",
+        f"    - system_efficiency: {p['system_efficiency']}",
+        f"    - panel_tilt: {p['panel_tilt_deg']}°",
+        f"    - panel_azimuth: {p['panel_azimuth_deg']}°",
+        f"    - site_lat/lon: {p['site_lat']:.2f}/{p['site_lon']:.2f}",
+    ]
+    # Arrays 2..N (array 1 incidence is under Solar Geometry, POA and power are totals)
+    for index, ((peak_w, tilt_deg, azimuth_deg), values) in enumerate(
+        zip(p.get("arrays", ()), r.arrays[1:]), start=2
+    ):
+        incidence, poa, clear, corrected = values
+        lines += [
+            f"  Array {index} (multi-orientation):",
+            f"    - peak_w: {peak_w}W",
+            f"    - tilt: {tilt_deg}°, azimuth: {azimuth_deg}°",
+            f"    - incidence: {incidence:.1f}°",
+            f"    - POA: {poa:.1f} W/m²",
+            f"    - expected clear: {clear:.1f}W",
+            f"    - expected corrected: {corrected:.1f}W",
+        ]
+    yield_pct = (r.pv_w / r.expected_w * 100.0) if r.expected_w > 1e-6 else 0.0
+    lines += [
+        "  Solar Geometry:",
+        f"    - elevation: {r.elevation_deg:.1f}°",
+        f"    - azimuth: {r.azimuth_deg:.1f}°",
+        f"    - incidence (array1): {r.incidence_deg:.1f}°",
+        "  Irradiance:",
+        f"    - GHI: {r.ghi_clear_wm2:.1f} W/m²",
+        f"    - POA (total): {r.poa_clear_wm2:.1f} W/m²",
+        "  Expected Power (step-by-step):",
+        f"    - Before corrections: {r.expected_clear_w:.1f}W",
+        f"    - After temp/shading corrections: {r.expected_corrected_w:.1f}W",
+        f"    - After degradation ({p['degradation_pct']}%): {r.expected_degraded_w:.1f}W (before cap)",
+        f"    - Final (after cap {p['cap_max_w']}W): {r.expected_w:.1f}W",
+        "  Correction Factors:",
+        f"    - Lux correction: {_opt(r.lux_factor, '.3f')}",
+        f"    - Cloud coverage: {_opt(r.cloud_pct)}%",
+        f"    - Temperature: {_opt(r.temp_c)}°C",
+        "  Current Production:",
+        f"    - PV actual: {r.pv_w:.1f}W",
+        f"    - PV expected: {r.expected_w:.1f}W",
+        f"    - Yield ratio: {yield_pct:.1f}%",
+        f"    - House: {r.house_w:.1f}W, surplus net: {r.surplus_net_w:.1f}W",
+    ]
+    return "\n".join(lines)
+
+
+class DiagnosticTrace:
+    """Bounded ring buffer of TraceRecord, formatted on read only."""
+
+    def __init__(self, params: Dict[str, Any], size: int = DEFAULT_TRACE_SIZE) -> None:
+        # Static model parameters, shared by every record of this entry
+        self.params = params
+        self._records: deque[TraceRecord] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def append(self, record: TraceRecord) -> None:
+        self._records.append(record)
+
+    @property
+    def last(self) -> Optional[TraceRecord]:
+        return self._records[-1] if self._records else None
+
+    def format_last(self) -> Optional[str]:
+        record = self.last
+        return format_breakdown(record, self.params) if record is not None else None
+
+    def as_dicts(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Most recent records (oldest first) as plain dicts."""
+        records = list(self._records)
+        if limit is not None:
+            records = records[-limit:] if limit > 0 else []
+        return [r._asdict() for r in records]
@@ -6,7 +6,7 @@ from typing import Any
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN
+from .const import DOMAIN, ATTR_SOURCE
 from .coordinator import SPVMCoordinator
 
 
@@ -36,6 +36,19 @@ async def async_get_config_entry_diagnostics(
                 else None
             ),
         },
+        # Static model configuration (no longer repeated in sensor attributes)
+        "static_attributes": {
+            k: v for k, v in coordinator.static_attrs.items() if k != ATTR_SOURCE
+        },
+        # Per-stage update timings (p50 / p95 / max, ms)
+        "performance": coordinator.profiler.summary(),
+        # Production estimate breakdown (formatted here only, never on the update path)
+        "trace": {
+            "last_breakdown": (coordinator.trace.format_last() or "").splitlines(),
+            "records": coordinator.trace.as_dicts(),
+        },
+        # Background refresh state: cache age, retries, circuit breaker
+        "open_meteo": coordinator.open_meteo_status(),
     }
 
     # Add current data if available
@@ -49,7 +62,7 @@ async def async_get_config_entry_diagnostics(
         attrs = coordinator.data.attrs or {}
         diagnostics["model_info"] = {
             "irradiance_source": attrs.get("irradiance_source"),
-            "open_meteo_enabled": attrs.get("open_meteo_enabled"),
+            "open_meteo_enabled": coordinator.use_open_meteo,
             "elevation_deg": attrs.get("model_elevation_deg"),
             "ghi_wm2": attrs.get("ghi_clear_wm2"),
             "poa_wm2": attrs.get("poa_clear_wm2"),
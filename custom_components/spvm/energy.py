@@ -0,0 +1,148 @@
+"""Daily energy accumulators and remaining-energy curve.
+
+EnergyAccumulator integrates a power signal into kWh for the current local
+day with the trapezoidal rule. Its state is O(1) (running total and last
+sample), so it can be fed on every update and saved as a tiny dict.
+
+RemainingEnergy holds the cumulative expected energy from any time to the end
+of the day. It is built from a production curve (hourly forecast or model
+samples) now and then, and read on every update by bisection.
+"""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from typing import Any, Optional, Sequence
+
+# Longer gaps between samples (restart, unavailable sensor) are not integrated
+ENERGY_MAX_GAP_S = 1800.0
+
+_WS_PER_KWH = 3_600_000.0
+
+
+class EnergyAccumulator:
+    """Trapezoidal kWh total of a power signal (W) since local midnight.
+
+    Samples carry the UTC epoch start of their local day; a new day start
+    resets the total (the segment across midnight is split at midnight) and
+    keeps the finished day in `last_day_kwh`. None samples break the line.
+    """
+
+    __slots__ = ("day_start", "kwh", "last_day_kwh", "_last_t", "_last_w", "max_gap_s")
+
+    def __init__(self, max_gap_s: float = ENERGY_MAX_GAP_S) -> None:
+        self.max_gap_s = max_gap_s
+        self.day_start: Optional[float] = None
+        self.kwh = 0.0
+        self.last_day_kwh: Optional[float] = None
+        self._last_t: Optional[float] = None
+        self._last_w: Optional[float] = None
+
+    def add(self, t: float, power_w: Optional[float], day_start: float) -> float:
+        """Add a sample at UTC epoch t and return today's total (kWh)."""
+        last_t, last_w = self._last_t, self._last_w
+        if last_t is not None and t <= last_t:
+            return self.kwh  # Same timestamp or clock going back: keep the total
+        if last_t is not None and t - last_t > self.max_gap_s:
+            last_w = None
+
+        if day_start != self.day_start:
+            if self.day_start is not None:
+                if last_w is not None and power_w is not None and last_t < day_start:
+                    # Split the segment at midnight
+                    w_mid = last_w + (power_w - last_w) * (day_start - last_t) / (t - last_t)
+                    self.kwh += (last_w + w_mid) * 0.5 * (day_start - last_t) / _WS_PER_KWH
+                    last_t, last_w = day_start, w_mid
+                else:
+                    last_w = None
+                self.last_day_kwh = self.kwh
+            self.day_start = day_start
+            self.kwh = 0.0
+
+        if last_w is not None and power_w is not None:
+            self.kwh += (last_w + power_w) * 0.5 * (t - last_t) / _WS_PER_KWH
+        self._last_t = t
+        self._last_w = power_w
+        return self.kwh
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "day_start": self.day_start,
+            "kwh": self.kwh,
+            "last_day_kwh": self.last_day_kwh,
+            "last_t": self._last_t,
+            "last_w": self._last_w,
+        }
+
+    def restore(self, data: dict) -> None:
+        """Restore a to_dict() snapshot (a later day start rolls it over as usual)."""
+        self.day_start = data["day_start"]
+        self.kwh = float(data["kwh"])
+        self.last_day_kwh = data.get("last_day_kwh")
+        self._last_t = data.get("last_t")
+        self._last_w = data.get("last_w")
+
+
+class RemainingEnergy:
+    """Expected energy (kWh) from any time up to end_ts, from a curve built once.
+
+    Breakpoints hold the energy left from each of them to the end; energy is
+    linear in time between breakpoints (exact for hourly means).
+    """
+
+    __slots__ = ("times", "remaining_kwh", "end_ts")
+
+    def __init__(self, times: array, remaining_kwh: array, end_ts: float) -> None:
+        self.times = times
+        self.remaining_kwh = remaining_kwh
+        self.end_ts = end_ts
+
+    @classmethod
+    def from_samples(
+        cls, times: Sequence[float], power_w: Sequence[float], end_ts: float
+    ) -> RemainingEnergy:
+        """Curve from power samples (ascending UTC epochs, W), trapezoidal rule."""
+        n = len(times)
+        remaining = array("d", bytes(8 * n))
+        for i in range(n - 2, -1, -1):
+            segment = (power_w[i] + power_w[i + 1]) * 0.5 * (times[i + 1] - times[i])
+            remaining[i] = remaining[i + 1] + segment / _WS_PER_KWH
+        return cls(array("d", times), remaining, end_ts)
+
+    @classmethod
+    def from_hourly(
+        cls,
+        period_start: Sequence[float],
+        mean_w: Sequence[float],
+        step_s: float,
+        start_ts: float,
+        end_ts: float,
+    ) -> RemainingEnergy:
+        """Curve from mean power per period [start, start + step_s), clipped to [start_ts, end_ts]."""
+        times, energy = [end_ts], [0.0]
+        for p, w in zip(reversed(period_start), reversed(mean_w)):
+            t0, t1 = max(p, start_ts), min(p + step_s, end_ts)
+            if t1 <= t0:
+                continue
+            if t1 < times[-1]:  # Hole in the series: nothing expected there
+                times.append(t1)
+                energy.append(energy[-1])
+            times.append(t0)
+            energy.append(energy[-1] + w * (t1 - t0) / _WS_PER_KWH)
+        times.reverse()
+        energy.reverse()
+        return cls(array("d", times), array("d", energy), end_ts)
+
+    def at(self, ts: float) -> float:
+        """Expected energy from ts to the end (kWh)."""
+        times = self.times
+        if not times or ts >= self.end_ts:
+            return 0.0
+        i = bisect_right(times, ts)
+        if i == 0:
+            return self.remaining_kwh[0]
+        if i >= len(times):
+            return 0.0
+        t0, t1 = times[i - 1], times[i]
+        r0, r1 = self.remaining_kwh[i - 1], self.remaining_kwh[i]
+        return r0 + (r1 - r0) * (ts - t0) / (t1 - t0)
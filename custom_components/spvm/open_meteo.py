@@ -8,11 +8,20 @@ API Documentation: https://open-meteo.com/en/docs
 """
 from __future__ import annotations
 
+import asyncio
+import base64
 import logging
+import math
+import random
+import sys
+import time
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Optional
-import asyncio
+from typing import Any, Callable, Coroutine, Optional
+from urllib.parse import urlsplit
 
 import aiohttp
 
@@ -21,11 +30,72 @@ _LOGGER = logging.getLogger(__name__)
 # Open-Meteo API endpoint
 API_URL = "https://api.open-meteo.com/v1/forecast"
 
-# Cache duration in seconds (avoid hammering the API)
+# Decoded responses shared between clients by the fetch manager
 CACHE_DURATION_S = 300  # 5 minutes
 
-
-@dataclass
+# Fetch scheduling (v0.7.7+): hourly values only change when Open-Meteo
+# ingests a new model run, so the series is downloaded once and refreshed
+# shortly after each update slot, or earlier if its horizon runs short
+MODEL_UPDATE_INTERVAL_S = 3600  # Fastest upstream cadence (ICON-D2, AROME, HRRR...); global models 3-6 h
+MODEL_UPDATE_DELAY_S = 15 * 60  # Margin after the slot for the new run to be published
+REFRESH_SPREAD_S = 5 * 60       # Per-site offset, so installations don't all call at the same second
+FETCH_MIN_HOURS = 24            # Every download covers at least now + 24 h
+
+# Self-imposed daily request budget per API host (Open-Meteo's free tier
+# allows 10,000 calls per day, shared by everything behind the same IP)
+DAILY_CALL_BUDGET = 1000
+
+# HTTP timeout per request
+REQUEST_TIMEOUT_S = 10
+
+# Stale-while-revalidate (v0.7.7+): updates read the cached series and never
+# wait for the network; stale data triggers a background refresh
+STALE_MAX_AGE_S = 6 * 3600      # Last good series served up to this age, then clear-sky
+RETRY_BASE_S = 30.0             # Delay after a failed refresh, doubled per failure (with jitter)
+RETRY_MAX_S = 1800.0
+CIRCUIT_FAILURES = 5            # Consecutive failures that open the circuit
+CIRCUIT_OPEN_S = 3600.0         # No request while open; then one trial request
+
+# Coordinates are rounded before building requests so entries on the same
+# site share one download (0.01° ≈ 1 km, finer than the weather models grid)
+COORD_DECIMALS = 2
+
+# Forecast horizon (v0.7.7+)
+MAX_FORECAST_HOURS = 168  # 7 days
+
+# Open-Meteo variable -> IrradianceSeries column
+SERIES_COLUMNS: dict[str, str] = {
+    "shortwave_radiation": "ghi",
+    "direct_normal_irradiance": "dni",
+    "diffuse_radiation": "dhi",
+    "global_tilted_irradiance": "gti",
+    "cloud_cover": "cloud",
+    "temperature_2m": "temp",
+}
+
+# minutely_15 variables (v0.7.7+) - cloud cover is only available hourly
+MINUTELY_15_VARIABLES: tuple[str, ...] = (
+    "shortwave_radiation",
+    "direct_normal_irradiance",
+    "diffuse_radiation",
+    "global_tilted_irradiance",
+    "temperature_2m",
+)
+MINUTELY_15_PAST_STEPS = 4      # 1 h back
+MINUTELY_15_FORECAST_STEPS = 8  # 2 h ahead
+
+# Radiation values are means over the preceding step; others are instantaneous
+AVERAGED_COLUMNS = frozenset({"ghi", "dni", "dhi", "gti"})
+
+# Below this clear-sky GHI the clearness index is unstable -> plain linear
+CLEAR_SKY_MIN_WM2 = 20.0
+
+# Interpolation modes between samples
+INTERP_LINEAR = "linear"
+INTERP_SOLAR = "solar"  # Interpolate the clear-sky index, rescale by clear-sky GHI
+
+
+@dataclass(slots=True)
 class SolarIrradiance:
     """Solar irradiance data from Open-Meteo."""
 
@@ -33,12 +103,270 @@ class SolarIrradiance:
     ghi_wm2: float              # Global Horizontal Irradiance
     dni_wm2: Optional[float]    # Direct Normal Irradiance
     dhi_wm2: Optional[float]    # Diffuse Horizontal Irradiance
-    gti_wm2: Optional[float]    # Global Tilted Irradiance (POA for array 1)
-    gti2_wm2: Optional[float]   # Global Tilted Irradiance (POA for array 2)
+    gti_wm2: Optional[float]    # Global Tilted Irradiance (POA) of the main array
     cloud_cover_pct: Optional[float]  # Cloud cover percentage
     temperature_c: Optional[float]    # Temperature at 2m
 
 
+class IrradianceSeries:
+    """Column-oriented Open-Meteo time series, parsed once per fetch.
+
+    Timestamps are UTC epoch seconds in ascending order, step_s apart. Each
+    column is an array('d') aligned on them, NaN where the API returned null.
+    Column names: ghi, dni, dhi, gti (main array), cloud, temp.
+    """
+
+    def __init__(self, times: array, columns: dict[str, array], step_s: float = 3600.0):
+        self.times = times
+        self.columns = columns
+        self.step_s = step_s
+
+    @classmethod
+    def from_response(cls, data: dict, section: str = "hourly") -> Optional[IrradianceSeries]:
+        """Build a series from an Open-Meteo JSON response section.
+
+        Expects `timeformat=unixtime`; ISO strings are still accepted.
+        """
+        block = data.get(section) or {}
+        raw_times = block.get("time") or []
+        if not raw_times:
+            return None
+
+        if isinstance(raw_times[0], str):
+            times = array("d", (
+                datetime.strptime(t, "%Y-%m-%dT%H:%M").replace(tzinfo=timezone.utc).timestamp()
+                for t in raw_times
+            ))
+        else:
+            times = array("d", raw_times)
+        step_s = times[1] - times[0] if len(times) > 1 else (900.0 if section == "minutely_15" else 3600.0)
+
+        columns: dict[str, array] = {}
+        for variable, name in SERIES_COLUMNS.items():
+            values = block.get(variable)
+            if values is None:
+                continue
+            columns[name] = array("d", (math.nan if v is None else float(v) for v in values))
+        return cls(times, columns, step_s)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def start(self) -> Optional[float]:
+        return self.times[0] if self.times else None
+
+    @property
+    def end(self) -> Optional[float]:
+        return self.times[-1] if self.times else None
+
+    def column(self, name: str) -> Optional[array]:
+        """Return a column, or None if the API did not provide it."""
+        return self.columns.get(name)
+
+    def window(self, start_ts: float, hours: int) -> IrradianceSeries:
+        """Return the samples in [start_ts, start_ts + hours)."""
+        lo = bisect_left(self.times, start_ts)
+        hi = bisect_left(self.times, start_ts + hours * 3600.0)
+        return IrradianceSeries(
+            self.times[lo:hi],
+            {name: col[lo:hi] for name, col in self.columns.items()},
+            self.step_s,
+        )
+
+    def to_dict(self) -> dict:
+        """Compact JSON-safe form: base64 of the raw float64 columns."""
+        def pack(values: array) -> str:
+            return base64.b64encode(values.tobytes()).decode("ascii")
+
+        return {
+            "step_s": self.step_s,
+            "byteorder": sys.byteorder,
+            "times": pack(self.times),
+            "columns": {name: pack(col) for name, col in self.columns.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> IrradianceSeries:
+        """Rebuild a series saved with to_dict()."""
+        swap = data.get("byteorder", sys.byteorder) != sys.byteorder
+
+        def unpack(raw: str) -> array:
+            values = array("d")
+            values.frombytes(base64.b64decode(raw))
+            if swap:
+                values.byteswap()
+            return values
+
+        times = unpack(data["times"])
+        columns = {name: unpack(raw) for name, raw in data["columns"].items()}
+        if any(len(col) != len(times) for col in columns.values()):
+            raise ValueError("Inconsistent column lengths in saved series")
+        return cls(times, columns, float(data["step_s"]))
+
+    def _bracket(self, t: float) -> Optional[tuple[int, int, float]]:
+        """Neighbouring sample indexes and weight for time t (O(log n)).
+
+        Values are held flat up to one step outside the series; beyond
+        that the series does not cover t and None is returned.
+        """
+        times = self.times
+        n = len(times)
+        if n == 0 or t < times[0] - self.step_s or t > times[-1] + self.step_s:
+            return None
+        i1 = bisect_right(times, t)
+        if i1 == 0:
+            return 0, 0, 0.0
+        if i1 >= n:
+            return n - 1, n - 1, 0.0
+        i0 = i1 - 1
+        return i0, i1, (t - times[i0]) / (times[i1] - times[i0])
+
+    def sample(
+        self,
+        ts: float,
+        clear_sky: Optional[Callable[[float], float]] = None,
+    ) -> dict[str, Optional[float]]:
+        """Interpolate every column at UTC epoch ts.
+
+        Args:
+            ts: Time to sample (UTC epoch seconds)
+            clear_sky: Clear-sky GHI (W/m²) at an epoch. When given, radiation
+                columns are interpolated as clear-sky index (solar geometry aware).
+
+        Returns:
+            Column name -> value (None if missing or ts not covered).
+        """
+        half = self.step_s / 2.0
+        # Averaged values are centred on their interval: value stamped T is for T - step/2
+        brackets = {
+            True: self._bracket(ts + half),
+            False: self._bracket(ts),
+        }
+        cs_ratio: Optional[tuple[float, float, float]] = None
+        if clear_sky is not None and brackets[True] is not None:
+            i0, i1, _frac = brackets[True]
+            cs0 = clear_sky(self.times[i0] - half)
+            cs1 = clear_sky(self.times[i1] - half)
+            if cs0 > CLEAR_SKY_MIN_WM2 and cs1 > CLEAR_SKY_MIN_WM2:
+                cs_ratio = (cs0, cs1, clear_sky(ts))
+
+        out: dict[str, Optional[float]] = {}
+        for name, col in self.columns.items():
+            averaged = name in AVERAGED_COLUMNS
+            bracket = brackets[averaged]
+            if bracket is None:
+                out[name] = None
+                continue
+            i0, i1, frac = bracket
+            v0, v1 = col[i0], col[i1]
+            if math.isnan(v0) and math.isnan(v1):
+                out[name] = None
+                continue
+            if math.isnan(v0):
+                v0 = v1
+            elif math.isnan(v1):
+                v1 = v0
+            if averaged and cs_ratio is not None:
+                cs0, cs1, cs = cs_ratio
+                k0, k1 = v0 / cs0, v1 / cs1
+                out[name] = max(0.0, (k0 + (k1 - k0) * frac) * cs)
+            else:
+                out[name] = v0 + (v1 - v0) * frac
+        return out
+
+
+class OpenMeteoFetchManager:
+    """Shared, deduplicated Open-Meteo downloads.
+
+    One manager serves every client of a Home Assistant instance: requests
+    are keyed on their URL (rounded lat/lon, variables, tilt/azimuth,
+    horizon), concurrent identical requests await the same future, and the
+    decoded JSON is cached for CACHE_DURATION_S. Cached responses are shared
+    between clients and must not be mutated. Requests are counted per host
+    and UTC day; past DAILY_CALL_BUDGET they are refused until midnight UTC.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, owns_session: bool = False):
+        """Initialize the fetch manager.
+
+        Args:
+            session: aiohttp session used for every request (e.g. HA's shared one)
+            owns_session: Close the session in close() (standalone use only)
+        """
+        self._session = session
+        self._owns_session = owns_session
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._cache: dict[str, tuple[float, dict]] = {}
+        self._usage: dict[str, list[int]] = {}  # host -> [UTC day, requests]
+        self._budget_warned: dict[str, int] = {}  # host -> UTC day of the last warning
+
+    async def close(self) -> None:
+        """Close the session if this manager created it."""
+        if self._owns_session and not self._session.closed:
+            await self._session.close()
+
+    async def async_get_json(self, url: str) -> Optional[dict]:
+        """GET an Open-Meteo URL, sharing in-flight requests and recent results.
+
+        Returns:
+            Decoded JSON, or None on HTTP error or once the daily budget is
+            spent. Network errors are raised.
+        """
+        now = time.monotonic()
+        cached = self._cache.get(url)
+        if cached is not None and now - cached[0] < CACHE_DURATION_S:
+            return cached[1]
+
+        future = self._inflight.get(url)
+        if future is None:
+            if not self._take_call(url):
+                return None
+            future = asyncio.ensure_future(self._async_fetch(url))
+            self._inflight[url] = future
+            future.add_done_callback(lambda _f: self._inflight.pop(url, None))
+        # Shield: a cancelled caller must not cancel the download for the others
+        return await asyncio.shield(future)
+
+    def _take_call(self, url: str) -> bool:
+        """Count one request against the host's daily budget (False if spent)."""
+        host = urlsplit(url).netloc
+        day = int(time.time() // 86400)
+        usage = self._usage.get(host)
+        if usage is None or usage[0] != day:
+            usage = self._usage[host] = [day, 0]
+        if usage[1] >= DAILY_CALL_BUDGET:
+            if self._budget_warned.get(host) != day:
+                self._budget_warned[host] = day
+                _LOGGER.warning(
+                    "Open-Meteo: daily budget of %d requests to %s spent, "
+                    "no more requests until midnight UTC", DAILY_CALL_BUDGET, host,
+                )
+            return False
+        usage[1] += 1
+        return True
+
+    def usage(self) -> dict[str, int]:
+        """Requests made today (UTC) per host, for diagnostics."""
+        day = int(time.time() // 86400)
+        return {host: n for host, (d, n) in self._usage.items() if d == day}
+
+    async def _async_fetch(self, url: str) -> Optional[dict]:
+        _LOGGER.debug("Open-Meteo request: %s", url)
+        async with self._session.get(
+            url, timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_S)
+        ) as response:
+            if response.status != 200:
+                _LOGGER.error(f"Open-Meteo API error: {response.status}")
+                return None
+            data = await response.json()
+
+        now = time.monotonic()
+        self._cache = {k: v for k, v in self._cache.items() if now - v[0] < CACHE_DURATION_S}
+        self._cache[url] = (now, data)
+        return data
+
+
 class OpenMeteoClient:
     """Async client for Open-Meteo solar radiation API."""
 
@@ -48,8 +376,13 @@ class OpenMeteoClient:
         longitude: float,
         panel_tilt: float = 30.0,
         panel_azimuth: float = 180.0,
-        array2_tilt: Optional[float] = None,
-        array2_azimuth: Optional[float] = None,
+        forecast_hours: int = 0,
+        interpolation: str = INTERP_SOLAR,
+        use_minutely_15: bool = False,
+        clear_sky: Optional[Callable[[float], float]] = None,
+        fetcher: Optional[OpenMeteoFetchManager] = None,
+        task_factory: Optional[Callable[[Coroutine[Any, Any, None]], asyncio.Task]] = None,
+        on_refresh: Optional[Callable[[], None]] = None,
     ):
         """Initialize the Open-Meteo client.
 
@@ -58,22 +391,42 @@ class OpenMeteoClient:
             longitude: Site longitude in degrees
             panel_tilt: Main array tilt angle (0-90 degrees)
             panel_azimuth: Main array azimuth (0=North, 90=East, 180=South, 270=West)
-            array2_tilt: Second array tilt (optional)
-            array2_azimuth: Second array azimuth (optional)
+            forecast_hours: Horizon every fetch must cover (0 = current day only)
+            interpolation: "linear" or "solar" (clear-sky index, needs clear_sky)
+            use_minutely_15: Also fetch 15-minute data around now (preferred when present)
+            clear_sky: Clear-sky GHI (W/m²) at a UTC epoch, for solar interpolation
+            fetcher: Shared fetch manager (a private one is created if omitted)
+            task_factory: Starts background refreshes (default: a plain asyncio task)
+            on_refresh: Called after each successful background refresh
         """
-        self.latitude = latitude
-        self.longitude = longitude
+        self.latitude = round(latitude, COORD_DECIMALS)
+        self.longitude = round(longitude, COORD_DECIMALS)
         self.panel_tilt = panel_tilt
         # Convert from SPVM convention (180=South) to Open-Meteo convention (0=South)
         self.panel_azimuth_om = panel_azimuth - 180.0
 
-        self.array2_tilt = array2_tilt
-        self.array2_azimuth_om = (array2_azimuth - 180.0) if array2_azimuth else None
+        self.forecast_hours = max(0, min(MAX_FORECAST_HOURS, int(forecast_hours)))
+        self.use_minutely_15 = use_minutely_15
+        self._clear_sky = clear_sky if interpolation == INTERP_SOLAR else None
 
-        # Cache
-        self._cache: Optional[dict] = None
+        # Cache (column-oriented series parsed once per fetch)
         self._cache_time: Optional[datetime] = None
-        self._session: Optional[aiohttp.ClientSession] = None
+        self._cache_expires: Optional[datetime] = None
+        self._series: Optional[IrradianceSeries] = None
+        self._series_15: Optional[IrradianceSeries] = None
+        self._fetcher: Optional[OpenMeteoFetchManager] = fetcher
+        self._owns_fetcher = fetcher is None
+
+        # Background refresh, retry backoff and circuit breaker
+        self._task_factory = task_factory
+        self._on_refresh = on_refresh
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._failures = 0
+        self._retry_at = 0.0  # time.monotonic()
+        # Stable per-site offset: entries on the same site refresh together (one shared download)
+        self._refresh_offset_s = MODEL_UPDATE_DELAY_S + zlib.crc32(
+            f"{self.latitude},{self.longitude}".encode()
+        ) % REFRESH_SPREAD_S
 
     def _convert_azimuth_to_open_meteo(self, azimuth_spvm: float) -> float:
         """Convert SPVM azimuth (180=South) to Open-Meteo convention (0=South).
@@ -92,160 +445,324 @@ class OpenMeteoClient:
             om_az += 360
         return om_az
 
-    async def _ensure_session(self) -> aiohttp.ClientSession:
-        """Get or create aiohttp session."""
-        if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=10)
-            )
-        return self._session
+    def _ensure_fetcher(self) -> OpenMeteoFetchManager:
+        """Get the shared fetch manager, or create a private one (standalone use)."""
+        if self._fetcher is None:
+            self._fetcher = OpenMeteoFetchManager(aiohttp.ClientSession(), owns_session=True)
+        return self._fetcher
 
     async def close(self) -> None:
-        """Close the aiohttp session."""
-        if self._session and not self._session.closed:
-            await self._session.close()
+        """Cancel a pending refresh and close the private fetch manager session."""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        if self._owns_fetcher and self._fetcher is not None:
+            await self._fetcher.close()
+            self._fetcher = None
+
+    @property
+    def last_fetch(self) -> Optional[datetime]:
+        """Time of the last successful download (None if never fetched)."""
+        return self._cache_time
+
+    def _next_refresh(self, fetched_at: datetime) -> datetime:
+        """First model update slot (plus this site's offset) after a download."""
+        t = fetched_at.timestamp() - self._refresh_offset_s
+        slot = (math.floor(t / MODEL_UPDATE_INTERVAL_S) + 1) * MODEL_UPDATE_INTERVAL_S
+        return datetime.fromtimestamp(slot + self._refresh_offset_s, timezone.utc)
 
     def _is_cache_valid(self) -> bool:
-        """Check if cache is still valid."""
-        if self._cache is None or self._cache_time is None:
+        """Check if cache is still valid (before the next model update slot)."""
+        if self._series is None or self._cache_expires is None:
             return False
-        age = (datetime.now(timezone.utc) - self._cache_time).total_seconds()
-        return age < CACHE_DURATION_S
+        return datetime.now(timezone.utc) < self._cache_expires
 
-    async def fetch_current(self) -> Optional[SolarIrradiance]:
-        """Fetch current solar irradiance data.
+    def _is_usable(self) -> bool:
+        """True while the last good series may still be served (up to STALE_MAX_AGE_S old)."""
+        if self._series is None or self._cache_time is None:
+            return False
+        return (datetime.now(timezone.utc) - self._cache_time).total_seconds() <= STALE_MAX_AGE_S
+
+    @property
+    def circuit_open(self) -> bool:
+        """True after CIRCUIT_FAILURES consecutive failed refreshes (until one succeeds)."""
+        return self._failures >= CIRCUIT_FAILURES
+
+    def status(self) -> dict[str, Any]:
+        """Refresh state, for diagnostics."""
+        now = datetime.now(timezone.utc)
+        return {
+            "last_fetch": self._cache_time.isoformat() if self._cache_time else None,
+            "age_s": round((now - self._cache_time).total_seconds()) if self._cache_time else None,
+            "serving": self._is_usable(),
+            "refreshing": self._refresh_task is not None and not self._refresh_task.done(),
+            "next_refresh": self._cache_expires.isoformat() if self._cache_expires else None,
+            "api_calls_today": self._fetcher.usage() if self._fetcher is not None else {},
+            "consecutive_failures": self._failures,
+            "circuit_open": self.circuit_open,
+            "next_retry_in_s": max(0, round(self._retry_at - time.monotonic())) if self._failures else None,
+        }
+
+    def revalidate(self, hours: int = 0) -> None:
+        """Start a background refresh after a model update slot, or if the cache ends before now + hours.
+
+        At most one refresh runs at a time; after a failure the next one
+        waits for the backoff delay (or the open circuit).
+        """
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        if self._is_cache_valid() and self._covers(max(1, hours)):
+            return
+        if time.monotonic() < self._retry_at:
+            return
+        coro = self._async_background_refresh(max(hours, self.forecast_hours))
+        if self._task_factory is not None:
+            self._refresh_task = self._task_factory(coro)
+        else:
+            self._refresh_task = asyncio.get_running_loop().create_task(coro)
+
+    async def _async_background_refresh(self, hours: int) -> None:
+        ok = await self._async_refresh(hours)
+        self._record_result(ok)
+        if ok and self._on_refresh is not None:
+            self._on_refresh()
+
+    def _record_result(self, ok: bool) -> None:
+        """Update the backoff / circuit breaker state after a refresh."""
+        if ok:
+            if self.circuit_open:
+                _LOGGER.info("Open-Meteo reachable again, resuming normal refreshes")
+            self._failures = 0
+            self._retry_at = 0.0
+            return
+        self._failures += 1
+        if self.circuit_open:
+            delay = CIRCUIT_OPEN_S
+            if self._failures == CIRCUIT_FAILURES:
+                _LOGGER.warning(
+                    "Open-Meteo: %d failed refreshes in a row, pausing requests for %d min "
+                    "(last data served up to %d h old, then the clear-sky model)",
+                    self._failures, CIRCUIT_OPEN_S // 60, STALE_MAX_AGE_S // 3600,
+                )
+        else:
+            delay = min(RETRY_MAX_S, RETRY_BASE_S * 2 ** (self._failures - 1))
+        # Jitter spreads the retries of installations hitting the same outage
+        self._retry_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+
+    @property
+    def cache_key(self) -> list:
+        """What the cached series depends on (to discard saved data after a config change)."""
+        return [self.latitude, self.longitude, self.panel_tilt, self.panel_azimuth_om, self.use_minutely_15]
+
+    def snapshot(self) -> Optional[dict]:
+        """Serializable copy of the cached series (for persistence across restarts)."""
+        if self._series is None or self._cache_time is None:
+            return None
+        return {
+            "key": self.cache_key,
+            "fetched_at": self._cache_time.timestamp(),
+            "valid_until": self._series.end,
+            "hourly": self._series.to_dict(),
+            "minutely_15": self._series_15.to_dict() if self._series_15 is not None else None,
+        }
+
+    def restore(self, snapshot: dict) -> bool:
+        """Reload a snapshot() if it matches this client, covers now and is not too old.
+
+        The restored series is served right away, so startup does not wait
+        for (or fail on) the first download; a stale one is revalidated in
+        the background.
 
         Returns:
-            SolarIrradiance object with current data, or None if fetch fails.
+            True if the snapshot was loaded.
         """
         try:
-            # Check cache first
-            if self._is_cache_valid():
-                return self._parse_current_from_cache()
-
-            session = await self._ensure_session()
-
-            # Build hourly parameters
-            hourly_params = [
-                "shortwave_radiation",      # GHI
-                "direct_normal_irradiance", # DNI
-                "diffuse_radiation",        # DHI
-                "cloud_cover",
-                "temperature_2m",
-            ]
-
-            # Build URL
-            params = {
-                "latitude": self.latitude,
-                "longitude": self.longitude,
-                "hourly": ",".join(hourly_params),
-                "forecast_days": 1,
-                "timezone": "UTC",
-            }
-
-            # Add GTI for main array
-            tilt_params = {
-                "tilt": self.panel_tilt,
-                "azimuth": self._convert_azimuth_to_open_meteo(
-                    self.panel_azimuth_om + 180.0  # Convert back for the function
-                ),
-            }
-
-            # Request with GTI
-            # Note: Open-Meteo uses tilt and azimuth query params for GTI
-            url = f"{API_URL}?latitude={self.latitude}&longitude={self.longitude}"
-            url += f"&hourly={','.join(hourly_params)},global_tilted_irradiance"
-            url += f"&tilt={self.panel_tilt}&azimuth={self.panel_azimuth_om}"
-            url += "&forecast_days=1&timezone=UTC"
-
-            _LOGGER.debug(f"Open-Meteo request: {url}")
-
-            async with session.get(url) as response:
-                if response.status != 200:
-                    _LOGGER.error(f"Open-Meteo API error: {response.status}")
-                    return None
-
-                data = await response.json()
-                self._cache = data
-                self._cache_time = datetime.now(timezone.utc)
-
-                _LOGGER.debug(f"Open-Meteo response received, caching for {CACHE_DURATION_S}s")
-
-                return self._parse_current_from_cache()
+            if snapshot.get("key") != self.cache_key:
+                return False
+            now = datetime.now(timezone.utc)
+            if snapshot["valid_until"] < now.timestamp():
+                return False
+            if now.timestamp() - snapshot["fetched_at"] > STALE_MAX_AGE_S:
+                return False
+            self._series = IrradianceSeries.from_dict(snapshot["hourly"])
+            minutely = snapshot.get("minutely_15")
+            self._series_15 = IrradianceSeries.from_dict(minutely) if minutely else None
+            self._cache_time = datetime.fromtimestamp(snapshot["fetched_at"], timezone.utc)
+            self._cache_expires = self._next_refresh(self._cache_time)
+            return True
+        except (KeyError, TypeError, ValueError) as e:
+            _LOGGER.warning(f"Ignoring invalid saved Open-Meteo data: {e}")
+            return False
+
+    def _forecast_days(self, hours: int) -> int:
+        """Number of UTC days (from today 00:00) needed to cover now + hours."""
+        now = datetime.now(timezone.utc)
+        return max(1, math.ceil((now.hour + 1 + hours) / 24))
+
+    def _covers(self, hours: int) -> bool:
+        """Check if the cached series reaches now + hours."""
+        if self._series is None or not self._series.times:
+            return False
+        current_hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        return self._series.end >= current_hour.timestamp() + hours * 3600.0
+
+    def _build_url(self, hours: int, tilt: float, azimuth_om: float) -> str:
+        """Build a forecast request URL for one panel orientation."""
+        # Build hourly parameters
+        hourly_params = [
+            "shortwave_radiation",      # GHI
+            "direct_normal_irradiance", # DNI
+            "diffuse_radiation",        # DHI
+            "cloud_cover",
+            "temperature_2m",
+        ]
+        minutely_params = list(MINUTELY_15_VARIABLES)
+
+        # Note: Open-Meteo uses tilt and azimuth query params for GTI
+        url = f"{API_URL}?latitude={self.latitude}&longitude={self.longitude}"
+        url += f"&hourly={','.join(hourly_params + ['global_tilted_irradiance'])}"
+        url += f"&tilt={tilt}&azimuth={azimuth_om}"
+        url += f"&forecast_days={self._forecast_days(max(hours, FETCH_MIN_HOURS))}"
+        url += "&timezone=UTC&timeformat=unixtime"
+        if self.use_minutely_15:
+            url += f"&minutely_15={','.join(minutely_params)}"
+            url += f"&past_minutely_15={MINUTELY_15_PAST_STEPS}"
+            url += f"&forecast_minutely_15={MINUTELY_15_FORECAST_STEPS}"
+        return url
+
+    async def _async_refresh(self, hours: int) -> bool:
+        """Download the series covering now + hours and cache it.
+
+        Only the main array GTI is requested: arrays 2..N are transposed
+        locally from the same DNI / DHI (no request per orientation).
+
+        Returns:
+            True if the cache was refreshed, False if the fetch failed.
+        """
+        try:
+            fetcher = self._ensure_fetcher()
+
+            data = await fetcher.async_get_json(
+                self._build_url(hours, self.panel_tilt, self.panel_azimuth_om)
+            )
+            if data is None:
+                return False
+
+            self._series = IrradianceSeries.from_response(data)
+            self._series_15 = IrradianceSeries.from_response(data, "minutely_15")
+            self._cache_time = datetime.now(timezone.utc)
+            self._cache_expires = self._next_refresh(self._cache_time)
+
+            _LOGGER.debug("Open-Meteo response received, next refresh at %s", self._cache_expires)
+            return True
 
         except asyncio.TimeoutError:
             _LOGGER.warning("Open-Meteo API timeout")
-            return None
+            return False
         except aiohttp.ClientError as e:
             _LOGGER.warning(f"Open-Meteo API connection error: {e}")
-            return None
+            return False
         except Exception as e:
             _LOGGER.error(f"Open-Meteo API unexpected error: {e}", exc_info=True)
+            return False
+
+    def current(self) -> Optional[SolarIrradiance]:
+        """Current irradiance from the cached series, without waiting for the network.
+
+        A stale cache starts a background refresh (revalidate()); meanwhile the
+        last good series keeps being served for up to STALE_MAX_AGE_S.
+
+        Returns:
+            SolarIrradiance at the current time, or None if no usable data.
+        """
+        self.revalidate()
+        if not self._is_usable():
             return None
+        return self._sample_current()
+
+    def forecast(self, hours: int = 24) -> Optional[IrradianceSeries]:
+        """Cached forecast series (see fetch_forecast()), without waiting for the network.
 
-    def _parse_current_from_cache(self) -> Optional[SolarIrradiance]:
-        """Parse current hour data from cached response."""
-        if not self._cache:
+        A stale cache or one shorter than now + hours starts a background refresh.
+        """
+        hours = max(1, min(MAX_FORECAST_HOURS, int(hours)))
+        self.revalidate(hours)
+        if not self._is_usable():
             return None
+        current_hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        return self._series.window(current_hour.timestamp() + 3600.0, hours)
 
-        try:
-            hourly = self._cache.get("hourly", {})
-            times = hourly.get("time", [])
+    async def fetch_current(self) -> Optional[SolarIrradiance]:
+        """Fetch current solar irradiance data, downloading first if the cache is stale.
 
-            if not times:
+        Standalone use; Home Assistant updates call current().
+
+        Returns:
+            SolarIrradiance object with current data, or None if fetch fails.
+        """
+        # Check cache first
+        if not self._is_cache_valid():
+            if not await self._async_refresh(self.forecast_hours):
                 return None
+        return self._sample_current()
 
-            # Find current hour index
-            now = datetime.now(timezone.utc)
-            current_hour = now.replace(minute=0, second=0, microsecond=0)
-            current_hour_str = current_hour.strftime("%Y-%m-%dT%H:%M")
-
-            try:
-                idx = times.index(current_hour_str)
-            except ValueError:
-                # If exact hour not found, use first available
-                idx = 0
-                _LOGGER.debug(f"Current hour {current_hour_str} not in response, using index 0")
-
-            # Extract values
-            ghi = hourly.get("shortwave_radiation", [None])[idx]
-            dni = hourly.get("direct_normal_irradiance", [None])[idx]
-            dhi = hourly.get("diffuse_radiation", [None])[idx]
-            gti = hourly.get("global_tilted_irradiance", [None])[idx]
-            cloud = hourly.get("cloud_cover", [None])[idx]
-            temp = hourly.get("temperature_2m", [None])[idx]
+    def _sample_current(self) -> Optional[SolarIrradiance]:
+        """Interpolate the cached series at the current time."""
+        if self._series is None:
+            return None
 
+        try:
+            now = datetime.now(timezone.utc)
+            now_ts = now.timestamp()
+            values = self._series.sample(now_ts, self._clear_sky)
+            # 15-minute values take precedence wherever they cover now
+            if self._series_15 is not None:
+                for name, value in self._series_15.sample(now_ts, self._clear_sky).items():
+                    if value is not None:
+                        values[name] = value
+
+            ghi = values.get("ghi")
             if ghi is None:
-                _LOGGER.warning("Open-Meteo returned no GHI data")
+                _LOGGER.warning(f"Open-Meteo data does not cover {now.isoformat()} (no GHI)")
                 return None
 
             return SolarIrradiance(
-                timestamp=current_hour,
-                ghi_wm2=float(ghi),
-                dni_wm2=float(dni) if dni is not None else None,
-                dhi_wm2=float(dhi) if dhi is not None else None,
-                gti_wm2=float(gti) if gti is not None else None,
-                gti2_wm2=None,  # Would need second API call for different tilt
-                cloud_cover_pct=float(cloud) if cloud is not None else None,
-                temperature_c=float(temp) if temp is not None else None,
+                timestamp=now,
+                ghi_wm2=ghi,
+                dni_wm2=values.get("dni"),
+                dhi_wm2=values.get("dhi"),
+                gti_wm2=values.get("gti"),
+                cloud_cover_pct=values.get("cloud"),
+                temperature_c=values.get("temp"),
             )
 
         except Exception as e:
             _LOGGER.error(f"Error parsing Open-Meteo response: {e}", exc_info=True)
             return None
 
-    async def fetch_forecast(self, hours: int = 24) -> list[SolarIrradiance]:
+    async def fetch_forecast(self, hours: int = 24) -> Optional[IrradianceSeries]:
         """Fetch solar irradiance forecast.
 
+        The series comes from the same cached download as fetch_current();
+        a new request is only made (and awaited) when the cache is stale or
+        too short.
+
         Args:
             hours: Number of hours to forecast (max 168 = 7 days)
 
         Returns:
-            List of SolarIrradiance objects for each forecast hour.
+            IrradianceSeries starting with the ongoing hour, or None if fetch fails.
+            Open-Meteo radiation values are means over the preceding hour, so
+            the sample stamped T covers [T - 1h, T).
         """
-        # For future implementation - prévisions J+1 / J+7
-        # This would enable predictive Solar Optimizer scheduling
-        raise NotImplementedError("Forecast not yet implemented")
+        hours = max(1, min(MAX_FORECAST_HOURS, int(hours)))
+        if not self._is_cache_valid() or not self._covers(hours):
+            if not await self._async_refresh(max(hours, self.forecast_hours)):
+                return None
+        if self._series is None:
+            return None
+
+        current_hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        return self._series.window(current_hour.timestamp() + 3600.0, hours)
 
 
 async def test_open_meteo():
@@ -260,7 +777,7 @@ async def test_open_meteo():
     try:
         data = await client.fetch_current()
         if data:
-            print(f"Open-Meteo Solar Data:")
+            print("Open-Meteo Solar Data:")
             print(f"  GHI: {data.ghi_wm2:.1f} W/m²")
             print(f"  DNI: {data.dni_wm2:.1f} W/m²" if data.dni_wm2 else "  DNI: N/A")
             print(f"  DHI: {data.dhi_wm2:.1f} W/m²" if data.dhi_wm2 else "  DHI: N/A")
@@ -0,0 +1,112 @@
+"""Hot-path timing instrumentation for the SPVM coordinator.
+
+Each coordinator update is split into named stages (state reads, Open-Meteo,
+solar model, logging, attributes...). Durations are kept in small bounded
+windows per stage; percentiles are only computed when someone reads them
+(diagnostics, diagnostic sensor), so recording costs one perf_counter() call
+and one deque append per stage.
+"""
+from __future__ import annotations
+
+import cProfile
+import io
+import pstats
+from collections import deque
+from time import perf_counter
+from typing import Any, Optional
+
+# Samples kept per stage (≈ 2 h of history at 30 s)
+DEFAULT_WINDOW = 256
+
+
+class StageStats:
+    """Bounded window of durations for one stage, plus all-time count/max."""
+
+    __slots__ = ("samples", "count", "max_s", "last_s")
+
+    def __init__(self, window: int) -> None:
+        self.samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.max_s = 0.0
+        self.last_s = 0.0
+
+    def add(self, duration_s: float) -> None:
+        self.samples.append(duration_s)
+        self.count += 1
+        self.last_s = duration_s
+        if duration_s > self.max_s:
+            self.max_s = duration_s
+
+    def summary(self) -> dict[str, Any]:
+        ordered = sorted(self.samples)
+        n = len(ordered)
+
+        def pct(p: float) -> Optional[float]:
+            if not n:
+                return None
+            return round(ordered[min(n - 1, int(p * n))] * 1000.0, 3)
+
+        return {
+            "count": self.count,
+            "last_ms": round(self.last_s * 1000.0, 3),
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "max_ms": round(self.max_s * 1000.0, 3),
+        }
+
+
+class Lap:
+    """Split timer for one update: each split() records the time since the previous one."""
+
+    __slots__ = ("_profiler", "_start", "_last")
+
+    def __init__(self, profiler: UpdateProfiler) -> None:
+        self._profiler = profiler
+        self._start = self._last = perf_counter()
+
+    def split(self, stage: str) -> None:
+        now = perf_counter()
+        self._profiler.record(stage, now - self._last)
+        self._last = now
+
+    def finish(self) -> None:
+        """Record the whole update as the "total" stage."""
+        self._profiler.record("total", perf_counter() - self._start)
+
+
+class UpdateProfiler:
+    """Per-stage timing histograms (p50 / p95 / max) for coordinator updates."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW) -> None:
+        self._window = window
+        self._stages: dict[str, StageStats] = {}
+
+    def lap(self) -> Lap:
+        """Start timing one update."""
+        return Lap(self)
+
+    def record(self, stage: str, duration_s: float) -> None:
+        stats = self._stages.get(stage)
+        if stats is None:
+            stats = self._stages[stage] = StageStats(self._window)
+        stats.add(duration_s)
+
+    def stage(self, stage: str) -> Optional[dict[str, Any]]:
+        """Summary of one stage, or None if never recorded."""
+        stats = self._stages.get(stage)
+        return stats.summary() if stats is not None else None
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        """Summary of every stage, in first-recorded order."""
+        return {name: stats.summary() for name, stats in self._stages.items()}
+
+
+def write_profile(profile: cProfile.Profile, path: str, top: int = 25) -> str:
+    """Dump a cProfile capture to path and return the top functions as text.
+
+    Blocking (file I/O): run in an executor.
+    """
+    profile.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(top)
+    return out.getvalue()
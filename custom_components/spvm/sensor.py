@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+from datetime import datetime, timedelta, timezone
+from time import monotonic
 from typing import Any, Optional, List
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.components.sensor import SensorEntity
+from homeassistant.const import EntityCategory
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
@@ -16,21 +20,52 @@ from .const import (
     S_SPVM_YIELD_RATIO, L_YIELD_RATIO, UNIT_PERCENT,
     # surplus
     S_SPVM_SURPLUS_NET, L_SURPLUS_NET,
+    # smoothed
+    S_SPVM_EXPECTED_PRODUCTION_SMOOTHED, L_EXPECTED_PRODUCTION_SMOOTHED,
+    S_SPVM_YIELD_RATIO_SMOOTHED, L_YIELD_RATIO_SMOOTHED,
+    S_SPVM_SURPLUS_NET_SMOOTHED, L_SURPLUS_NET_SMOOTHED,
+    # forecast
+    S_SPVM_FORECAST_TOMORROW, L_FORECAST_TOMORROW, UNIT_KWH,
+    # energy today
+    S_SPVM_EXPECTED_ENERGY_TODAY, L_EXPECTED_ENERGY_TODAY,
+    S_SPVM_ACTUAL_ENERGY_TODAY, L_ACTUAL_ENERGY_TODAY,
+    S_SPVM_REMAINING_ENERGY_TODAY, L_REMAINING_ENERGY_TODAY,
+    PUBLISH_DEADBAND_KWH,
+    # diagnostics
+    S_SPVM_UPDATE_DURATION, L_UPDATE_DURATION, UNIT_MS,
 )
 from .coordinator import SPVMCoordinator
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
     coordinator: SPVMCoordinator = hass.data[DOMAIN][entry.entry_id]
-    async_add_entities([
+    entities: List[SensorEntity] = [
         SPVMExpectedProduction(coordinator, entry),
         SPVMYieldRatio(coordinator, entry),
         SPVMSurplusNet(coordinator, entry),
-    ])
+        SPVMExpectedEnergyToday(coordinator, entry),
+        SPVMActualEnergyToday(coordinator, entry),
+        SPVMRemainingEnergyToday(coordinator, entry),
+        SPVMUpdateDuration(coordinator, entry),
+    ]
+    if coordinator.smoothing_window_s > 0:
+        entities += [
+            SPVMExpectedProductionSmoothed(coordinator, entry),
+            SPVMYieldRatioSmoothed(coordinator, entry),
+            SPVMSurplusNetSmoothed(coordinator, entry),
+        ]
+    if coordinator.forecast_hours > 0:
+        entities.append(SPVMForecastTomorrow(coordinator, entry))
+    async_add_entities(entities)
 
 
 class _Base(CoordinatorEntity[SPVMCoordinator], SensorEntity):
     _attr_has_entity_name = False  # Noms courts: sensor.spvm_xxx
+    # Attributs exposés par capteur (sous-ensembles de coordinator.data.attrs / static_attrs)
+    _dynamic_attr_keys: tuple[str, ...] = ()
+    _static_attr_keys: tuple[str, ...] = ()
+    # Publication sur seuil : "power" (W), "yield" (%), "energy" (kWh) ou None (chaque mise à jour est publiée)
+    _deadband_kind: Optional[str] = None
 
     def __init__(self, coordinator: SPVMCoordinator, entry: ConfigEntry, unique_suffix: str, name: str, entity_id_suffix: str) -> None:
         super().__init__(coordinator)
@@ -39,6 +74,41 @@ class _Base(CoordinatorEntity[SPVMCoordinator], SensorEntity):
         self._attr_name = name
         # Suggestion d'entity_id court
         self._attr_suggested_object_id = f"spvm_{entity_id_suffix}"
+        if self._deadband_kind == "energy":
+            # Compteurs cumulés : bande absolue fixe, pas de bande relative au total du jour
+            self._deadband_abs, self._deadband_rel = PUBLISH_DEADBAND_KWH, 0.0
+        else:
+            self._deadband_abs = (
+                coordinator.publish_deadband_w if self._deadband_kind == "power"
+                else coordinator.publish_deadband_yield_pct
+            )
+            self._deadband_rel = coordinator.publish_deadband_rel_pct / 100.0
+        self._max_silence_s = coordinator.publish_max_silence_s
+        self._published: Optional[tuple[bool, Optional[float]]] = None  # (available, value)
+        self._published_at = 0.0
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when the value leaves the deadband (or on heartbeat)."""
+        if self._deadband_kind is None or self._should_publish():
+            self.async_write_ha_state()
+
+    def _should_publish(self) -> bool:
+        available = self.available
+        value = self.native_value if available else None
+        now = monotonic()
+        last = self._published
+        if last is not None and last[0] == available and now - self._published_at < self._max_silence_s:
+            last_value = last[1]
+            if value is None and last_value is None:
+                return False
+            if value is not None and last_value is not None:
+                band = max(self._deadband_abs, self._deadband_rel * abs(last_value))
+                if abs(value - last_value) <= band:
+                    return False
+        self._published = (available, value)
+        self._published_at = now
+        return True
 
     @property
     def device_info(self) -> dict[str, Any]:
@@ -54,7 +124,13 @@ class _Base(CoordinatorEntity[SPVMCoordinator], SensorEntity):
         d = self.coordinator.data
         if not d:
             return None
-        return dict(d.attrs)
+        attrs = d.attrs
+        static = self.coordinator.static_attrs
+        out = {k: static[k] for k in self._static_attr_keys}
+        for k in self._dynamic_attr_keys:
+            if k in attrs:
+                out[k] = attrs[k]
+        return out or None
 
 
 class SPVMExpectedProduction(_Base):
@@ -70,6 +146,26 @@ class SPVMExpectedProduction(_Base):
     Note: For bridled installations (Enphase, some micro-inverters), this is the
     POTENTIAL production available, not the current bridled output.
     """
+    _deadband_kind = "power"
+    _dynamic_attr_keys = (
+        "irradiance_source", "night_resume", "update_interval_s",
+        "model_elevation_deg", "model_azimuth_deg", "model_incidence_deg",
+        "ghi_clear_wm2", "poa_clear_wm2",
+        "open_meteo_ghi_wm2", "open_meteo_gti_wm2", "open_meteo_dni_wm2", "open_meteo_dhi_wm2",
+        "transposition",
+        "lux_correction_active", "lux_factor", "lux_validation", "lux_ghi_ratio",
+        "lux_now", "lux_raw", "lux_spike_filtered", "temp_now", "hum_now_pct", "cloud_now_pct",
+        "arrays",
+    )
+    # Change every update: shown live, kept out of the recorder
+    _unrecorded_attributes = frozenset({
+        "model_elevation_deg", "model_azimuth_deg", "model_incidence_deg",
+        "ghi_clear_wm2", "poa_clear_wm2",
+        "open_meteo_ghi_wm2", "open_meteo_gti_wm2", "open_meteo_dni_wm2", "open_meteo_dhi_wm2",
+        "lux_factor", "lux_ghi_ratio", "lux_now", "lux_raw", "temp_now", "hum_now_pct", "cloud_now_pct",
+        "arrays",
+    })
+
     def __init__(self, coordinator: SPVMCoordinator, entry: ConfigEntry) -> None:
         super().__init__(coordinator, entry, S_SPVM_EXPECTED_PRODUCTION, L_EXPECTED_PRODUCTION, "expected_production")
         self._attr_native_unit_of_measurement = UNIT_W
@@ -98,6 +194,10 @@ class SPVMYieldRatio(_Base):
     - > 110%: Better than expected (cold weather, clean panels)
     - < 90%: Check for issues (shading, dirt, misconfiguration)
     """
+    _deadband_kind = "yield"
+    _dynamic_attr_keys = ("debug_pv_w",)
+    _unrecorded_attributes = frozenset({"debug_pv_w"})
+
     def __init__(self, coordinator: SPVMCoordinator, entry: ConfigEntry) -> None:
         super().__init__(coordinator, entry, S_SPVM_YIELD_RATIO, L_YIELD_RATIO, "yield_ratio")
         self._attr_native_unit_of_measurement = UNIT_PERCENT
@@ -137,6 +237,13 @@ class SPVMSurplusNet(_Base):
 
     See DIAGNOSTIC.md for troubleshooting if this shows 0W.
     """
+    _deadband_kind = "power"
+    _static_attr_keys = ("reserve_w",)
+    _dynamic_attr_keys = ("debug_pv_w", "debug_house_w", "debug_surplus_virtual", "grid_now", "battery_now")
+    _unrecorded_attributes = frozenset(
+        {"debug_pv_w", "debug_house_w", "debug_surplus_virtual", "grid_now", "battery_now"}
+    )
+
     def __init__(self, coordinator: SPVMCoordinator, entry: ConfigEntry) -> None:
         super().__init__(coordinator, entry, S_SPVM_SURPLUS_NET, L_SURPLUS_NET, "surplus_net")
         self._attr_native_unit_of_measurement = UNIT_W
@@ -148,3 +255,205 @@ class SPVMSurplusNet(_Base):
         if not d or d.surplus_net_w is None:
             return None
         return round(float(d.surplus_net_w), 1)
+
+
+class _SmoothedBase(_Base):
+    """Time-weighted moving average of a raw SPVM value over smoothing_window_seconds.
+
+    Computed in the coordinator with an O(1) streaming filter, so no extra
+    `statistics` sensor (and its recorder writes) is needed downstream.
+    """
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        return {"smoothing_window_s": self.coordinator.smoothing_window_s}
+
+
+class SPVMExpectedProductionSmoothed(_SmoothedBase):
+    """Expected solar production, smoothed."""
+    _deadband_kind = "power"
+
+    def __init__(self, coordinator: SPVMCoordinator, entry: ConfigEntry) -> None:
+        super().__init__(
+            coordinator, entry, S_SPVM_EXPECTED_PRODUCTION_SMOOTHED, L_EXPECTED_PRODUCTION_SMOOTHED,
+            "expected_production_smoothed",
+        )
+        self._attr_native_unit_of_measurement = UNIT_W
+        self._attr_device_class = "power"
+
+    @property
+    def native_value(self) -> float | None:
+        d = self.coordinator.data
+        if not d or d.expected_w_smoothed is None:
+            return None
+        return round(float(d.expected_w_smoothed), 1)
+
+
+class SPVMYieldRatioSmoothed(_SmoothedBase):
+    """Yield ratio, smoothed (None while the raw ratio is undefined, e.g. at night)."""
+    _deadband_kind = "yield"
+
+    def __init__(self, coordinator: SPVMCoordinator, entry: ConfigEntry) -> None:
+        super().__init__(coordinator, entry, S_SPVM_YIELD_RATIO_SMOOTHED, L_YIELD_RATIO_SMOOTHED, "yield_ratio_smoothed")
+        self._attr_native_unit_of_measurement = UNIT_PERCENT
+
+    @property
+    def native_value(self) -> float | None:
+        d = self.coordinator.data
+        if not d or d.yield_ratio_pct_smoothed is None:
+            return None
+        return round(float(d.yield_ratio_pct_smoothed), 1)
+
+
+class SPVMSurplusNetSmoothed(_SmoothedBase):
+    """Net surplus power, smoothed (less relay chatter for load switching)."""
+    _deadband_kind = "power"
+
+    def __init__(self, coordinator: SPVMCoordinator, entry: ConfigEntry) -> None:
+        super().__init__(coordinator, entry, S_SPVM_SURPLUS_NET_SMOOTHED, L_SURPLUS_NET_SMOOTHED, "surplus_net_smoothed")
+        self._attr_native_unit_of_measurement = UNIT_W
+        self._attr_device_class = "power"
+
+    @property
+    def native_value(self) -> float | None:
+        d = self.coordinator.data
+        if not d or d.surplus_net_w_smoothed is None:
+            return None
+        return round(float(d.surplus_net_w_smoothed), 1)
+
+
+class SPVMForecastTomorrow(_Base):
+    """Expected production for tomorrow (kWh) from the Open-Meteo forecast.
+
+    The hourly curve (mean W per hour, local time) is exposed in the
+    `forecast` attribute for load schedulers. It is not recorded to keep
+    the recorder database small. Unknown while the forecast horizon does
+    not reach the end of tomorrow (forecast_hours below ~48).
+    """
+    _unrecorded_attributes = frozenset({"forecast"})
+
+    def __init__(self, coordinator: SPVMCoordinator, entry: ConfigEntry) -> None:
+        super().__init__(coordinator, entry, S_SPVM_FORECAST_TOMORROW, L_FORECAST_TOMORROW, "forecast_tomorrow")
+        self._attr_native_unit_of_measurement = UNIT_KWH
+        self._attr_device_class = "energy"
+
+    @property
+    def native_value(self) -> float | None:
+        d = self.coordinator.data
+        if not d or d.forecast is None:
+            return None
+        start = dt_util.start_of_local_day() + timedelta(days=1)
+        end = start + timedelta(days=1)
+        if not d.forecast.covers(start.timestamp(), end.timestamp()):
+            return None  # Part of tomorrow only: not the day's energy
+        return round(d.forecast.energy_kwh(start.timestamp(), end.timestamp()), 2)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        d = self.coordinator.data
+        if not d or d.forecast is None:
+            return None
+        tz = dt_util.DEFAULT_TIME_ZONE
+        return {
+            "generated_at": d.forecast.generated_at.isoformat(),
+            "forecast": [
+                {
+                    "datetime": datetime.fromtimestamp(t, timezone.utc).astimezone(tz).isoformat(),
+                    "expected_w": w,
+                }
+                for t, w in zip(d.forecast.period_start, d.forecast.expected_w)
+            ],
+        }
+
+
+class _EnergyTodayBase(_Base):
+    """Energy since local midnight (kWh), integrated inside the coordinator.
+
+    Trapezoidal integration of every update with O(1) state, reset at local
+    midnight and restored after a restart, so no `integration` / `utility_meter`
+    helper entities are needed downstream.
+    """
+    _deadband_kind = "energy"
+    _attr_suggested_display_precision = 2
+    _value_field = ""
+
+    def __init__(self, coordinator: SPVMCoordinator, entry: ConfigEntry, unique_suffix: str, name: str, entity_id_suffix: str) -> None:
+        super().__init__(coordinator, entry, unique_suffix, name, entity_id_suffix)
+        self._attr_native_unit_of_measurement = UNIT_KWH
+        self._attr_device_class = "energy"
+
+    @property
+    def native_value(self) -> float | None:
+        d = self.coordinator.data
+        if not d:
+            return None
+        return getattr(d, self._value_field)
+
+
+class SPVMExpectedEnergyToday(_EnergyTodayBase):
+    """Expected production since midnight (kWh), from expected_production."""
+    _attr_state_class = "total_increasing"
+    _value_field = "expected_kwh_today"
+
+    def __init__(self, coordinator: SPVMCoordinator, entry: ConfigEntry) -> None:
+        super().__init__(coordinator, entry, S_SPVM_EXPECTED_ENERGY_TODAY, L_EXPECTED_ENERGY_TODAY, "expected_energy_today")
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        return {"yesterday_kwh": _round_kwh(self.coordinator.energy_expected.last_day_kwh)}
+
+
+class SPVMActualEnergyToday(_EnergyTodayBase):
+    """Actual PV production since midnight (kWh), from the PV power sensor."""
+    _attr_state_class = "total_increasing"
+    _value_field = "actual_kwh_today"
+
+    def __init__(self, coordinator: SPVMCoordinator, entry: ConfigEntry) -> None:
+        super().__init__(coordinator, entry, S_SPVM_ACTUAL_ENERGY_TODAY, L_ACTUAL_ENERGY_TODAY, "actual_energy_today")
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        return {"yesterday_kwh": _round_kwh(self.coordinator.energy_actual.last_day_kwh)}
+
+
+class SPVMRemainingEnergyToday(_EnergyTodayBase):
+    """Expected production left until midnight (kWh).
+
+    From the Open-Meteo forecast when it reaches midnight, else the clear-sky
+    model curve. The curve is integrated once per hour (or per new forecast);
+    each update only reads it at the current time.
+    """
+    _value_field = "remaining_kwh_today"
+
+    def __init__(self, coordinator: SPVMCoordinator, entry: ConfigEntry) -> None:
+        super().__init__(coordinator, entry, S_SPVM_REMAINING_ENERGY_TODAY, L_REMAINING_ENERGY_TODAY, "remaining_energy_today")
+
+
+def _round_kwh(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
+
+class SPVMUpdateDuration(_Base):
+    """Coordinator update duration (p95, ms) - diagnostic, disabled by default.
+
+    Per-stage timings (state reads, Open-Meteo, solar model, logging,
+    attributes...) with p50 / p95 / max are in the attributes and in the
+    integration diagnostics. Use it to check whether SPVM contributes to
+    event loop lag.
+    """
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _unrecorded_attributes = frozenset({"stages"})
+
+    def __init__(self, coordinator: SPVMCoordinator, entry: ConfigEntry) -> None:
+        super().__init__(coordinator, entry, S_SPVM_UPDATE_DURATION, L_UPDATE_DURATION, "update_duration")
+        self._attr_native_unit_of_measurement = UNIT_MS
+
+    @property
+    def native_value(self) -> float | None:
+        total = self.coordinator.profiler.stage("total")
+        return total["p95_ms"] if total else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        return {"stages": self.coordinator.profiler.summary()}
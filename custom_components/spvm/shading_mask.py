@@ -0,0 +1,184 @@
+"""Horizon / shading mask: production factor per sun-position bin.
+
+The mask is a flat table of factors (0..1) indexed by sun elevation and
+azimuth bins, so the per-tick lookup is two multiplications and one index whatever
+the shape of the horizon. It is either learned from recorded production
+(``spvm.calibrate``) or built from a horizon profile file (azimuth, horizon
+elevation), e.g. exported from PVGIS.
+"""
+from __future__ import annotations
+
+import json
+import math
+from typing import Any, Iterable, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - standalone use without NumPy
+    np = None
+
+# Default bins for horizon profiles (a learned mask keeps its own bins)
+HORIZON_AZ_STEP_DEG = 5.0
+HORIZON_EL_STEP_DEG = 2.0
+
+# Sun behind the horizon: only diffuse light remains (clear-sky share ≈ 15 %)
+HORIZON_BLOCKED_FACTOR = 0.15
+
+
+class ShadingMask:
+    """Production factors on an (elevation × azimuth) grid, O(1) lookup.
+
+    Bin (i, j) covers elevations [i × el_step, (i + 1) × el_step) and azimuths
+    [j × az_step, (j + 1) × az_step), azimuth 0 = North, clockwise (same as the
+    panel azimuth). Elevations above the table use its top row. Unknown bins
+    (None) are unshaded.
+    """
+
+    __slots__ = (
+        "az_step_deg", "el_step_deg", "n_az", "n_el", "_inv_az", "_inv_el", "_factors", "_np_factors",
+    )
+
+    def __init__(
+        self,
+        factors: Sequence[Sequence[Optional[float]]],
+        az_step_deg: float,
+        el_step_deg: float,
+    ) -> None:
+        if not factors or not factors[0]:
+            raise ValueError("empty shading mask")
+        self.az_step_deg = float(az_step_deg)
+        self.el_step_deg = float(el_step_deg)
+        self.n_el = len(factors)
+        self.n_az = len(factors[0])
+        if any(len(row) != self.n_az for row in factors):
+            raise ValueError("shading mask rows must have the same length")
+        if abs(self.n_az * self.az_step_deg - 360.0) > 1e-6:
+            raise ValueError("shading mask azimuth bins must cover 360°")
+        self._inv_az = 1.0 / self.az_step_deg
+        self._inv_el = 1.0 / self.el_step_deg
+        # Plain list: indexing returns the stored float objects, no boxing per lookup
+        self._factors: list[float] = [
+            1.0 if f is None else min(1.0, max(0.0, float(f))) for row in factors for f in row
+        ]
+        self._np_factors = None
+
+    def factor(self, azimuth_deg: float, elevation_deg: float) -> float:
+        """Production factor for one sun position."""
+        i = int(elevation_deg * self._inv_el)
+        if i >= self.n_el:
+            i = self.n_el - 1
+        elif i < 0:
+            i = 0
+        return self._factors[i * self.n_az + int((azimuth_deg % 360.0) * self._inv_az) % self.n_az]
+
+    def factor_batch(self, azimuth_deg: np.ndarray, elevation_deg: np.ndarray) -> np.ndarray:
+        """Vectorized factor() (NumPy arrays)."""
+        if self._np_factors is None:
+            self._np_factors = np.array(self._factors)
+        i = np.clip((np.maximum(elevation_deg, 0.0) // self.el_step_deg).astype(np.int64), 0, self.n_el - 1)
+        j = ((np.mod(azimuth_deg, 360.0) // self.az_step_deg).astype(np.int64)) % self.n_az
+        return self._np_factors[i * self.n_az + j]
+
+    def rows(self) -> list[list[float]]:
+        return [self._factors[i * self.n_az:(i + 1) * self.n_az] for i in range(self.n_el)]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"az_step_deg": self.az_step_deg, "el_step_deg": self.el_step_deg, "factors": self.rows()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> ShadingMask:
+        return cls(data["factors"], data["az_step_deg"], data["el_step_deg"])
+
+    @classmethod
+    def from_horizon(
+        cls,
+        profile: Iterable[tuple[float, float]],
+        az_step_deg: float = HORIZON_AZ_STEP_DEG,
+        el_step_deg: float = HORIZON_EL_STEP_DEG,
+        blocked_factor: float = HORIZON_BLOCKED_FACTOR,
+    ) -> ShadingMask:
+        """Mask from a horizon profile: (azimuth, horizon elevation) points in degrees.
+
+        The horizon is interpolated linearly (wrapping at 360°) at each azimuth
+        bin centre; elevation bins partly below it are blended.
+        """
+        points = sorted((az % 360.0, el) for az, el in profile)
+        if not points:
+            raise ValueError("empty horizon profile")
+        # Wrap around so every azimuth has a point on both sides
+        azs = [points[-1][0] - 360.0] + [p[0] for p in points] + [points[0][0] + 360.0]
+        els = [points[-1][1]] + [p[1] for p in points] + [points[0][1]]
+
+        def horizon_at(az: float) -> float:
+            k = 1
+            while azs[k] < az:
+                k += 1
+            a0, a1 = azs[k - 1], azs[k]
+            t = 0.0 if a1 == a0 else (az - a0) / (a1 - a0)
+            return els[k - 1] + (els[k] - els[k - 1]) * t
+
+        n_az = int(round(360.0 / az_step_deg))
+        horizon = [horizon_at((j + 0.5) * az_step_deg) for j in range(n_az)]
+        top = max(max(horizon), 0.0)
+        n_el = max(1, int(math.ceil(top / el_step_deg)) + 1)  # top row is always clear
+        factors = []
+        for i in range(n_el):
+            e0 = i * el_step_deg
+            row = []
+            for h in horizon:
+                blocked = min(1.0, max(0.0, (h - e0) / el_step_deg))
+                row.append(1.0 - blocked * (1.0 - blocked_factor))
+            factors.append(row)
+        return cls(factors, az_step_deg, el_step_deg)
+
+
+def _parse_rows(text: str) -> tuple[list[tuple[float, float]], bool]:
+    """(azimuth, elevation) rows of a text profile; True if PVGIS azimuths (0 = South)."""
+    points: list[tuple[float, float]] = []
+    pvgis = False
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if "H_hor" in line:
+            pvgis = True
+            continue
+        fields = line.replace(";", " ").replace(",", " ").replace("\t", " ").split()
+        try:
+            points.append((float(fields[0]), float(fields[1])))
+        except (ValueError, IndexError):
+            continue  # header or footer line
+    return points, pvgis
+
+
+def load_shading_mask(path: str) -> ShadingMask:
+    """Read a horizon profile or a saved mask (blocking I/O).
+
+    Accepted files:
+    - text / CSV: "azimuth,elevation" per line (0 = North); PVGIS exports
+      ("A  H_hor" header, 0 = South) are detected and converted
+    - JSON: [[azimuth, elevation], ...], a PVGIS horizon response, or a mask
+      saved by spvm.calibrate ({"az_step_deg", "el_step_deg", "factors"})
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        points, pvgis = _parse_rows(text)
+    else:
+        if isinstance(data, dict) and "factors" in data:
+            return ShadingMask.from_dict(data)
+        if isinstance(data, dict):  # PVGIS printhorizon JSON
+            rows = data.get("outputs", {}).get("horizon_profile", [])
+            points, pvgis = [(r["A"], r["H_hor"]) for r in rows], True
+        else:
+            points = [
+                (p["azimuth"], p["elevation"]) if isinstance(p, dict) else (p[0], p[1]) for p in data
+            ]
+            pvgis = False
+    if pvgis:
+        points = [(az + 180.0, el) for az, el in points]
+    if not points:
+        raise ValueError(f"{path}: no horizon points found")
+    return ShadingMask.from_horizon(points)
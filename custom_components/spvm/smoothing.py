@@ -0,0 +1,95 @@
+"""Streaming time-weighted moving average for irregularly spaced samples.
+
+Samples are joined by straight lines (trapezoidal rule) and averaged over the
+last ``window_s`` seconds. Segments live in a bounded ring buffer with a
+running area, so each update costs O(1) amortised whatever the sample rate
+(fixed interval or event-driven).
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Optional, Tuple
+
+# Segments kept per filter (event-driven mode can sample several times per second)
+DEFAULT_MAX_SEGMENTS = 512
+
+# (t0, v0, t1, v1, area)
+_Segment = Tuple[float, float, float, float, float]
+
+
+class TimeWeightedAverage:
+    """Time-weighted moving average over a sliding time window.
+
+    None samples (e.g. yield ratio at night) break the line: the gap is not
+    averaged, and the average is None once the window holds no data.
+    """
+
+    __slots__ = (
+        "window_s", "_segments", "_max_segments", "_area", "_duration",
+        "_last_t", "_last_v", "_evictions",
+    )
+
+    def __init__(self, window_s: float, max_segments: int = DEFAULT_MAX_SEGMENTS) -> None:
+        self.window_s = float(window_s)
+        self._segments: deque[_Segment] = deque()
+        self._max_segments = max_segments
+        self._area = 0.0
+        self._duration = 0.0
+        self._last_t: Optional[float] = None
+        self._last_v: Optional[float] = None
+        self._evictions = 0
+
+    def reset(self) -> None:
+        self._segments.clear()
+        self._area = self._duration = 0.0
+        self._last_t = self._last_v = None
+
+    def add(self, t: float, value: Optional[float]) -> Optional[float]:
+        """Add a sample at time t (seconds, monotonic) and return the new average."""
+        if self._last_t is not None and t <= self._last_t:
+            # Same timestamp (or clock glitch): replace the held value only
+            if value is not None:
+                self._last_v = value
+            return self.value
+        if self._last_v is not None and value is not None and self._last_t is not None:
+            if len(self._segments) >= self._max_segments:
+                self._pop_oldest()
+            area = (self._last_v + value) * 0.5 * (t - self._last_t)
+            self._segments.append((self._last_t, self._last_v, t, value, area))
+            self._area += area
+            self._duration += t - self._last_t
+        self._last_t = t
+        self._last_v = value
+        self._trim(t - self.window_s)
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        """Current average (the last sample alone until a segment exists)."""
+        if self._duration > 0.0:
+            return self._area / self._duration
+        return self._last_v
+
+    def _pop_oldest(self) -> None:
+        t0, _v0, t1, _v1, area = self._segments.popleft()
+        self._area -= area
+        self._duration -= t1 - t0
+        self._evictions += 1
+        if not self._segments or self._evictions >= self._max_segments:
+            # Re-sum from the buffer now and then so add/subtract rounding cannot drift
+            self._area = sum(s[4] for s in self._segments)
+            self._duration = sum(s[2] - s[0] for s in self._segments)
+            self._evictions = 0
+
+    def _trim(self, start: float) -> None:
+        """Drop whatever lies before the window start (the first segment is clipped)."""
+        segments = self._segments
+        while segments and segments[0][2] <= start:
+            self._pop_oldest()
+        if segments and segments[0][0] < start:
+            t0, v0, t1, v1, area = segments[0]
+            v_start = v0 + (v1 - v0) * (start - t0) / (t1 - t0)
+            clipped = (v_start + v1) * 0.5 * (t1 - start)
+            segments[0] = (start, v_start, t1, v1, clipped)
+            self._area += clipped - area
+            self._duration -= start - t0
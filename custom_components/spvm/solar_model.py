@@ -1,9 +1,40 @@
 from __future__ import annotations
 
 import math
-from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Optional
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field, fields, replace
+from datetime import datetime, timezone, tzinfo
+from typing import TYPE_CHECKING, Any, Optional, Sequence
+
+try:  # NumPy is only needed for the batch engine (compute_batch)
+    import numpy as np
+except ImportError:  # pragma: no cover - standalone use without NumPy
+    np = None
+
+try:
+    from .const import (
+        CONF_SITE_LATITUDE, CONF_SITE_LONGITUDE, CONF_SITE_ALTITUDE,
+        CONF_PANEL_TILT, CONF_PANEL_AZIMUTH, CONF_PANEL_PEAK_POWER, CONF_SYSTEM_EFFICIENCY,
+        CONF_DEGRADATION_PCT, CONF_CAP_MAX_W,
+        CONF_LUX_MIN_ELEVATION, CONF_LUX_FLOOR_FACTOR,
+        CONF_SHADING_WINTER_PCT, CONF_SHADING_MONTH_START, CONF_SHADING_MONTH_END,
+        CONF_ARRAY2_PEAK_POWER, CONF_ARRAY2_TILT, CONF_ARRAY2_AZIMUTH,
+        DEF_ARRAY2_TILT, DEF_ARRAY2_AZIMUTH, CONF_ARRAYS,
+    )
+except ImportError:  # Standalone: backtest / calibration scripts
+    from const import (
+        CONF_SITE_LATITUDE, CONF_SITE_LONGITUDE, CONF_SITE_ALTITUDE,
+        CONF_PANEL_TILT, CONF_PANEL_AZIMUTH, CONF_PANEL_PEAK_POWER, CONF_SYSTEM_EFFICIENCY,
+        CONF_DEGRADATION_PCT, CONF_CAP_MAX_W,
+        CONF_LUX_MIN_ELEVATION, CONF_LUX_FLOOR_FACTOR,
+        CONF_SHADING_WINTER_PCT, CONF_SHADING_MONTH_START, CONF_SHADING_MONTH_END,
+        CONF_ARRAY2_PEAK_POWER, CONF_ARRAY2_TILT, CONF_ARRAY2_AZIMUTH,
+        DEF_ARRAY2_TILT, DEF_ARRAY2_AZIMUTH, CONF_ARRAYS,
+    )
+
+if TYPE_CHECKING:
+    from .shading_mask import ShadingMask
 
 
 # =====================================================================
@@ -13,10 +44,54 @@ from typing import Optional
 #  - Clear-sky irradiance baseline (simple: extraterrestrial * transmittance)
 #  - Cloud correction (Kasten-Czeplak-like: (1 - 0.75*C^3))
 #  - Temperature derating (~ -0.5 % / °C above 25°C), optional
-#  - Plane-of-array projection using incidence angle
+#  - Plane-of-array projection using incidence angle, or Perez transposition
+#    of real DNI / DHI (beam + sky diffuse + ground reflected)
 # =====================================================================
 
 SOLAR_CONSTANT = 1367.0  # W/m2 top-of-atmosphere
+GROUND_ALBEDO = 0.2      # Typical grass / concrete ground reflectance
+
+# Perez et al. (1990) sky diffuse coefficients ("allsites composite"), one row
+# per sky clearness bin: f11, f12, f13, f21, f22, f23
+PEREZ_EPSILON_BINS = (1.065, 1.23, 1.5, 1.95, 2.8, 4.5, 6.2)
+PEREZ_COEFFICIENTS = (
+    (-0.0083117, 0.5877285, -0.0620636, -0.0596012, 0.0721249, -0.0220216),
+    (0.1299457, 0.6825954, -0.1513752, -0.0189325, 0.0659650, -0.0288748),
+    (0.3296958, 0.4868735, -0.2210958, 0.0554140, -0.0639588, -0.0260542),
+    (0.5682053, 0.1874525, -0.2951290, 0.1088631, -0.1519229, -0.0139754),
+    (0.8730280, -0.3920403, -0.3616149, 0.2255647, -0.4620442, 0.0012448),
+    (1.1326077, -1.2367284, -0.4118494, 0.2877813, -0.8230357, 0.0558651),
+    (1.0601591, -1.5999137, -0.3589221, 0.2642124, -1.1272340, 0.1310694),
+    (0.6777470, -0.3272588, -0.2504286, 0.1561313, -1.3765031, 0.2506212),
+)
+_PEREZ_KAPPA = 1.041            # Zenith angle in radians
+_PEREZ_MIN_COS_ZENITH = math.cos(math.radians(85.0))
+
+
+@dataclass(slots=True)
+class ArraySpec:
+    """One panel group: peak power and orientation (v0.7.7+).
+
+    The panel normal and the sky / ground view factors are computed once here;
+    each evaluation only dots the normal with the shared sun vector. The
+    shading mask may be swapped in place.
+    """
+
+    peak_w: float
+    tilt_deg: float = 30.0               # 0=flat up, 90=vertical
+    azimuth_deg: float = 180.0           # 180=South
+    shading_mask: Optional[ShadingMask] = None  # Replaces the seasonal shading for this array
+    normal: tuple[float, float, float] = field(init=False, repr=False, compare=False)
+    sky_view: float = field(init=False, repr=False, compare=False)     # (1 + cos tilt) / 2
+    ground_view: float = field(init=False, repr=False, compare=False)  # (1 - cos tilt) / 2
+    sin_tilt: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.normal = _panel_normal(self.tilt_deg, self.azimuth_deg)
+        cos_tilt = self.normal[2]
+        self.sky_view = (1.0 + cos_tilt) / 2.0
+        self.ground_view = (1.0 - cos_tilt) / 2.0
+        self.sin_tilt = math.sin(math.radians(self.tilt_deg))
 
 
 @dataclass
@@ -26,10 +101,8 @@ class SolarInputs:
     lon_deg: float
     altitude_m: float = 0.0
 
-    panel_tilt_deg: float = 30.0         # 0=flat up, 90=vertical
-    panel_azimuth_deg: float = 180.0     # 180=South
-
-    panel_peak_w: float = 2800.0
+    # Panel groups (v0.7.7+): one ArraySpec per orientation, at least one
+    arrays: Sequence[ArraySpec] = ()
     system_efficiency: float = 0.85      # 0..1
 
     cloud_pct: Optional[float] = None    # 0..100
@@ -45,37 +118,49 @@ class SolarInputs:
     shading_month_start: int = 11        # Month when shading starts (1-12)
     shading_month_end: int = 2           # Month when shading ends (1-12)
 
-    # Second array (optional) for multi-orientation installations (v0.7.4+)
-    array2_peak_w: float = 0.0           # 0 = disabled
-    array2_tilt_deg: float = 15.0        # Typical for pergola/flat roof
-    array2_azimuth_deg: float = 180.0    # South by default
-
     # Open-Meteo real irradiance data (v0.7.5+) - replaces clear-sky model when available
     real_ghi_wm2: Optional[float] = None   # Real Global Horizontal Irradiance
-    real_gti_wm2: Optional[float] = None   # Real Global Tilted Irradiance (array 1)
-    real_gti2_wm2: Optional[float] = None  # Real Global Tilted Irradiance (array 2)
+    real_gti_wm2: Optional[Sequence[Optional[float]]] = None  # Real Global Tilted Irradiance, per array
+    # Real DNI / DHI (v0.7.7+): Perez transposition for arrays without a real GTI
+    real_dni_wm2: Optional[float] = None
+    real_dhi_wm2: Optional[float] = None
+    albedo: float = GROUND_ALBEDO
 
+    # Precomputed sun position (v0.7.7+), e.g. from SolarEphemeris
+    geometry: Optional[SolarGeometry] = None
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
+class SolarGeometry:
+    """Sun position at one instant."""
+
+    elevation_deg: float
+    azimuth_deg: float
+    declination_deg: float
+    sun_vector: tuple[float, float, float]  # Unit vector to the sun (East, North, Up)
+
+
+@dataclass(slots=True)
 class SolarResult:
     elevation_deg: float
     azimuth_deg: float
     declination_deg: float
-    incidence_deg: float
+    incidence_deg: float                 # Array 1
     ghi_clear_wm2: float
-    poa_clear_wm2: float
+    poa_clear_wm2: float                 # Sum over the arrays
     expected_clear_w: float
     expected_corrected_w: float
+    # Per-array values (v0.7.7+), packed in input order
+    array_incidence_deg: array
+    array_poa_wm2: array
+    array_expected_clear_w: array
+    array_expected_corrected_w: array
     lux_factor: Optional[float] = None  # Lux-based correction factor applied (0..1)
-    # Multi-array support (v0.7.4+)
-    array2_incidence_deg: Optional[float] = None
-    array2_poa_clear_wm2: Optional[float] = None
-    array2_expected_clear_w: Optional[float] = None
-    array2_expected_corrected_w: Optional[float] = None
     # Open-Meteo real irradiance (v0.7.5+)
     using_real_irradiance: bool = False  # True if Open-Meteo data was used
     real_ghi_wm2: Optional[float] = None
-    real_gti_wm2: Optional[float] = None
+    real_gti_wm2: Optional[float] = None  # Array 1
+    transposed: bool = False             # Perez transposition used for at least one array
 
 
 def _to_julian_day(dt: datetime) -> float:
@@ -148,24 +233,26 @@ def _air_mass(elevation_deg: float) -> float:
     return 1.0 / (math.cos(z) + 0.50572 * (96.07995 - (90.0 - el)) ** -1.6364)
 
 
-def _incidence_angle(elev_deg: float, az_deg: float, tilt_deg: float, panel_az_deg: float) -> float:
-    # Angle entre la normale au panneau et le soleil
-    # Vectorial method: cos(theta_i) = ...
+def _sun_vector(elev_deg: float, az_deg: float) -> tuple[float, float, float]:
+    # Sun vector (horizontal coordinates: East, North, Up)
     elev = math.radians(elev_deg)
     az = math.radians(az_deg)
-    tilt = math.radians(tilt_deg)
-    paz = math.radians(panel_az_deg)
+    cos_el = math.cos(elev)
+    return cos_el * math.sin(az), cos_el * math.cos(az), math.sin(elev)
 
-    # Sun vector (horizontal coordinates)
-    sx = math.cos(elev) * math.sin(az)   # East
-    sy = math.cos(elev) * math.cos(az)   # North
-    sz = math.sin(elev)                  # Up
 
+def _panel_normal(tilt_deg: float, panel_az_deg: float) -> tuple[float, float, float]:
     # Panel normal vector (tilt from horizontal, azimuth from North)
-    nx = math.sin(tilt) * math.sin(paz)  # East
-    ny = math.sin(tilt) * math.cos(paz)  # North
-    nz = math.cos(tilt)                  # Up
+    tilt = math.radians(tilt_deg)
+    paz = math.radians(panel_az_deg)
+    return math.sin(tilt) * math.sin(paz), math.sin(tilt) * math.cos(paz), math.cos(tilt)
 
+
+def _incidence_angle(elev_deg: float, az_deg: float, tilt_deg: float, panel_az_deg: float) -> float:
+    # Angle entre la normale au panneau et le soleil
+    # Vectorial method: cos(theta_i) = sun . normal
+    sx, sy, sz = _sun_vector(elev_deg, az_deg)
+    nx, ny, nz = _panel_normal(tilt_deg, panel_az_deg)
     cos_t = max(0.0, min(1.0, sx * nx + sy * ny + sz * nz))
     return math.degrees(math.acos(cos_t))
 
@@ -183,6 +270,85 @@ def _clear_sky_ghi(elev_deg: float, altitude_m: float) -> float:
     return max(0.0, ghi)
 
 
+def _extraterrestrial_normal(day_of_year: int) -> float:
+    # Top-of-atmosphere normal irradiance with the Earth orbit eccentricity
+    return SOLAR_CONSTANT * (1.0 + 0.033 * math.cos(2.0 * math.pi * (day_of_year - 1) / 365.0))
+
+
+def _perez_sky(elev_deg: float, dni: float, dhi: float, day_of_year: int) -> tuple[float, float, float]:
+    """Orientation-independent part of the Perez (1990) sky diffuse model.
+
+    Returns:
+        (F1 circumsolar, F2 horizon brightening, 1 / max(cos 85°, cos zenith));
+        the sky diffuse on a panel is then
+        DHI × ((1 - F1) × sky_view + F1 × cos(incidence) / b + F2 × sin(tilt)).
+    """
+    zenith = math.radians(90.0 - elev_deg)
+    inv_b = 1.0 / max(_PEREZ_MIN_COS_ZENITH, math.cos(zenith))
+    if dhi <= 0.0:
+        return 0.0, 0.0, inv_b
+    kz3 = _PEREZ_KAPPA * zenith ** 3
+    epsilon = ((dhi + dni) / dhi + kz3) / (1.0 + kz3)  # Sky clearness
+    delta = dhi * _air_mass(elev_deg) / _extraterrestrial_normal(day_of_year)  # Sky brightness
+    f11, f12, f13, f21, f22, f23 = PEREZ_COEFFICIENTS[bisect_left(PEREZ_EPSILON_BINS, epsilon)]
+    f1 = max(0.0, f11 + f12 * delta + f13 * zenith)
+    f2 = f21 + f22 * delta + f23 * zenith
+    return f1, f2, inv_b
+
+
+def clear_sky_ghi_at(dt_utc: datetime, lat_deg: float, lon_deg: float, altitude_m: float = 0.0) -> float:
+    """Clear-sky GHI (W/m²) of the model at a given instant and site."""
+    el_deg, _az, _dec, _ha = _sun_position(dt_utc, lat_deg, lon_deg)
+    return _clear_sky_ghi(el_deg, altitude_m)
+
+
+def next_elevation_crossing(
+    ts: float,
+    lat_deg: float,
+    lon_deg: float,
+    elevation_deg: float,
+    rising: bool = True,
+    horizon_s: float = 2 * 86400.0,
+    step_s: float = 600.0,
+) -> Optional[float]:
+    """Next time (UTC epoch) the sun crosses elevation_deg, rising or setting.
+
+    Coarse scan at step_s, then bisection to about one second.
+
+    Args:
+        ts: Start time (UTC epoch seconds)
+        lat_deg: Site latitude in degrees
+        lon_deg: Site longitude in degrees
+        elevation_deg: Elevation threshold (e.g. 0 for sunrise/sunset)
+        rising: True for the upward crossing (sunrise), False for sunset
+        horizon_s: Search horizon in seconds
+        step_s: Scan step in seconds
+
+    Returns:
+        Crossing time, or None if there is none within the horizon (polar day/night)
+    """
+    def above(t: float) -> bool:
+        el, _az, _dec, _ha = _sun_position(datetime.fromtimestamp(t, timezone.utc), lat_deg, lon_deg)
+        return el > elevation_deg
+
+    t0, a0 = ts, above(ts)
+    end = ts + horizon_s
+    while t0 < end:
+        t1 = min(t0 + step_s, end)
+        a1 = above(t1)
+        if a1 != a0 and a1 == rising:
+            lo, hi = t0, t1
+            while hi - lo > 1.0:
+                mid = (lo + hi) / 2.0
+                if above(mid) == rising:
+                    hi = mid
+                else:
+                    lo = mid
+            return hi
+        t0, a0 = t1, a1
+    return None
+
+
 def _cloud_factor(cloud_pct: Optional[float]) -> float:
     if cloud_pct is None:
         return 1.0
@@ -285,118 +451,747 @@ def _seasonal_shading_factor(dt: datetime, shading_pct: float,
 
 
 def compute(inputs: SolarInputs) -> SolarResult:
-    el_deg, az_deg, dec_deg, _ha = _sun_position(inputs.dt_utc, inputs.lat_deg, inputs.lon_deg)
+    return _evaluate(
+        inputs, inputs.dt_utc, inputs.geometry, inputs.cloud_pct, inputs.temp_c, inputs.lux,
+        inputs.real_ghi_wm2, inputs.real_gti_wm2, inputs.real_dni_wm2, inputs.real_dhi_wm2,
+    )
 
-    # --- Determine irradiance source: Open-Meteo real data or clear-sky model ---
-    using_real_irradiance = inputs.real_ghi_wm2 is not None
 
+def _evaluate(
+    inputs: SolarInputs | SolarSite,
+    dt_utc: datetime,
+    geometry: Optional[SolarGeometry],
+    cloud_pct: Optional[float],
+    temp_c: Optional[float],
+    lux: Optional[float],
+    real_ghi_wm2: Optional[float],
+    real_gti_wm2: Optional[Sequence[Optional[float]]],
+    real_dni_wm2: Optional[float],
+    real_dhi_wm2: Optional[float],
+) -> SolarResult:
+    # Site / panel constants come from `inputs` (SolarInputs or SolarSite, same
+    # field names), per-tick values from the arguments
+    arrays = inputs.arrays
+    n = len(arrays)
+    if n == 0:
+        raise ValueError("SPVM solar model needs at least one panel array")
+
+    if geometry is not None:
+        el_deg, az_deg, dec_deg = geometry.elevation_deg, geometry.azimuth_deg, geometry.declination_deg
+        sx, sy, sz = geometry.sun_vector
+    else:
+        el_deg, az_deg, dec_deg, _ha = _sun_position(dt_utc, inputs.lat_deg, inputs.lon_deg)
+        sx, sy, sz = _sun_vector(el_deg, az_deg)
+
+    # --- Determine irradiance source: Open-Meteo real data or clear-sky model ---
+    using_real_irradiance = real_ghi_wm2 is not None
     if using_real_irradiance:
-        # Use real irradiance from Open-Meteo
-        ghi = inputs.real_ghi_wm2
-        # Use GTI if available, otherwise convert GHI to POA
-        if inputs.real_gti_wm2 is not None:
-            poa = inputs.real_gti_wm2
-        else:
-            # Approximate POA from GHI using incidence angle
-            inc_deg = _incidence_angle(el_deg, az_deg, inputs.panel_tilt_deg, inputs.panel_azimuth_deg)
-            cosi = max(0.0, math.cos(math.radians(inc_deg)))
-            poa = ghi * (cosi / max(1e-6, math.sin(math.radians(el_deg)))) if el_deg > 0 else 0.0
+        ghi = real_ghi_wm2
     else:
-        # Use clear-sky model (fallback)
         ghi = _clear_sky_ghi(el_deg, inputs.altitude_m)
-        inc_deg = _incidence_angle(el_deg, az_deg, inputs.panel_tilt_deg, inputs.panel_azimuth_deg)
-        cosi = max(0.0, math.cos(math.radians(inc_deg)))
-        poa = ghi * (cosi / max(1e-6, math.sin(math.radians(el_deg)))) if el_deg > 0 else 0.0
-
-    # --- Array 1 (primary) ---
-    inc_deg = _incidence_angle(el_deg, az_deg, inputs.panel_tilt_deg, inputs.panel_azimuth_deg)
-    poa_clear = max(0.0, poa)
-
-    # Expected power before corrections
-    expected_clear = poa_clear * inputs.system_efficiency * (inputs.panel_peak_w / 1000.0)
-
-    # --- Array 2 (optional, for multi-orientation installations) ---
-    array2_inc_deg: Optional[float] = None
-    array2_poa_clear: Optional[float] = None
-    array2_expected_clear: Optional[float] = None
-    array2_expected_corr: Optional[float] = None
-
-    if inputs.array2_peak_w > 0:
-        array2_inc_deg = _incidence_angle(el_deg, az_deg, inputs.array2_tilt_deg, inputs.array2_azimuth_deg)
-
-        if using_real_irradiance and inputs.real_gti2_wm2 is not None:
-            # Use real GTI for array 2
-            array2_poa_clear = inputs.real_gti2_wm2
-        else:
-            # Calculate from GHI
-            cosi2 = max(0.0, math.cos(math.radians(array2_inc_deg)))
-            array2_poa_clear = ghi * (cosi2 / max(1e-6, math.sin(math.radians(el_deg)))) if el_deg > 0 else 0.0
-
-        array2_poa_clear = max(0.0, array2_poa_clear)
-        array2_expected_clear = array2_poa_clear * inputs.system_efficiency * (inputs.array2_peak_w / 1000.0)
-
-    # --- Corrections ---
+    # GHI -> POA projection factor (cos(incidence) / sin(elevation)), per array below
+    ghi_ratio = ghi / max(1e-6, math.sin(math.radians(el_deg))) if el_deg > 0 else 0.0
+    # Real GTI per array takes precedence over the projection
+    gti = real_gti_wm2 if using_real_irradiance and real_gti_wm2 is not None else ()
+    # Real DNI / DHI: Perez transposition instead of the GHI ratio, which
+    # overestimates the tilted irradiance at low sun (mostly diffuse light)
+    transpose = (
+        using_real_irradiance and real_dni_wm2 is not None and real_dhi_wm2 is not None and el_deg > 0
+    )
+    if transpose:
+        dni = max(0.0, real_dni_wm2)
+        dhi = max(0.0, real_dhi_wm2)
+        f1, f2, inv_b = _perez_sky(el_deg, dni, dhi, dt_utc.timetuple().tm_yday)
+        reflected = max(0.0, ghi) * inputs.albedo
+    transposed = False
+
+    # --- Corrections shared by every array ---
     # When using real irradiance, cloud correction is already included in the data
     # Only apply temperature and shading corrections
-    temp_factor = _temperature_factor(inputs.temp_c)
-
-    shading_factor = _seasonal_shading_factor(
-        inputs.dt_utc,
-        inputs.shading_winter_pct,
-        inputs.shading_month_start,
-        inputs.shading_month_end
-    )
-
+    temp_factor = _temperature_factor(temp_c)
     lux_factor: Optional[float] = None
-
     if using_real_irradiance:
-        # Real irradiance already includes weather effects, only apply temp + shading
-        expected_corr = expected_clear * temp_factor * shading_factor
+        weather_factor = temp_factor
     else:
         # Clear-sky model: apply cloud/lux correction
-        cloud_temp_factor = _cloud_factor(inputs.cloud_pct) * temp_factor
-
         lux_factor = _lux_correction_factor(
-            inputs.lux,
+            lux,
             el_deg,
             min_elevation=inputs.lux_min_elevation_deg,
             floor_factor=inputs.lux_floor_factor
         )
-
         if lux_factor is not None:
-            expected_corr = expected_clear * lux_factor * temp_factor * shading_factor
+            weather_factor = lux_factor * temp_factor
         else:
-            expected_corr = expected_clear * cloud_temp_factor * shading_factor
-
-    # Apply corrections to Array 2
-    if inputs.array2_peak_w > 0 and array2_expected_clear is not None:
-        if using_real_irradiance:
-            array2_expected_corr = array2_expected_clear * temp_factor * shading_factor
-        elif lux_factor is not None:
-            array2_expected_corr = array2_expected_clear * lux_factor * temp_factor * shading_factor
+            weather_factor = _cloud_factor(cloud_pct) * temp_factor
+    seasonal_factor: Optional[float] = None  # Only for arrays without a shading mask
+
+    # --- Arrays: one dot product with the shared sun vector each ---
+    incidence = array("d", bytes(8 * n))
+    poa_w = array("d", bytes(8 * n))
+    clear_w = array("d", bytes(8 * n))
+    corrected_w = array("d", bytes(8 * n))
+    scale = inputs.system_efficiency / 1000.0
+    for k in range(n):
+        spec = arrays[k]
+        nx, ny, nz = spec.normal
+        cos_i = max(0.0, min(1.0, sx * nx + sy * ny + sz * nz))
+        real_gti = gti[k] if k < len(gti) else None
+        if real_gti is not None:
+            poa = max(0.0, real_gti)
+        elif transpose:
+            # Beam + sky diffuse (Perez) + ground reflected
+            poa = max(0.0, (
+                dni * cos_i
+                + dhi * ((1.0 - f1) * spec.sky_view + f1 * cos_i * inv_b + f2 * spec.sin_tilt)
+                + reflected * spec.ground_view
+            ))
+            transposed = True
         else:
-            array2_expected_corr = array2_expected_clear * _cloud_factor(inputs.cloud_pct) * temp_factor * shading_factor
+            poa = max(0.0, ghi_ratio * cos_i)
+        expected_clear = poa * scale * spec.peak_w
 
-        # Add Array 2 to totals
-        expected_clear += array2_expected_clear
-        expected_corr += array2_expected_corr
-        poa_clear += array2_poa_clear  # Combined POA for reference
+        # A shading mask replaces the month-range shading for its array
+        if spec.shading_mask is not None:
+            shading_factor = spec.shading_mask.factor(az_deg, el_deg)
+        else:
+            if seasonal_factor is None:
+                seasonal_factor = _seasonal_shading_factor(
+                    dt_utc,
+                    inputs.shading_winter_pct,
+                    inputs.shading_month_start,
+                    inputs.shading_month_end
+                )
+            shading_factor = seasonal_factor
+
+        incidence[k] = math.degrees(math.acos(cos_i))
+        poa_w[k] = poa
+        clear_w[k] = expected_clear
+        corrected_w[k] = expected_clear * weather_factor * shading_factor
 
     return SolarResult(
         elevation_deg=el_deg,
         azimuth_deg=az_deg,
         declination_deg=dec_deg,
-        incidence_deg=inc_deg,
+        incidence_deg=incidence[0],
         ghi_clear_wm2=ghi,
-        poa_clear_wm2=poa_clear,
-        expected_clear_w=max(0.0, expected_clear),
-        expected_corrected_w=max(0.0, expected_corr),
+        poa_clear_wm2=math.fsum(poa_w),
+        expected_clear_w=max(0.0, math.fsum(clear_w)),
+        expected_corrected_w=max(0.0, math.fsum(corrected_w)),
+        array_incidence_deg=incidence,
+        array_poa_wm2=poa_w,
+        array_expected_clear_w=clear_w,
+        array_expected_corrected_w=corrected_w,
         lux_factor=lux_factor,
-        array2_incidence_deg=array2_inc_deg,
-        array2_poa_clear_wm2=array2_poa_clear,
-        array2_expected_clear_w=array2_expected_clear,
-        array2_expected_corrected_w=array2_expected_corr,
         using_real_irradiance=using_real_irradiance,
-        real_ghi_wm2=inputs.real_ghi_wm2,
-        real_gti_wm2=inputs.real_gti_wm2,
+        real_ghi_wm2=real_ghi_wm2,
+        real_gti_wm2=real_gti_wm2[0] if real_gti_wm2 else None,
+        transposed=transposed,
     )
+
+
+# =====================================================================
+#  Per-site ephemeris: solar geometry table for one UTC day
+#  Sun position only depends on time for a fixed site: tabulate it once a
+#  day on a fine grid and interpolate at runtime instead of recomputing the
+#  Julian day / RA / Dec / equation of time on every tick.
+# =====================================================================
+
+class SolarEphemeris:
+    """Solar geometry lookup table for a fixed site.
+
+    The table covers one UTC day (step_s grid, both ends included) and is
+    rebuilt when a time outside that day is requested. Values are linearly
+    interpolated; at a 60 s step the error is far below the model accuracy.
+    Panel orientations are not tabulated: the sun vector is shared by every
+    array, so any number of them costs one dot product each at runtime.
+    """
+
+    def __init__(self, lat_deg: float, lon_deg: float, step_s: int = 60):
+        """Initialize the ephemeris.
+
+        Args:
+            lat_deg: Site latitude in degrees
+            lon_deg: Site longitude in degrees
+            step_s: Grid step in seconds (must divide 86400)
+        """
+        self.lat_deg = lat_deg
+        self.lon_deg = lon_deg
+        self.step_s = step_s
+        self._day_start: Optional[float] = None  # UTC epoch of the tabulated day
+        self._elevation = array("d")
+        self._azimuth = array("d")
+        self._declination = array("d")
+        self._sun_vector: tuple[array, array, array] = (array("d"), array("d"), array("d"))
+
+    def _build(self, day_start: float) -> None:
+        n = 86400 // self.step_s + 1
+        if np is not None:
+            # Vectorized build (same equations as the scalar path)
+            ts = day_start + np.arange(n, dtype=float) * self.step_s
+            el, az, dec, _ha = _sun_position_batch(ts, self.lat_deg, self.lon_deg)
+            self._elevation = array("d", el.tolist())
+            self._azimuth = array("d", az.tolist())
+            self._declination = array("d", dec.tolist())
+            self._sun_vector = tuple(array("d", c.tolist()) for c in _sun_vector_batch(el, az))
+            self._day_start = day_start
+            return
+
+        elevation, azimuth, declination = array("d"), array("d"), array("d")
+        sun_vector = (array("d"), array("d"), array("d"))
+        for i in range(n):
+            dt = datetime.fromtimestamp(day_start + i * self.step_s, timezone.utc)
+            el, az, dec, _ha = _sun_position(dt, self.lat_deg, self.lon_deg)
+            elevation.append(el)
+            azimuth.append(az)
+            declination.append(dec)
+            for col, value in zip(sun_vector, _sun_vector(el, az)):
+                col.append(value)
+        self._elevation, self._azimuth, self._declination = elevation, azimuth, declination
+        self._sun_vector = sun_vector
+        self._day_start = day_start
+
+    def geometry(self, dt_utc: datetime) -> SolarGeometry:
+        """Interpolated sun position at dt_utc."""
+        if dt_utc.tzinfo is None:
+            dt_utc = dt_utc.replace(tzinfo=timezone.utc)
+        return self.geometry_at(dt_utc.timestamp())
+
+    def geometry_at(self, ts: float) -> SolarGeometry:
+        """Interpolated sun position at a UTC epoch."""
+        day_start = ts - (ts % 86400.0)
+        if day_start != self._day_start:
+            self._build(day_start)
+
+        pos = (ts - day_start) / self.step_s
+        i = min(int(pos), len(self._elevation) - 2)
+        j = i + 1
+        frac = pos - i
+
+        el = self._elevation
+        dec = self._declination
+        # Azimuth wraps at 360° (sun crossing North)
+        az0, az1 = self._azimuth[i], self._azimuth[j]
+        if az1 - az0 > 180.0:
+            az1 -= 360.0
+        elif az0 - az1 > 180.0:
+            az1 += 360.0
+        east, north, up = self._sun_vector
+
+        return SolarGeometry(
+            elevation_deg=el[i] + (el[j] - el[i]) * frac,
+            azimuth_deg=(az0 + (az1 - az0) * frac) % 360.0,
+            declination_deg=dec[i] + (dec[j] - dec[i]) * frac,
+            sun_vector=(
+                east[i] + (east[j] - east[i]) * frac,
+                north[i] + (north[j] - north[i]) * frac,
+                up[i] + (up[j] - up[i]) * frac,
+            ),
+        )
+
+
+# =====================================================================
+#  Array list option (v0.7.7+): arrays 2..N as text, one per line
+#  "peak_w, tilt_deg, azimuth_deg[, horizon_file]" (";" also separates, "#" comments)
+# =====================================================================
+
+def parse_arrays(text: str) -> list[tuple[float, float, float, str]]:
+    """(peak_w, tilt_deg, azimuth_deg, horizon_file) per array of the option text.
+
+    Raises:
+        ValueError: malformed entry or value out of range
+    """
+    rows: list[tuple[float, float, float, str]] = []
+    for entry in (text or "").replace(";", "\n").splitlines():
+        entry = entry.split("#", 1)[0].strip()
+        if not entry:
+            continue
+        fields = [f.strip() for f in entry.split(",")]
+        if len(fields) not in (3, 4):
+            raise ValueError(f"'{entry}': expected peak_w, tilt, azimuth[, horizon_file]")
+        peak_w, tilt_deg, azimuth_deg = (float(f) for f in fields[:3])
+        if peak_w <= 0 or not 0.0 <= tilt_deg <= 90.0 or not 0.0 <= azimuth_deg <= 360.0:
+            raise ValueError(f"'{entry}': peak_w > 0, tilt 0-90 and azimuth 0-360 expected")
+        rows.append((peak_w, tilt_deg, azimuth_deg, fields[3] if len(fields) == 4 else ""))
+    return rows
+
+
+def format_arrays(rows: Sequence[tuple[float, float, float, str]]) -> str:
+    """Option text of parse_arrays() rows."""
+    return "\n".join(
+        ", ".join([f"{peak_w:g}", f"{tilt_deg:g}", f"{azimuth_deg:g}"] + ([horizon] if horizon else []))
+        for peak_w, tilt_deg, azimuth_deg, horizon in rows
+    )
+
+
+# =====================================================================
+#  Model parameters from the SPVM options (coordinator, backtest, calibration)
+# =====================================================================
+
+# ModelParams field <- SPVM option key
+MODEL_OPTION_KEYS = {
+    "lat_deg": CONF_SITE_LATITUDE,
+    "lon_deg": CONF_SITE_LONGITUDE,
+    "altitude_m": CONF_SITE_ALTITUDE,
+    "panel_tilt_deg": CONF_PANEL_TILT,
+    "panel_azimuth_deg": CONF_PANEL_AZIMUTH,
+    "panel_peak_w": CONF_PANEL_PEAK_POWER,
+    "system_efficiency": CONF_SYSTEM_EFFICIENCY,
+    "degradation_pct": CONF_DEGRADATION_PCT,
+    "cap_max_w": CONF_CAP_MAX_W,
+    "lux_min_elevation_deg": CONF_LUX_MIN_ELEVATION,
+    "lux_floor_factor": CONF_LUX_FLOOR_FACTOR,
+    "shading_winter_pct": CONF_SHADING_WINTER_PCT,
+    "shading_month_start": CONF_SHADING_MONTH_START,
+    "shading_month_end": CONF_SHADING_MONTH_END,
+}
+
+
+def array_options(options: dict) -> list[tuple[float, float, float, str]]:
+    """Arrays 2..N of SPVM options as (peak_w, tilt_deg, azimuth_deg, horizon_file).
+
+    The arrays list option wins; entries saved before it existed still use
+    the array2_* keys (no horizon file).
+
+    Raises:
+        ValueError: invalid arrays list
+    """
+    if options.get(CONF_ARRAYS) is not None:
+        return parse_arrays(options[CONF_ARRAYS])
+    peak_w = float(options.get(CONF_ARRAY2_PEAK_POWER) or 0.0)
+    if peak_w <= 0:
+        return []
+    return [(
+        peak_w,
+        float(options.get(CONF_ARRAY2_TILT, DEF_ARRAY2_TILT)),
+        float(options.get(CONF_ARRAY2_AZIMUTH, DEF_ARRAY2_AZIMUTH)),
+        "",
+    )]
+
+
+@dataclass
+class ModelParams:
+    """Solar model parameters of one installation (same meaning as the SPVM options)."""
+
+    lat_deg: float
+    lon_deg: float
+    altitude_m: float = 0.0
+    panel_tilt_deg: float = 30.0
+    panel_azimuth_deg: float = 180.0
+    panel_peak_w: float = 2800.0
+    system_efficiency: float = 0.85
+    degradation_pct: float = 0.0
+    cap_max_w: float = math.inf
+    lux_min_elevation_deg: float = 5.0
+    lux_floor_factor: float = 0.1
+    shading_winter_pct: float = 0.0
+    shading_month_start: int = 11
+    shading_month_end: int = 2
+    shading_mask: Optional[ShadingMask] = None         # Replaces the seasonal shading (array 1)
+    extra_arrays: tuple[ArraySpec, ...] = ()           # Arrays 2..N, each with its own mask
+
+    @classmethod
+    def from_options(cls, options: dict, **overrides: Any) -> ModelParams:
+        """Build from SPVM options (config entry data + options), then apply overrides."""
+        values: dict[str, Any] = {}
+        for name, key in MODEL_OPTION_KEYS.items():
+            if options.get(key) is not None:
+                values[name] = options[key]
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        if "lat_deg" not in values or "lon_deg" not in values:
+            raise ValueError("site latitude / longitude are required")
+        types = {f.name: f.type for f in fields(cls)}
+        return cls(
+            **{k: int(v) if types[k] == "int" else float(v) for k, v in values.items()},
+            extra_arrays=tuple(
+                ArraySpec(peak_w, tilt_deg, azimuth_deg)
+                for peak_w, tilt_deg, azimuth_deg, _horizon in array_options(options)
+            ),
+        )
+
+    @property
+    def arrays(self) -> tuple[ArraySpec, ...]:
+        """Every panel array, array 1 first."""
+        main = ArraySpec(self.panel_peak_w, self.panel_tilt_deg, self.panel_azimuth_deg, self.shading_mask)
+        return (main, *self.extra_arrays)
+
+    @property
+    def peak_w(self) -> float:
+        """Installed peak power of all arrays (W)."""
+        return self.panel_peak_w + sum(spec.peak_w for spec in self.extra_arrays)
+
+    def with_shading_mask(self, mask: Optional[ShadingMask]) -> ModelParams:
+        """Copy with the same shading mask on every array (None = seasonal shading)."""
+        return replace(
+            self,
+            shading_mask=mask,
+            extra_arrays=tuple(replace(spec, shading_mask=mask) for spec in self.extra_arrays),
+        )
+
+    def batch_kwargs(self) -> dict[str, Any]:
+        """compute_batch() keyword arguments (degradation and cap are applied afterwards)."""
+        array_fields = ("panel_tilt_deg", "panel_azimuth_deg", "panel_peak_w", "shading_mask", "extra_arrays")
+        kwargs = {
+            f.name: getattr(self, f.name) for f in fields(self)
+            if f.name not in ("degradation_pct", "cap_max_w") + array_fields
+        }
+        kwargs["arrays"] = self.arrays
+        return kwargs
+
+
+# =====================================================================
+#  Prepared site model: site / panel constants bound once per coordinator,
+#  so a tick only passes the time and the weather inputs (no SolarInputs).
+# =====================================================================
+
+@dataclass(slots=True)
+class SolarSite:
+    """Site, arrays and correction settings for repeated compute() calls.
+
+    Field names and defaults match SolarInputs, so both share the same model
+    code. Owns the SolarEphemeris of the site; build a new instance when the
+    configuration changes (array shading masks may be swapped in place).
+    """
+
+    lat_deg: float
+    lon_deg: float
+    altitude_m: float = 0.0
+
+    arrays: Sequence[ArraySpec] = ()
+    system_efficiency: float = 0.85
+
+    lux_min_elevation_deg: float = 5.0
+    lux_floor_factor: float = 0.1
+
+    shading_winter_pct: float = 0.0
+    shading_month_start: int = 11
+    shading_month_end: int = 2
+
+    albedo: float = GROUND_ALBEDO
+
+    ephemeris: SolarEphemeris = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if not self.arrays:
+            raise ValueError("SPVM solar model needs at least one panel array")
+        self.ephemeris = SolarEphemeris(self.lat_deg, self.lon_deg)
+
+    @property
+    def peak_w(self) -> float:
+        """Installed peak power of all arrays (W)."""
+        return math.fsum(spec.peak_w for spec in self.arrays)
+
+    def compute(
+        self,
+        dt_utc: datetime,
+        cloud_pct: Optional[float] = None,
+        temp_c: Optional[float] = None,
+        lux: Optional[float] = None,
+        real_ghi_wm2: Optional[float] = None,
+        real_gti_wm2: Optional[Sequence[Optional[float]]] = None,
+        real_dni_wm2: Optional[float] = None,
+        real_dhi_wm2: Optional[float] = None,
+    ) -> SolarResult:
+        """compute() at dt_utc (aware UTC) with the ephemeris geometry."""
+        return _evaluate(
+            self, dt_utc, self.ephemeris.geometry(dt_utc), cloud_pct, temp_c, lux,
+            real_ghi_wm2, real_gti_wm2, real_dni_wm2, real_dhi_wm2,
+        )
+
+
+# =====================================================================
+#  Batch engine (NumPy) - same model as compute(), struct-of-arrays
+#  Used for backtests / yield audits over long histories and forecasts.
+# =====================================================================
+
+@dataclass
+class SolarBatchResult:
+    """Struct-of-arrays counterpart of SolarResult (one entry per timestamp).
+
+    Optional per-sample values are NaN where compute() would return None.
+    Per-array fields are 2-D: one row per array (input order), one column
+    per timestamp.
+    """
+
+    timestamps: np.ndarray                # UTC epoch seconds
+    elevation_deg: np.ndarray
+    azimuth_deg: np.ndarray
+    declination_deg: np.ndarray
+    incidence_deg: np.ndarray             # Array 1
+    ghi_clear_wm2: np.ndarray
+    poa_clear_wm2: np.ndarray
+    expected_clear_w: np.ndarray
+    expected_corrected_w: np.ndarray
+    lux_factor: np.ndarray
+    using_real_irradiance: np.ndarray     # bool
+    transposed: np.ndarray                # bool, Perez transposition used for at least one array
+    array_incidence_deg: np.ndarray
+    array_poa_wm2: np.ndarray
+    array_expected_clear_w: np.ndarray
+    array_expected_corrected_w: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.timestamps.shape[0])
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("SPVM batch solar model requires NumPy")
+
+
+def _epoch_seconds(timestamps) -> np.ndarray:
+    # Accept epoch seconds, datetime64 or (aware/naive UTC) datetime sequences
+    arr = np.asarray(timestamps)
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.astype("datetime64[ns]").astype(np.int64) / 1e9
+    if arr.dtype == object:
+        out = np.empty(arr.shape[0], dtype=float)
+        for i, dt in enumerate(arr):
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            out[i] = dt.timestamp()
+        return out
+    return arr.astype(float)
+
+
+def _column(values, n: int) -> np.ndarray:
+    # Optional per-sample input -> float array, NaN where missing (None)
+    if values is None:
+        return np.full(n, np.nan)
+    arr = np.asarray(values, dtype=float)
+    if arr.ndim == 0:
+        return np.full(n, float(arr))
+    if arr.shape[0] != n:
+        raise ValueError(f"SPVM batch input has {arr.shape[0]} samples, expected {n}")
+    return arr
+
+
+def _sun_position_batch(epoch_s: np.ndarray, lat_deg: float, lon_deg: float):
+    # Vectorized _sun_position(); epoch -> Julian day is exact for the Gregorian calendar
+    n = epoch_s / 86400.0 + 2440587.5 - 2451545.0
+    g = np.radians(np.mod(357.529 + 0.98560028 * n, 360.0))
+    q = np.mod(280.459 + 0.98564736 * n, 360.0)
+    L = np.radians(np.mod(q + 1.915 * np.sin(g) + 0.020 * np.sin(2 * g), 360.0))
+    e = np.radians(23.439 - 0.00000036 * n)
+    sin_L = np.sin(L)
+    RA = np.arctan2(np.cos(e) * sin_L, np.cos(L))
+    dec = np.arcsin(np.sin(e) * sin_L)
+
+    EoT = 4 * (q - np.degrees(RA))
+    utc_minutes = np.mod(epoch_s, 86400.0) / 60.0
+    tst = np.mod(utc_minutes + EoT + 4 * lon_deg, 1440.0)
+    ha_deg = (tst / 4.0) - 180.0
+    ha = np.radians(ha_deg)
+
+    lat = math.radians(lat_deg)
+    sin_dec = np.sin(dec)
+    sin_el = np.clip(math.sin(lat) * sin_dec + math.cos(lat) * np.cos(dec) * np.cos(ha), -1.0, 1.0)
+    el = np.arcsin(sin_el)
+
+    cos_az = (sin_dec - sin_el * math.sin(lat)) / (np.cos(el) * math.cos(lat) + 1e-9)
+    az = np.arccos(np.clip(cos_az, -1.0, 1.0))
+    az = np.where(np.sin(ha) > 0, 2 * math.pi - az, az)
+
+    return np.degrees(el), np.degrees(az), np.degrees(dec), ha_deg
+
+
+def _sun_vector_batch(elev_deg, az_deg) -> np.ndarray:
+    # Vectorized _sun_vector(): shape (3, n), rows East, North, Up
+    elev = np.radians(elev_deg)
+    az = np.radians(az_deg)
+    cos_el = np.cos(elev)
+    return np.stack((cos_el * np.sin(az), cos_el * np.cos(az), np.sin(elev)))
+
+
+def _clear_sky_ghi_batch(elev_deg: np.ndarray, altitude_m: float) -> np.ndarray:
+    el = np.maximum(elev_deg, 0.0)
+    day = el > 0.0
+    el_safe = np.where(day, el, 90.0)
+    am = 1.0 / (np.cos(np.radians(90.0 - el_safe)) + 0.50572 * (96.07995 - (90.0 - el_safe)) ** -1.6364)
+    tau = 0.75 + 2e-5 * altitude_m
+    ghi = SOLAR_CONSTANT * (tau ** am) * np.sin(np.radians(el_safe))
+    return np.where(day, np.maximum(ghi, 0.0), 0.0)
+
+
+def _project_ghi_batch(ghi, cos_i, elev_deg) -> np.ndarray:
+    # GHI -> POA ratio projection, as in compute()
+    sin_el = np.maximum(1e-6, np.sin(np.radians(elev_deg)))
+    return np.where(elev_deg > 0, ghi * (cos_i / sin_el), 0.0)
+
+
+def _perez_sky_batch(elev_deg, dni, dhi, epoch_s) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Vectorized _perez_sky(); F1 = F2 = 0 where the sun is down or DHI is 0
+    day = (elev_deg > 0) & (dhi > 0)
+    zenith = np.radians(90.0 - np.where(day, elev_deg, 90.0))
+    inv_b = 1.0 / np.maximum(_PEREZ_MIN_COS_ZENITH, np.cos(zenith))
+    kz3 = _PEREZ_KAPPA * zenith ** 3
+    dhi_safe = np.where(day, dhi, 1.0)
+    epsilon = ((dhi_safe + dni) / dhi_safe + kz3) / (1.0 + kz3)
+    el_safe = np.where(day, elev_deg, 90.0)
+    am = 1.0 / (np.cos(np.radians(90.0 - el_safe)) + 0.50572 * (96.07995 - (90.0 - el_safe)) ** -1.6364)
+    seconds = np.floor(epoch_s).astype("datetime64[s]")
+    day_of_year = (seconds.astype("datetime64[D]") - seconds.astype("datetime64[Y]")).astype(np.int64) + 1
+    g0n = SOLAR_CONSTANT * (1.0 + 0.033 * np.cos(2.0 * math.pi * (day_of_year - 1) / 365.0))
+    delta = dhi_safe * am / g0n
+    f = np.array(PEREZ_COEFFICIENTS)[np.searchsorted(PEREZ_EPSILON_BINS, epsilon, side="left")].T
+    f1 = np.where(day, np.maximum(0.0, f[0] + f[1] * delta + f[2] * zenith), 0.0)
+    f2 = np.where(day, f[3] + f[4] * delta + f[5] * zenith, 0.0)
+    return f1, f2, inv_b
+
+
+def _months_utc(epoch_s: np.ndarray) -> np.ndarray:
+    months = np.floor(epoch_s).astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+    return months % 12 + 1
+
+
+def compute_batch(
+    timestamps,
+    lat_deg: float,
+    lon_deg: float,
+    arrays: Sequence[ArraySpec],
+    altitude_m: float = 0.0,
+    system_efficiency: float = 0.85,
+    cloud_pct=None,
+    temp_c=None,
+    lux=None,
+    lux_min_elevation_deg: float = 5.0,
+    lux_floor_factor: float = 0.1,
+    shading_winter_pct: float = 0.0,
+    shading_month_start: int = 11,
+    shading_month_end: int = 2,
+    real_ghi_wm2=None,
+    real_gti_wm2: Optional[Sequence] = None,
+    real_dni_wm2=None,
+    real_dhi_wm2=None,
+    albedo: float = GROUND_ALBEDO,
+) -> SolarBatchResult:
+    """Evaluate the solar model for many timestamps in one vectorized pass.
+
+    Args:
+        timestamps: UTC instants (epoch seconds, numpy datetime64 or datetimes)
+        arrays: Panel groups (at least one); their shading masks are applied
+        cloud_pct, temp_c, lux, real_ghi_wm2, real_dni_wm2, real_dhi_wm2:
+            Optional per-sample arrays (same length as timestamps) or scalars.
+            NaN / None entries mean "not available", like None in SolarInputs.
+        real_gti_wm2: One entry per array (per-sample array, scalar or None)
+        Other arguments: same meaning and defaults as the SolarInputs fields.
+
+    Returns:
+        SolarBatchResult matching compute() sample by sample (float tolerance).
+    """
+    _require_numpy()
+    if not arrays:
+        raise ValueError("SPVM solar model needs at least one panel array")
+    # Sub-second resolution is dropped, as in the scalar path
+    ts = np.floor(_epoch_seconds(timestamps))
+    n = ts.shape[0]
+    k = len(arrays)
+
+    cloud = _column(cloud_pct, n)
+    temp = _column(temp_c, n)
+    lux_arr = _column(lux, n)
+    real_ghi = _column(real_ghi_wm2, n)
+    real_dni = _column(real_dni_wm2, n)
+    real_dhi = _column(real_dhi_wm2, n)
+    real_gti = np.full((k, n), np.nan)
+    for i, values in enumerate((real_gti_wm2 or ())[:k]):
+        real_gti[i] = _column(values, n)
+
+    el_deg, az_deg, dec_deg, _ha = _sun_position_batch(ts, lat_deg, lon_deg)
+
+    # --- Irradiance source per sample: Open-Meteo real data or clear-sky model ---
+    using_real = ~np.isnan(real_ghi)
+    ghi = np.where(using_real, real_ghi, _clear_sky_ghi_batch(el_deg, altitude_m))
+
+    # --- Arrays: panel normals (k, 3) times the shared sun vector (3, n) ---
+    normals = np.array([spec.normal for spec in arrays])
+    cos_i = np.clip(normals @ _sun_vector_batch(el_deg, az_deg), 0.0, 1.0)
+    array_inc = np.degrees(np.arccos(cos_i))
+    poa = _project_ghi_batch(ghi, cos_i, el_deg)
+    # Real DNI / DHI: Perez transposition where there is no real GTI
+    transpose = using_real & ~np.isnan(real_dni) & ~np.isnan(real_dhi) & (el_deg > 0)
+    if transpose.any():
+        dni = np.maximum(0.0, np.nan_to_num(real_dni))
+        dhi = np.maximum(0.0, np.nan_to_num(real_dhi))
+        f1, f2, inv_b = _perez_sky_batch(el_deg, dni, dhi, ts)
+        sky_view = np.array([spec.sky_view for spec in arrays])[:, None]
+        ground_view = np.array([spec.ground_view for spec in arrays])[:, None]
+        sin_tilt = np.array([spec.sin_tilt for spec in arrays])[:, None]
+        perez = (
+            dni * cos_i
+            + dhi * ((1.0 - f1) * sky_view + f1 * cos_i * inv_b + f2 * sin_tilt)
+            + np.maximum(0.0, ghi) * albedo * ground_view
+        )
+        poa = np.where(transpose, perez, poa)
+    has_gti = ~np.isnan(real_gti)
+    poa = np.where(using_real & has_gti, real_gti, poa)
+    array_poa = np.maximum(0.0, poa)
+    peak_kw = np.array([spec.peak_w for spec in arrays])[:, None] / 1000.0
+    array_clear = array_poa * system_efficiency * peak_kw
+
+    # --- Corrections ---
+    c = np.clip(np.nan_to_num(cloud, nan=0.0) / 100.0, 0.0, 1.0)
+    cloud_factor = np.where(np.isnan(cloud), 1.0, np.maximum(0.0, 1.0 - 0.75 * c ** 3))
+
+    delta = np.nan_to_num(temp, nan=0.0) - 25.0
+    temp_factor = np.where(delta <= 0, 1.0, np.maximum(0.5, 1.0 - 0.005 * delta))
+
+    if shading_winter_pct > 0:
+        months = _months_utc(ts)
+        if shading_month_start <= shading_month_end:
+            in_period = (months >= shading_month_start) & (months <= shading_month_end)
+        else:
+            in_period = (months >= shading_month_start) | (months <= shading_month_end)
+        seasonal_factor = np.where(in_period, max(0.0, 1.0 - shading_winter_pct / 100.0), 1.0)
+    else:
+        seasonal_factor = np.ones(n)
+    # A shading mask replaces the seasonal shading for its array
+    shading_factor = np.stack([
+        spec.shading_mask.factor_batch(az_deg, el_deg) if spec.shading_mask is not None else seasonal_factor
+        for spec in arrays
+    ])
+
+    theoretical_lux = 80000.0 * np.sin(np.radians(el_deg))
+    lux_ok = ~np.isnan(lux_arr) & (el_deg > lux_min_elevation_deg) & (theoretical_lux >= 100.0)
+    ratio = np.divide(lux_arr, theoretical_lux, out=np.zeros(n), where=lux_ok)
+    lux_factor = np.where(lux_ok, np.maximum(lux_floor_factor, np.minimum(1.0, ratio)), np.nan)
+    # Lux correction only applies to the clear-sky model
+    lux_factor = np.where(using_real, np.nan, lux_factor)
+    lux_applied = ~np.isnan(lux_factor)
+
+    weather_factor = np.where(
+        using_real, 1.0, np.where(lux_applied, np.nan_to_num(lux_factor), cloud_factor)
+    )
+    weather_temp = weather_factor * temp_factor
+    array_corr = array_clear * weather_temp * shading_factor
+
+    return SolarBatchResult(
+        timestamps=ts,
+        elevation_deg=el_deg,
+        azimuth_deg=az_deg,
+        declination_deg=dec_deg,
+        incidence_deg=array_inc[0],
+        ghi_clear_wm2=ghi,
+        poa_clear_wm2=array_poa.sum(axis=0),
+        expected_clear_w=np.maximum(0.0, array_clear.sum(axis=0)),
+        expected_corrected_w=np.maximum(0.0, array_corr.sum(axis=0)),
+        lux_factor=lux_factor,
+        using_real_irradiance=using_real,
+        transposed=transpose & ~has_gti.all(axis=0),
+        array_incidence_deg=array_inc,
+        array_poa_wm2=array_poa,
+        array_expected_clear_w=array_clear,
+        array_expected_corrected_w=array_corr,
+    )
+
+
+def local_seconds(ts: np.ndarray, tz: Optional[tzinfo]) -> np.ndarray:
+    """UTC epoch seconds shifted to local wall-clock time; the offset is looked up once per hour."""
+    if tz is None:
+        return ts
+    hours = np.floor(ts / 3600.0)
+    uniq, inverse = np.unique(hours, return_inverse=True)
+    offsets = np.array([
+        datetime.fromtimestamp(h * 3600.0, tz).utcoffset().total_seconds() for h in uniq
+    ])
+    return ts + offsets[inverse]
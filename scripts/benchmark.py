@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+SPVM benchmarks - time the solar model and the coordinator hot path offline.
+
+Each case reports:
+    ns/call     best of several timeit repeats
+    peak B      peak memory allocated during one call (tracemalloc)
+    blocks      memory blocks still held per call afterwards (caches, leaks)
+
+CPython has no allocation counter, so allocations are measured as the peak
+bytes of one call plus the blocks it leaves behind; both move when a change
+adds temporaries or starts retaining objects.
+
+The coordinator cases run a real Home Assistant core (states set to fixed
+values, temporary config dir) against a local fake Open-Meteo server serving
+a 7-day response; the site longitude is chosen so that the sun is up now.
+
+Usage (from the repository root):
+    python3 scripts/benchmark.py                      # run everything
+    python3 scripts/benchmark.py -k compute           # cases whose name contains "compute"
+    python3 scripts/benchmark.py --save baseline.json
+    python3 scripts/benchmark.py --compare baseline.json --threshold 15
+
+With --compare, cases slower (or allocating more) than the baseline by more
+than the threshold are flagged and the exit code is 1.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import math
+import os
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional, Sequence
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Model modules are imported standalone (no Home Assistant needed), the
+# coordinator through the package
+sys.path.insert(0, os.path.join(ROOT, "custom_components", "spvm"))
+sys.path.insert(0, ROOT)
+
+import solar_model  # noqa: E402
+from const import (  # noqa: E402
+    CONF_ARRAY2_AZIMUTH, CONF_ARRAY2_PEAK_POWER, CONF_ARRAY2_TILT, CONF_FORECAST_HOURS,
+    CONF_GRID_POWER_SENSOR, CONF_HOUSE_SENSOR, CONF_LUX_SENSOR, CONF_PV_SENSOR,
+    CONF_SITE_LATITUDE, CONF_SITE_LONGITUDE, CONF_TEMP_SENSOR, CONF_USE_OPEN_METEO,
+)
+from solar_model import ArraySpec, SolarInputs, SolarSite, compute  # noqa: E402
+
+SITE_LAT = 45.0
+SITE_ALT = 300.0
+FORECAST_DAYS = 8  # today + 7 days, as requested with forecast_hours=168
+
+# Blocks (or peak bytes) below this are noise, not a regression
+ALLOC_NOISE_BLOCKS = 2
+ALLOC_NOISE_BYTES = 256
+
+# Updates run before measuring, so the bounded trace / profiler windows are full
+WARMUP_UPDATES = 300
+
+
+@dataclass
+class BenchResult:
+    name: str
+    ns_per_call: float
+    peak_bytes: int
+    blocks_per_call: float
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "ns_per_call": round(self.ns_per_call, 1),
+            "peak_bytes": self.peak_bytes,
+            "blocks_per_call": round(self.blocks_per_call, 2),
+        }
+
+
+def _noon_longitude(now: datetime) -> float:
+    """Longitude where it is about solar noon now (so the day-time path is measured)."""
+    hours = now.hour + now.minute / 60.0
+    lon = ((12.0 - hours) * 15.0 + 180.0) % 360.0 - 180.0
+    return lon if abs(lon) > 0.01 else 0.5  # 0.0 means "unset" for the coordinator
+
+
+def _time_call(fn: Callable[[], Any], repeat: int) -> float:
+    """Best ns per call over `repeat` timeit runs."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def _traced_blocks() -> int:
+    gc.collect()
+    return sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+
+
+def _alloc_call(fn: Callable[[], Any], warmup: int = 3, calls: int = 50) -> tuple[int, float]:
+    """(peak bytes of one call, blocks retained per call over `calls` calls).
+
+    Tracing starts before the warm-up: objects replaced later (bounded
+    windows, caches) must be traced to be seen as freed.
+    """
+    tracemalloc.start()
+    try:
+        for _ in range(warmup):
+            fn()
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        before = _traced_blocks()
+        for _ in range(calls):
+            fn()
+        after = _traced_blocks()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - base), (after - before) / calls
+
+
+def run_cases(cases: Sequence[tuple[str, Callable[[], Any]]], selected: Callable[[str], bool],
+              repeat: int) -> list[BenchResult]:
+    results = []
+    for name, fn in cases:
+        if selected(name):
+            peak_bytes, blocks = _alloc_call(fn)
+            results.append(BenchResult(name, _time_call(fn, repeat), peak_bytes, blocks))
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Fake Open-Meteo data
+# ---------------------------------------------------------------------------
+
+def fake_open_meteo_response(lat: float, lon: float, start: datetime, days: int) -> dict:
+    """Hourly response in the shape the integration requests (unixtime, UTC)."""
+    times, ghi, dni, dhi, gti, cloud, temp = [], [], [], [], [], [], []
+    for h in range(days * 24):
+        t = start + timedelta(hours=h)
+        # Open-Meteo radiation is the mean over the preceding hour
+        clear = solar_model.clear_sky_ghi_at(t - timedelta(minutes=30), lat, lon, SITE_ALT)
+        cover = 20.0 + 60.0 * (0.5 + 0.5 * math.sin(h / 7.0))
+        factor = 1.0 - 0.75 * (cover / 100.0) ** 3.4
+        times.append(int(t.timestamp()))
+        ghi.append(round(clear * factor, 1))
+        dhi.append(round(clear * (1.0 - factor * 0.8) * 0.3, 1))
+        dni.append(round(clear * factor * 1.2, 1))
+        gti.append(round(clear * factor * 1.15, 1))
+        cloud.append(round(cover))
+        temp.append(round(12.0 + 8.0 * math.sin((h % 24 - 9) / 24.0 * 2.0 * math.pi), 1))
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "utc_offset_seconds": 0,
+        "hourly": {
+            "time": times,
+            "shortwave_radiation": ghi,
+            "direct_normal_irradiance": dni,
+            "diffuse_radiation": dhi,
+            "cloud_cover": cloud,
+            "temperature_2m": temp,
+            "global_tilted_irradiance": gti,
+        },
+    }
+
+
+# ---------------------------------------------------------------------------
+# Cases
+# ---------------------------------------------------------------------------
+
+def model_cases(lon: float, now: datetime) -> list[tuple[str, Callable[[], Any]]]:
+    elev, az, _decl, _ha = solar_model._sun_position(now, SITE_LAT, lon)
+    main = ArraySpec(3000.0, 30.0, 180.0)
+    dual_arrays = [main, ArraySpec(1500.0, 10.0, 250.0)]
+    # East/west roof, south garage, pergola, east and west walls
+    six_arrays = [
+        ArraySpec(1800.0, 35.0, 90.0), ArraySpec(1800.0, 35.0, 270.0), ArraySpec(1200.0, 20.0, 180.0),
+        ArraySpec(900.0, 10.0, 200.0), ArraySpec(600.0, 90.0, 100.0), ArraySpec(600.0, 90.0, 260.0),
+    ]
+    single = SolarInputs(
+        dt_utc=now, lat_deg=SITE_LAT, lon_deg=lon, altitude_m=SITE_ALT,
+        arrays=[main], cloud_pct=35.0, temp_c=18.0,
+    )
+    dual = SolarInputs(
+        dt_utc=now, lat_deg=SITE_LAT, lon_deg=lon, altitude_m=SITE_ALT,
+        arrays=dual_arrays, cloud_pct=35.0, temp_c=18.0,
+    )
+    real = SolarInputs(
+        dt_utc=now, lat_deg=SITE_LAT, lon_deg=lon, altitude_m=SITE_ALT,
+        arrays=dual_arrays, temp_c=18.0,
+        real_ghi_wm2=520.0, real_gti_wm2=(610.0, 540.0),
+    )
+    site = SolarSite(SITE_LAT, lon, SITE_ALT, arrays=dual_arrays)
+    site6 = SolarSite(SITE_LAT, lon, SITE_ALT, arrays=six_arrays)
+    return [
+        ("_sun_position", lambda: solar_model._sun_position(now, SITE_LAT, lon)),
+        ("_incidence_angle", lambda: solar_model._incidence_angle(elev, az, 30.0, 180.0)),
+        ("compute (single array)", lambda: compute(single)),
+        ("compute (dual array)", lambda: compute(dual)),
+        ("compute (dual array, real GTI)", lambda: compute(real)),
+        ("SolarSite.compute (dual array)", lambda: site.compute(now, cloud_pct=35.0, temp_c=18.0)),
+        ("SolarSite.compute (6 arrays)", lambda: site6.compute(now, cloud_pct=35.0, temp_c=18.0)),
+        ("SolarSite.compute (6 arrays, Perez DNI/DHI)", lambda: site6.compute(
+            now, temp_c=18.0, real_ghi_wm2=520.0, real_gti_wm2=(610.0,), real_dni_wm2=640.0, real_dhi_wm2=150.0,
+        )),
+    ]
+
+
+def open_meteo_cases(response: dict, lon: float) -> list[tuple[str, Callable[[], Any]]]:
+    from open_meteo import IrradianceSeries, OpenMeteoClient
+
+    client = OpenMeteoClient(
+        SITE_LAT, lon, forecast_hours=168,
+        clear_sky=lambda ts: solar_model.clear_sky_ghi_at(
+            datetime.fromtimestamp(ts, timezone.utc), SITE_LAT, lon, SITE_ALT
+        ),
+    )
+    client._series = IrradianceSeries.from_response(response)
+    return [
+        ("open_meteo parse (7-day response)", lambda: IrradianceSeries.from_response(response)),
+        ("open_meteo sample current (cached)", client._sample_current),
+    ]
+
+
+async def _start_fake_server(response: dict):
+    """Local HTTP server answering every Open-Meteo request with `response`."""
+    from aiohttp import web
+
+    async def handler(_request: web.Request) -> web.Response:
+        return web.json_response(response)
+
+    app = web.Application()
+    app.router.add_get("/v1/forecast", handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v1/forecast"
+
+
+async def _time_async(fn: Callable[[], Any], repeat: int, number: int) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        for _ in range(number):
+            await fn()
+        best = min(best, timeit.default_timer() - start)
+    return best / number * 1e9
+
+
+async def _alloc_async(fn: Callable[[], Any], calls: int = 20) -> tuple[int, float]:
+    """_alloc_call() for a coroutine function."""
+    tracemalloc.start()
+    try:
+        for _ in range(WARMUP_UPDATES):
+            await fn()
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        await fn()
+        _, peak = tracemalloc.get_traced_memory()
+        before = _traced_blocks()
+        for _ in range(calls):
+            await fn()
+        after = _traced_blocks()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - base), (after - before) / calls
+
+
+async def coordinator_cases(
+    response: dict, lon: float, selected: Callable[[str], bool], repeat: int
+) -> list[BenchResult]:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+
+    from custom_components.spvm import open_meteo
+    from custom_components.spvm.coordinator import SPVMCoordinator
+
+    runner, url = await _start_fake_server(response)
+    open_meteo.API_URL = url
+    open_meteo.DAILY_CALL_BUDGET = sys.maxsize  # Refresh cases download on every call
+    results: list[BenchResult] = []
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.config.latitude, hass.config.longitude, hass.config.elevation = SITE_LAT, lon, SITE_ALT
+        for entity_id, value in (
+            ("sensor.pv", "1850"), ("sensor.house", "620"), ("sensor.grid", "-1100"),
+            ("sensor.lux", "52000"), ("sensor.temp", "18.5"),
+        ):
+            hass.states.async_set(entity_id, value)
+
+        def make(name: str, options: dict) -> SPVMCoordinator:
+            entry = ConfigEntry(
+                version=1, minor_version=1, domain="spvm", title=name, source="user",
+                data={
+                    CONF_PV_SENSOR: "sensor.pv", CONF_HOUSE_SENSOR: "sensor.house",
+                    CONF_GRID_POWER_SENSOR: "sensor.grid", CONF_LUX_SENSOR: "sensor.lux",
+                    CONF_TEMP_SENSOR: "sensor.temp",
+                },
+                options={CONF_SITE_LATITUDE: SITE_LAT, CONF_SITE_LONGITUDE: lon, **options},
+            )
+            return SPVMCoordinator(hass, entry)
+
+        clear_sky = make("clear sky", {CONF_USE_OPEN_METEO: False})
+        single = make("open-meteo", {CONF_USE_OPEN_METEO: True, CONF_FORECAST_HOURS: 48})
+        dual = make("open-meteo dual", {
+            CONF_USE_OPEN_METEO: True, CONF_FORECAST_HOURS: 48,
+            CONF_ARRAY2_PEAK_POWER: 1500, CONF_ARRAY2_TILT: 10, CONF_ARRAY2_AZIMUTH: 250,
+        })
+
+        def expire(coordinator: SPVMCoordinator) -> None:
+            # Expire both cache levels so the next refresh downloads and parses again
+            coordinator._open_meteo_client._cache_expires = None
+            coordinator._open_meteo_client._fetcher._cache.clear()
+
+        def stale(coordinator: SPVMCoordinator) -> Callable[[], Any]:
+            async def run() -> Any:
+                # The update serves the stale series and only starts the refresh
+                expire(coordinator)
+                return await coordinator._async_update_data()
+            return run
+
+        def refresh(coordinator: SPVMCoordinator) -> Callable[[], Any]:
+            client = coordinator._open_meteo_client
+
+            async def run() -> Any:
+                expire(coordinator)
+                await client._async_background_refresh(coordinator.forecast_hours)
+                return coordinator._update_forecast()
+            return run
+
+        # Updates never wait for the network: download the first series up front
+        for coordinator in (single, dual):
+            await coordinator._open_meteo_client._async_background_refresh(coordinator.forecast_hours)
+
+        # Back-to-back updates keep every smoothing segment (time window), so
+        # update cases retain a few blocks per call by design
+        cases = [
+            ("update (clear-sky model)", clear_sky._async_update_data, 200),
+            ("update (open-meteo cached)", single._async_update_data, 200),
+            ("update (open-meteo cached, dual)", dual._async_update_data, 200),
+            ("update (open-meteo stale, background refresh)", stale(single), 200),
+            ("open-meteo refresh (fetch + forecast)", refresh(single), 20),
+            ("open-meteo refresh (fetch + forecast, dual)", refresh(dual), 20),
+        ]
+        try:
+            for name, fn, number in cases:
+                if not selected(name):
+                    continue
+                data = await fn()
+                if name.startswith("update (open-meteo") and data.attrs.get("irradiance_source") != "open_meteo":
+                    print(f"warning: {name}: Open-Meteo data not used", file=sys.stderr)
+                peak_bytes, blocks = await _alloc_async(fn)
+                ns_per_call = await _time_async(fn, repeat, number)
+                results.append(BenchResult(name, ns_per_call, peak_bytes, blocks))
+        finally:
+            await runner.cleanup()
+            await hass.async_stop(force=True)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def _format_ns(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} µs"
+    return f"{ns:.0f} ns"
+
+
+def _regressed(new: float, old: float, threshold_pct: float, noise: float) -> bool:
+    return new - old > noise and new > old * (1.0 + threshold_pct / 100.0)
+
+
+def report(results: Sequence[BenchResult], baseline: Optional[dict], threshold_pct: float) -> int:
+    """Print the results table; return the number of regressions against the baseline."""
+    width = max(len(r.name) for r in results)
+    header = f"{'case':<{width}}  {'time/call':>10}  {'peak B':>9}  {'blocks':>7}"
+    if baseline is not None:
+        header += f"  {'Δ time':>8}"
+    print(header)
+    print("-" * len(header))
+    regressions = 0
+    for r in results:
+        blocks = round(r.blocks_per_call, 1) + 0.0  # no "-0.0"
+        line = f"{r.name:<{width}}  {_format_ns(r.ns_per_call):>10}  {r.peak_bytes:>9}  {blocks:>7.1f}"
+        old = (baseline or {}).get(r.name)
+        if old is not None:
+            delta = (r.ns_per_call / old["ns_per_call"] - 1.0) * 100.0 if old["ns_per_call"] else 0.0
+            line += f"  {delta:>+7.1f}%"
+            flags = []
+            if _regressed(r.ns_per_call, old["ns_per_call"], threshold_pct, 0.0):
+                flags.append("SLOWER")
+            more_bytes = _regressed(r.peak_bytes, old["peak_bytes"], threshold_pct, ALLOC_NOISE_BYTES)
+            more_blocks = _regressed(
+                r.blocks_per_call, old["blocks_per_call"], threshold_pct, ALLOC_NOISE_BLOCKS
+            )
+            if more_bytes or more_blocks:
+                flags.append("MORE ALLOCS")
+            if flags:
+                regressions += 1
+                line += "  " + ", ".join(flags)
+        print(line)
+    return regressions
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the SPVM solar model and coordinator hot path")
+    parser.add_argument("-k", "--filter", default="", help="only cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="timeit repeats (best is kept)")
+    parser.add_argument("--save", metavar="JSON", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="JSON", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=15.0, help="regression threshold (%%)")
+    parser.add_argument("--no-coordinator", action="store_true", help="skip the Home Assistant cases")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _build_parser().parse_args(argv)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    lon = _noon_longitude(now)
+    response = fake_open_meteo_response(
+        SITE_LAT, lon, now.replace(hour=0, minute=0, second=0), FORECAST_DAYS
+    )
+
+
+    def selected(name: str) -> bool:
+        return args.filter.lower() in name.lower()
+
+    results = run_cases(model_cases(lon, now) + open_meteo_cases(response, lon), selected, args.repeat)
+    if not args.no_coordinator:
+        try:
+            import homeassistant  # noqa: F401
+        except ImportError:
+            print("homeassistant not installed: coordinator cases skipped", file=sys.stderr)
+        else:
+            results += asyncio.run(coordinator_cases(response, lon, selected, args.repeat))
+    if not results:
+        print("no case matches the filter", file=sys.stderr)
+        return 2
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    regressions = report(results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "date": now.isoformat(),
+                "results": {r.name: r.to_dict() for r in results},
+            }, f, indent=2)
+    if regressions:
+        print(f"\n{regressions} regression(s) above {args.threshold:.0f} %", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
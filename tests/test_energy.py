@@ -0,0 +1,71 @@
+"""Daily energy accumulator and remaining-energy curve."""
+import pytest
+from energy import EnergyAccumulator, RemainingEnergy
+
+DAY_S = 86400.0
+D0 = 1_700_000_000.0  # UTC epoch start of a local day
+D1 = D0 + DAY_S
+
+
+def test_constant_power_over_a_day():
+    acc = EnergyAccumulator()
+    t = D0
+    while t <= D1 - 60.0:
+        acc.add(t, 1000.0, D0)
+        t += 60.0
+    # Last sample at 23:59, the final minute belongs to the next call
+    assert acc.kwh == pytest.approx(24.0 - 1000.0 * 60.0 / 3_600_000.0)
+    acc.add(D1, 1000.0, D1)
+    assert acc.last_day_kwh == pytest.approx(24.0)
+    assert acc.kwh == 0.0
+
+
+def test_reset_at_local_midnight_splits_the_segment():
+    acc = EnergyAccumulator()
+    acc.add(D1 - 1200.0, 600.0, D0)
+    acc.add(D1 - 600.0, 600.0, D0)  # 0.1 kWh before midnight
+    assert acc.kwh == pytest.approx(0.1)
+    # Linear from 600 W to 1800 W across midnight: 1000 W at 00:00
+    total = acc.add(D1 + 1200.0, 1800.0, D1)
+    assert acc.day_start == D1
+    assert acc.last_day_kwh == pytest.approx(0.1 + (600.0 + 1000.0) / 2 * 600.0 / 3_600_000.0)
+    assert total == pytest.approx((1000.0 + 1800.0) / 2 * 1200.0 / 3_600_000.0)
+
+
+def test_gap_and_missing_samples_are_not_integrated():
+    acc = EnergyAccumulator(max_gap_s=1800.0)
+    acc.add(D0, 1000.0, D0)
+    acc.add(D0 + 3600.0, 1000.0, D0)  # Longer than max_gap_s
+    assert acc.kwh == 0.0
+    acc.add(D0 + 3660.0, None, D0)
+    acc.add(D0 + 3720.0, 1000.0, D0)
+    assert acc.kwh == 0.0
+    acc.add(D0 + 3780.0, 1000.0, D0)
+    assert acc.kwh == pytest.approx(1000.0 * 60.0 / 3_600_000.0)
+    assert acc.add(D0 + 3780.0, 5000.0, D0) == acc.kwh  # Same timestamp is ignored
+
+
+def test_restore_continues_the_day():
+    acc = EnergyAccumulator()
+    acc.add(D0 + 3600.0, 2000.0, D0)
+    acc.add(D0 + 4200.0, 2000.0, D0)
+    restored = EnergyAccumulator()
+    restored.restore(acc.to_dict())
+    assert restored.add(D0 + 4800.0, 2000.0, D0) == pytest.approx(acc.add(D0 + 4800.0, 2000.0, D0))
+    assert restored.kwh == pytest.approx(2000.0 * 1200.0 / 3_600_000.0)
+
+
+def test_remaining_from_samples_is_linear_for_constant_power():
+    times = [D0 + i * 600.0 for i in range(7)]
+    curve = RemainingEnergy.from_samples(times, [1200.0] * 7, times[-1])
+    assert curve.at(times[0]) == pytest.approx(1.2)
+    assert curve.at(times[0] + 900.0) == pytest.approx(0.9)
+    assert curve.at(times[-1]) == 0.0
+
+
+def test_remaining_from_hourly_clips_to_the_window():
+    starts = [D0 + h * 3600.0 for h in range(24)]
+    curve = RemainingEnergy.from_hourly(starts, [500.0] * 24, 3600.0, D0 + 1800.0, D1)
+    assert curve.at(D0) == pytest.approx(0.5 * 23.5)
+    assert curve.at(D0 + 12 * 3600.0) == pytest.approx(0.5 * 12)
+    assert curve.at(D1) == 0.0
@@ -0,0 +1,78 @@
+"""Perez sky diffuse transposition of the solar model."""
+import math
+from datetime import UTC, datetime
+
+import numpy as np
+import pytest
+from solar_model import (
+    PEREZ_COEFFICIENTS,
+    ArraySpec,
+    SolarGeometry,
+    SolarInputs,
+    _perez_sky,
+    _sun_vector,
+    compute,
+    compute_batch,
+)
+
+DT = datetime(2024, 6, 21, 10, 0, tzinfo=UTC)
+FLAT = ArraySpec(1000.0, tilt_deg=0.0, azimuth_deg=180.0)
+
+
+def _flat_poa(elev_deg: float, dni: float, dhi: float) -> tuple[float, bool]:
+    geometry = SolarGeometry(elev_deg, 150.0, 23.4, _sun_vector(elev_deg, 150.0))
+    result = compute(SolarInputs(
+        dt_utc=DT, lat_deg=45.5, lon_deg=5.0, arrays=[FLAT],
+        real_ghi_wm2=dni * math.sin(math.radians(elev_deg)) + dhi,
+        real_dni_wm2=dni, real_dhi_wm2=dhi, geometry=geometry,
+    ))
+    return result.array_poa_wm2[0], result.transposed
+
+
+@pytest.mark.parametrize("elev_deg", [10.0, 30.0, 65.0])
+@pytest.mark.parametrize("dni, dhi", [(0.0, 120.0), (150.0, 250.0), (450.0, 150.0), (850.0, 90.0)])
+def test_flat_panel_receives_the_ghi(elev_deg, dni, dhi):
+    # Flat panel: circumsolar term is F1 × DHI (cos i = cos zenith), no horizon band, no ground
+    poa, transposed = _flat_poa(elev_deg, dni, dhi)
+    assert transposed
+    assert poa == pytest.approx(dni * math.sin(math.radians(elev_deg)) + dhi)
+
+
+def test_no_transposition_below_the_horizon():
+    _poa, transposed = _flat_poa(-2.0, 0.0, 20.0)
+    assert not transposed
+
+
+def test_perez_sky_known_bins():
+    # Overhead sun, diffuse only: clearness 1 (overcast bin), zenith terms vanish
+    f1, f2, inv_b = _perez_sky(90.0, 0.0, 100.0, 172)
+    f11, f12, _f13, f21, f22, _f23 = PEREZ_COEFFICIENTS[0]
+    air_mass = 1.0 / (1.0 + 0.50572 * 96.07995 ** -1.6364)  # Kasten & Young at zenith
+    e0 = 1367.0 * (1.0 + 0.033 * math.cos(2.0 * math.pi * 171 / 365.0))
+    delta = 100.0 * air_mass / e0
+    assert inv_b == pytest.approx(1.0)
+    assert f1 == pytest.approx(f11 + f12 * delta)
+    assert f2 == pytest.approx(f21 + f22 * delta)
+    # No diffuse: no sky diffuse coefficients
+    assert _perez_sky(40.0, 800.0, 0.0, 172)[:2] == (0.0, 0.0)
+    # Sun near the horizon: 1 / b capped at 1 / cos 85°
+    assert _perez_sky(2.0, 100.0, 50.0, 172)[2] == pytest.approx(1.0 / math.cos(math.radians(85.0)))
+
+
+def test_batch_matches_scalar_perez():
+    arrays = [ArraySpec(3000.0, 35.0, 160.0), ArraySpec(2000.0, 15.0, 250.0)]
+    ts = DT.timestamp() + np.arange(0.0, 10 * 3600.0, 1800.0) - 4 * 3600.0
+    dni = np.linspace(0.0, 800.0, ts.size)
+    dhi = np.linspace(200.0, 80.0, ts.size)
+    ghi = dni * 0.6 + dhi
+    batch = compute_batch(
+        ts, 45.5, 5.0, arrays, real_ghi_wm2=ghi, real_dni_wm2=dni, real_dhi_wm2=dhi
+    )
+    for i, t in enumerate(ts):
+        result = compute(SolarInputs(
+            dt_utc=datetime.fromtimestamp(t, UTC), lat_deg=45.5, lon_deg=5.0,
+            arrays=arrays, real_ghi_wm2=ghi[i], real_dni_wm2=dni[i], real_dhi_wm2=dhi[i],
+        ))
+        assert bool(batch.transposed[i]) == result.transposed
+        for k in range(len(arrays)):
+            assert batch.array_poa_wm2[k][i] == pytest.approx(result.array_poa_wm2[k], abs=1e-6)